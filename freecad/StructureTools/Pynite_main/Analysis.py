@@ -1,24 +1,31 @@
-from math import isclose
 from .LoadCombo import LoadCombo
-from numpy import array, atleast_2d, zeros, subtract, matmul, divide, seterr, nanmax
-from numpy.linalg import solve
-
-def _prepare_model(model):
+from .Assembly import dof_tables, assemble_vector, stack, node_spring_values, SparsityPattern
+from .MemberBatch import MemberBatch
+from .Reordering import node_graph, node_ordering
+from .Solvers import make_solver, LowRankUpdate
+from .Results import attach, DisplacementVectors
+from numpy import array, arange, argsort, empty, flatnonzero, atleast_2d, zeros, subtract, einsum, hstack
+from numpy.linalg import norm
+
+def _prepare_model(model, capacity=None, keep_factorization=False):
     """Prepares a model for analysis by ensuring at least one load combination is defined, generating all meshes that have not already been generated, activating all non-linear members, and internally numbering all nodes and elements.
 
     :param model: The model being prepared for analysis.
     :type model: FEModel3D
+    :param capacity: The number of load combinations to allocate result storage for. Defaults to None, which allocates storage for every load combination.
+    :type capacity: int, optional
+    :param keep_factorization: Keeps the factorization of the stiffness matrix from the last analysis so it can be reused if the stiffness hasn't changed, or updated if only a few elements have. Defaults to False.
+    :type keep_factorization: bool, optional
     """
     
-    # Reset any nodal displacements
-    model._D = {}
-    for node in model.nodes.values():
-        node.DX = {}
-        node.DY = {}
-        node.DZ = {}
-        node.RX = {}
-        node.RY = {}
-        node.RZ = {}
+    # Reset any superposed load case results and solver statistics
+    model._combo_factors = {}
+    if not keep_factorization:
+        model._solver = None
+        model.solver_stats = None
+        model._low_rank = None
+        model._low_rank_base = None
+    model.pdelta_report = {}
 
     # Ensure there is at least 1 load combination to solve if the user didn't define any
     if model.load_combos == {}:
@@ -43,6 +50,12 @@ def _prepare_model(model):
     # Assign an internal ID to all nodes and elements in the model. This number is different from the name used by the user to identify nodes and elements.
     _renumber(model)
 
+    # Start a new result store. The nodal displacement and reaction dictionaries, and the model's
+    # displacement vectors, become views into it.
+    model._results = attach(model, capacity)
+    model._D = DisplacementVectors(model._results)
+    model._end_forces = {}
+
 def _identify_combos(model, combo_tags=None):
     """Returns a list of load combinations that are to be run based on tags given by the user.
 
@@ -73,87 +86,148 @@ def _identify_combos(model, combo_tags=None):
 
 def _check_stability(model, K):
     """
-    Identifies nodal instabilities in a model's stiffness matrix.
+    Identifies nodal instabilities in a model's stiffness matrix. Any unsupported degree of freedom
+    with no stiffness on the diagonal is reported.
+
+    :param K: The global stiffness matrix, or just its diagonal as a 1D array.
+    :type K: sparse matrix or ndarray
+    :raises Exception: Occurs when an unstable node is found.
     """
 
-    # Initialize the `unstable` flag to `False`
-    unstable = False
+    # Pull the diagonal of the stiffness matrix once
+    diagonal = K if K.ndim == 1 else K.diagonal()
 
-    # Step through each diagonal term in the stiffness matrix
-    for i in range(K.shape[0]):
-        
-        # Determine which node this term belongs to
-        node = [node for node in model.nodes.values() if node.ID == int(i/6)][0]
-
-        # Determine which degree of freedom this term belongs to
-        dof = i%6
-
-        # Check to see if this degree of freedom is supported
-        if dof == 0:
-            supported = node.support_DX
-        elif dof == 1:
-            supported = node.support_DY
-        elif dof == 2:
-            supported = node.support_DZ
-        elif dof == 3:
-            supported = node.support_RX
-        elif dof == 4:
-            supported = node.support_RY
-        elif dof == 5:
-            supported = node.support_RZ
-
-        # Check if the degree of freedom on this diagonal is unstable
-        if isclose(K[i, i], 0) and not supported:
-
-            # Flag the model as unstable
-            unstable = True
-
-            # Identify which direction this instability affects
-            if i%6 == 0:
-                direction = 'for translation in the global X direction.'
-            if i%6 == 1:
-                direction = 'for translation in the global Y direction.'
-            if i%6 == 2:
-                direction = 'for translation in the global Z direction.'
-            if i%6 == 3:
-                direction = 'for rotation about the global X axis.'
-            if i%6 == 4:
-                direction = 'for rotation about the global Y axis.'
-            if i%6 == 5:
-                direction = 'for rotation about the global Z axis.'
-
-            # Print a message to the console
-            print('* Nodal instability detected: node ' + node.name + ' is unstable ' + direction)
-
-    if unstable:
+    # Index the nodes by ID, and build a mask of the supported degrees of freedom in global order
+    nodes = empty(len(model.nodes), dtype=object)
+    supported = zeros((len(model.nodes), 6), dtype=bool)
+    for node in model.nodes.values():
+        nodes[node.ID] = node
+        supported[node.ID] = (node.support_DX, node.support_DY, node.support_DZ,
+                              node.support_RX, node.support_RY, node.support_RZ)
+
+    # Find the unsupported degrees of freedom with no stiffness
+    unstable = flatnonzero((diagonal == 0) & ~supported.ravel())
+
+    directions = ('for translation in the global X direction.',
+                  'for translation in the global Y direction.',
+                  'for translation in the global Z direction.',
+                  'for rotation about the global X axis.',
+                  'for rotation about the global Y axis.',
+                  'for rotation about the global Z axis.')
+
+    # Print a message to the console for each unstable degree of freedom
+    for i in unstable:
+        print('* Nodal instability detected: node ' + nodes[i//6].name + ' is unstable ' + directions[i%6])
+
+    if len(unstable):
         raise Exception('Unstable node(s). See console output for details.')
 
     return
 
-def _PDelta_step(model, combo_name, P1, FER1, D1_indices, D2_indices, D2, log=True, sparse=True, check_stability=False, max_iter=30, first_step=True):
+def _TC_step(model, combo_name, P1, FER1, D1_indices, D2_indices, D2, log=False, sparse=True, check_stability=True, max_iter=30, spring_tolerance=0, member_tolerance=0, max_update_rank=120):
+    """Performs first-order analysis of a load combination, iterating until tension/compression-only members and springs have converged.
+
+    :param combo_name: The name of the load combination to analyze.
+    :type combo_name: str
+    :param P1: The partitioned global nodal force vector for the unknown displacements.
+    :type P1: array
+    :param FER1: The partitioned global fixed end reaction vector for the unknown displacements.
+    :type FER1: array
+    :param max_iter: The maximum number of iterations to try to get convergence for tension/compression-only analysis. Defaults to 30.
+    :type max_iter: int, optional
+    :param max_update_rank: The number of degrees of freedom the accumulated low-rank update may touch before the stiffness matrix is refactored. Defaults to 120.
+    :type max_update_rank: int, optional
+    :raises Exception: Occurs when the tension/compression-only analysis diverges.
+    """
+
+    combo = model.load_combos[combo_name]
+
+    # The partitioned stiffness matrix has the same structure for every load combination and
+    # iteration, so its sparsity pattern is built once and its values refilled in place
+    pattern = _sparsity_pattern(model)
+
+    # Keep track of the number of iterations
+    iter_count = 1
+    convergence = False
+    divergence = False
+
+    # Iterate until convergence or divergence occurs
+    while not convergence and not divergence:
+
+        # Check for tension/compression-only divergence
+        if iter_count > max_iter:
+            divergence = True
+            raise Exception('Model diverged during tension/compression-only analysis')
+
+        # Refill the partitioned global stiffness matrix K11, K12, K21, K22 in place.
+        # Members and springs deactivated by the last iteration are zeroed.
+        values = _element_values(model, combo_name)
+        K11, K12, K21, K22 = pattern.assemble(values, sparse)
+
+        # Check the stiffness matrix for nodal instabilities if requested
+        if check_stability:
+            if log: print('- Checking nodal stability')
+            _check_stability(model, pattern.diagonal(values))
+
+        # Calculate the global displacement vector
+        if log: print('- Calculating global displacement vector')
+        if K11.shape == (0, 0):
+            # All displacements are known, so D1 is an empty vector
+            D1 = []
+        else:
+            # Calculate the unknown displacements D1. Members and springs switched on or off
+            # since the last factorization are applied as a low-rank update.
+            solve = _updated_solver(model, pattern, values, K11, sparse, max_update_rank)
+            D1 = solve(subtract(subtract(P1, FER1), K12 @ D2))
+
+        # Store the calculated displacements to the model and the nodes in the model
+        _store_displacements(model, D1, D2, D1_indices, D2_indices, combo)
+
+        # Check for tension/compression-only convergence
+        convergence = _check_TC_convergence(model, combo_name, log=log, spring_tolerance=spring_tolerance, member_tolerance=member_tolerance)
+
+        if not convergence:
+            if log: print('- Tension/compression-only analysis did not converge. Adjusting stiffness matrix and reanalyzing.')
+        else:
+            if log: print('- Tension/compression-only analysis converged after ' + str(iter_count) + ' iteration(s)')
+
+        # Keep track of the number of tension/compression only iterations
+        iter_count += 1
+
+def _PDelta_step(model, combo_name, P1, FER1, D1_indices, D2_indices, D2, log=True, sparse=True, check_stability=False, max_iter=30, first_step=True, tol=None, force_tol=None, method='newton'):
     """Performs second order (P-Delta) analysis. This type of analysis is appropriate for most models using beams, columns and braces. Second order analysis is usually required by material-specific codes. The analysis is iterative and takes longer to solve. Models with slender members and/or members with combined bending and axial loads will generally have more significant P-Delta effects. P-Delta effects in plates/quads are not considered.
 
     :param combo_name: The name of the load combination to evaluate P-Delta effects for.
     :type combo_name: string
     :param log: Prints updates to the console if set to True. Default is False.
     :type log: bool, optional
-    :param check_stability: When set to True, checks the stiffness matrix for any unstable degrees of freedom and reports them back to the console. This does add to the solution time. Defaults to True.
+    :param check_stability: When set to True, checks the stiffness matrix for any unstable degrees of freedom and reports them back to the console. Defaults to True.
     :type check_stability: bool, optional
     :param max_iter: The maximum number of iterations permitted. If this value is exceeded the program will report divergence. Defaults to 30.
     :type max_iter: int, optional
     :param sparse: Indicates whether the sparse matrix solver should be used. A matrix can be considered sparse or dense depening on how many zero terms there are. Structural stiffness matrices often contain many zero terms. The sparse solver can offer faster solutions for such matrices. Using the sparse solver on dense matrices may lead to slower solution times. Be sure ``scipy`` is installed to use the sparse solver. Default is True.
     :type sparse: bool, optional
-    :param check_stability: Indicates whether nodal stability should be checked. This slows down the analysis considerably, but can be useful for small models or for debugging. Default is `False`.
+    :param check_stability: Indicates whether nodal stability should be checked. Default is `False`.
     :type check_stability: bool, optional
     :param first_step: Indicates whether this P-Delta analysis is the first load step. Usually this should be set to `True`, unless this is a subsequent step of an analysis using multiple load steps. Default is True.
     :type first_step: bool, optional
+    :param tol: The relative displacement tolerance. When a tolerance is given the first load step is iterated to convergence by `_PDelta_converge`. Defaults to None, which runs a first order solve followed by a single solve with the geometric stiffness.
+    :type tol: float, optional
+    :param force_tol: The relative force residual tolerance. Defaults to None, which uses `tol`.
+    :type force_tol: float, optional
+    :param method: The iteration scheme used when a tolerance is given. See `_PDelta_converge`. Defaults to 'newton'.
+    :type method: str, optional
     :raises ValueError: Occurs when there is a singularity in the stiffness matrix, which indicates an unstable structure.
     :raises Exception: Occurs when a model fails to converge.
     """
 
-    # Import `scipy` features if the sparse solver is being used
-    if sparse == True:
-        from scipy.sparse.linalg import spsolve
+    if first_step and (tol is not None or force_tol is not None):
+        _PDelta_converge(model, combo_name, P1, FER1, D1_indices, D2_indices, D2, log, sparse, check_stability, max_iter, tol, force_tol, method)
+        return
+
+    # Keep a record of the work done for this load combination
+    report = model.pdelta_report[combo_name] = {'method': None, 'iterations': 0, 'tc_iterations': 1, 'solves': 0, 'factorizations': 0,
+                                                'displacement_norm': None, 'force_norm': None, 'converged': False}
 
     iter_count_TC = 1    # Tracks tension/compression-only iterations
     iter_count_PD = 1    # Tracks P-Delta iterations
@@ -161,6 +235,10 @@ def _PDelta_step(model, combo_name, P1, FER1, D1_indices, D2_indices, D2, log=Tr
     convergence_TC = False  # Tracks tension/compression-only convergence
     divergence_TC = False  # Tracks tension/compression-only divergence
 
+    # The partitioned stiffness matrix has the same structure on every iteration, so its
+    # sparsity pattern is built once and its values are refilled in place on each iteration
+    pattern = _sparsity_pattern(model)
+
     # Iterate until either T/C convergence or divergence occurs. Perform at least 2 iterations for the P-Delta analysis.
     while (convergence_TC == False and divergence_TC == False) or iter_count_PD <= 2:
 
@@ -168,46 +246,17 @@ def _PDelta_step(model, combo_name, P1, FER1, D1_indices, D2_indices, D2, log=Tr
         if log:
             print('- Beginning tension/compression-only iteration #' + str(iter_count_TC))
 
-        # Calculate the partitioned global stiffness matrices
-        if sparse == True:
-
-            # Calculate the initial stiffness matrix
-            K11, K12, K21, K22 = _partition(model, model.K(combo_name, log, check_stability, sparse).tolil(), D1_indices, D2_indices)
+        # Check the initial stiffness matrix for nodal instabilities if requested
+        if check_stability:
+            _check_stability(model, pattern.diagonal(_element_values(model, combo_name)))
 
-            # Calculate the geometric stiffness matrix
-            if iter_count_PD == 1 and first_step:
-                # For the first iteration of the first load step P=0
-                Kg11, Kg12, Kg21, Kg22 = _partition(model, model.Kg(combo_name, log, sparse, True), D1_indices, D2_indices)
-            else:
-                # For subsequent iterations P will be calculated based on member end displacements
-                Kg11, Kg12, Kg21, Kg22 = _partition(model, model.Kg(combo_name, log, sparse, False), D1_indices, D2_indices)
-            
-            # The stiffness matrices are currently `lil` format which is great for
-            # memory, but slow for mathematical operations. They will be converted to
-            # `csr` format. The `+` operator performs matrix addition on `csr`
-            # matrices.
-            K11 = K11.tocsr() + Kg11.tocsr()
-            K12 = K12.tocsr() + Kg12.tocsr()
-            K21 = K21.tocsr() + Kg21.tocsr()
-            K22 = K22.tocsr() + Kg22.tocsr()
+        # Calculate the geometric stiffness matrices. For the first iteration of the first load
+        # step P=0. For subsequent iterations P will be calculated based on member end
+        # displacements.
+        Kg = _member_Kg(model, combo_name, iter_count_PD == 1 and first_step)
 
-        else:
-
-            # Initial stiffness matrix
-            K11, K12, K21, K22 = _partition(model, model.K(combo_name, log, check_stability, sparse), D1_indices, D2_indices)
-            
-            # Geometric stiffness matrix
-            if iter_count_PD == 1 and first_step:
-                # For the first iteration of the first load step P=0
-                Kg11, Kg12, Kg21, Kg22 = _partition(model, model.Kg(combo_name, log, sparse, True), D1_indices, D2_indices)
-            else:
-                # For subsequent iterations P will be calculated based on member end displacements
-                Kg11, Kg12, Kg21, Kg22 = _partition(model.Kg(combo_name, log, sparse, False), D1_indices, D2_indices)
-            
-            K11 = K11 + Kg11
-            K12 = K12 + Kg12
-            K21 = K21 + Kg21
-            K22 = K22 + Kg22
+        # Refill the partitioned global stiffness matrix with the initial and geometric stiffness
+        K11, K12, K21, K22 = pattern.assemble(_element_values(model, combo_name, Kg), sparse)
 
         # Calculate the changes to the global displacement vector
         if log: print('- Calculating changes to the global displacement vector')
@@ -217,19 +266,14 @@ def _PDelta_step(model, combo_name, P1, FER1, D1_indices, D2_indices, D2, log=Tr
         else:
             try:
                 # Calculate the change in the displacements Delta_D1
-                if sparse == True:
-                    # The partitioned stiffness matrix is already in `csr` format. The `@`
-                    # operator performs matrix multiplication on sparse matrices.
-                    Delta_D1 = spsolve(K11.tocsr(), subtract(subtract(P1, FER1), K12.tocsr() @ D2))
-                    Delta_D1 = Delta_D1.reshape(len(Delta_D1), 1)
-                else:
-                    # The partitioned stiffness matrix is in `csr` format. It will be
-                    # converted to a 2D dense array for mathematical operations.
-                    Delta_D1 = solve(K11, subtract(subtract(P1, FER1), matmul(K12, D2)))
-
-            except:
+                Delta_D1 = _factorize(model, K11, sparse)(subtract(subtract(P1, FER1), K12 @ D2))
+            except Exception:
                 # Return out of the method if 'K' is singular and provide an error message
                 raise ValueError('The stiffness matrix is singular, which indicates that the structure is unstable.')
+            report['factorizations'] += 1
+            report['solves'] += 1
+
+        report['iterations'] += 1
 
         # Sum the calculated displacements
         if first_step:
@@ -265,7 +309,164 @@ def _PDelta_step(model, combo_name, P1, FER1, D1_indices, D2_indices, D2, log=Tr
 
         # Increment the P-Delta iteration count
         iter_count_PD += 1
-    
+
+    report['tc_iterations'] = iter_count_TC
+    report['converged'] = True
+
+    # Flag the model as solved
+    model.solution = 'P-Delta'
+
+# The iteration schemes available to `_PDelta_converge`
+PDELTA_METHODS = ('full', 'newton', 'aitken')
+
+def _PDelta_converge(model, combo_name, P1, FER1, D1_indices, D2_indices, D2, log=True, sparse=True, check_stability=False, max_iter=30, tol=None, force_tol=None, method='newton'):
+    """Performs P-Delta analysis for a load combination, iterating until the displacements and the
+    out-of-balance forces have converged. The first iteration is a first order solve. Each later
+    iteration updates the geometric stiffness using the member axial forces from the current
+    displacements and corrects the displacements by the residual
+
+        r = P1 - FER1 - K12 D2 - (K11 + Kg11) D1
+
+    The analysis has converged once the last change in the displacements is within `tol` of the
+    displacements and the residual is within `force_tol` of the applied forces, both measured with
+    the 2-norm. Tension/compression-only members are checked after each converged solution. If any
+    of them change state the iterations continue from the current displacements.
+
+    The iteration scheme is selected using `method`:
+
+    * 'full' refactors the stiffness matrix with the updated geometric stiffness on every iteration.
+    * 'newton' is a modified Newton scheme. The stiffness matrix is factored on the first iteration
+      with geometric stiffness, and after any tension/compression-only state change. Every other
+      iteration only needs a solve with the existing factorization.
+    * 'aitken' is the modified Newton scheme with Aitken relaxation of the displacement
+      corrections, which speeds up convergence for sway sensitive models.
+
+    The iteration counts, number of solves and factorizations, and the final norms are kept in
+    `model.pdelta_report[combo_name]`.
+
+    :param combo_name: The name of the load combination to evaluate P-Delta effects for.
+    :type combo_name: str
+    :param tol: The relative displacement tolerance. Defaults to None, which uses `force_tol`.
+    :type tol: float, optional
+    :param force_tol: The relative force residual tolerance. Defaults to None, which uses `tol`.
+    :type force_tol: float, optional
+    :param method: 'full', 'newton' or 'aitken'. Defaults to 'newton'.
+    :type method: str, optional
+    :raises ValueError: Occurs when the method is not recognized, or when there is a singularity in the stiffness matrix, which indicates an unstable structure.
+    :raises Exception: Occurs when a model fails to converge.
+    """
+
+    if method not in PDELTA_METHODS:
+        raise ValueError(f"Unknown P-Delta method '{method}'. Use one of {PDELTA_METHODS}.")
+
+    tol = force_tol if tol is None else tol
+    force_tol = tol if force_tol is None else force_tol
+
+    combo = model.load_combos[combo_name]
+    pattern = _sparsity_pattern(model)
+
+    report = model.pdelta_report[combo_name] = {'method': method, 'iterations': 0, 'tc_iterations': 1, 'solves': 0, 'factorizations': 0,
+                                                'displacement_norm': None, 'force_norm': None, 'converged': False}
+
+    def factor(K11):
+        try:
+            solver = _factorize(model, K11, sparse)
+        except Exception:
+            raise ValueError('The stiffness matrix is singular, which indicates that the structure is unstable.')
+        report['factorizations'] += 1
+        return solver
+
+    def counted_solve(solver, b):
+        report['solves'] += 1
+        return solver(b)
+
+    # All displacements are known, so there is nothing to iterate on
+    if pattern.n_free == 0:
+        _store_displacements(model, zeros((0, 1)), D2, D1_indices, D2_indices, combo)
+        _check_TC_convergence(model, combo_name, log)
+        report['converged'] = True
+        model.solution = 'P-Delta'
+        return
+
+    # Check the initial stiffness matrix for nodal instabilities if requested
+    if check_stability:
+        _check_stability(model, pattern.diagonal(_element_values(model, combo_name)))
+
+    D1 = None              # The current displacements
+    solver = None          # The factorization used for the corrections
+    change = float('inf')  # The relative change in the displacements on the last iteration
+    omega, dD_last = 1.0, None
+    iter_count_PD = 0      # Iterations since the last tension/compression-only state change
+
+    while True:
+
+        # Refill the partitioned stiffness matrix. The first order solve has no geometric stiffness.
+        Kg = _member_Kg(model, combo_name, D1 is None)
+        K11, K12, K21, K22 = pattern.assemble(_element_values(model, combo_name, Kg), sparse)
+        b = subtract(subtract(P1, FER1), K12 @ D2)
+        report['iterations'] += 1
+        iter_count_PD += 1
+
+        if D1 is None:
+            if log: print('- Calculating the first order displacements')
+            D1 = counted_solve(factor(K11), b)
+
+        else:
+
+            # Check the out-of-balance forces at the current displacements
+            residual = b - K11 @ D1
+            report['force_norm'] = norm(residual)/max(norm(b), 1e-300)
+            report['displacement_norm'] = change
+            if log: print('- P-Delta iteration #' + str(iter_count_PD) + ': displacement norm = ' + str(change) + ', force norm = ' + str(report['force_norm']))
+            if change <= tol and report['force_norm'] <= force_tol:
+                break
+
+            if iter_count_PD > max_iter:
+                raise Exception('- P-Delta analysis did not converge after ' + str(max_iter) + ' iterations')
+
+            # Correct the displacements
+            if method == 'full':
+                dD = counted_solve(factor(K11), b) - D1
+            else:
+                if solver is None:
+                    solver = factor(K11)
+                dD = counted_solve(solver, residual)
+
+            # Aitken relaxation, based on how the correction changed since the last iteration
+            if method == 'aitken' and dD_last is not None:
+                difference = dD - dD_last
+                if (difference**2).sum() > 0:
+                    omega = min(max(-omega*(dD_last*difference).sum()/(difference**2).sum(), 0.1), 2.0)
+            dD_last = dD
+
+            D1 = D1 + omega*dD
+            change = norm(omega*dD)/max(norm(D1), 1e-300)
+
+        _store_displacements(model, D1, D2, D1_indices, D2_indices, combo)
+
+        # Check whether the tension/compression-only analysis has converged and deactivate any
+        # members that are showing forces they can't hold. If any have changed state the
+        # stiffness matrix has to be refactored, and the iterations continue from the current
+        # displacements.
+        if not _check_TC_convergence(model, combo_name, log):
+
+            if log:
+                print('- Tension/compression-only analysis did not converge on this iteration')
+                print('- Stiffness matrix will be adjusted')
+
+            report['tc_iterations'] += 1
+            if report['tc_iterations'] > max_iter:
+                raise Exception('- Model diverged during tension/compression-only analysis')
+
+            solver = None
+            change = float('inf')
+            omega, dD_last = 1.0, None
+            iter_count_PD = 0
+
+    if log: print('- P-Delta analysis converged after ' + str(report['iterations']) + ' iteration(s)')
+
+    report['converged'] = True
+
     # Flag the model as solved
     model.solution = 'P-Delta'
 
@@ -277,49 +478,26 @@ def _pushover_step(model, combo_name, push_combo, step_num, P1, FER1, D1_indices
     # Run/rerun the load step until convergence occurs
     while run_step == True:
 
-        # Calculate the partitioned global stiffness matrices
-        # Sparse solver
+        # Calculate the partitioned initial and geometric stiffness matrices. The `combo_name`
+        # variable in the code below is not the name of the pushover load combination. Rather it
+        # is the name of the primary combination that the pushover load will be added to. Axial
+        # loads used to develop Kg are calculated from the displacements stored in `combo_name`.
+        pattern = _sparsity_pattern(model)
+        if check_stability:
+            _check_stability(model, pattern.diagonal(_element_values(model, combo_name)))
+        Kg = _member_Kg(model, combo_name, False)
+        K11, K12, K21, K22 = pattern.assemble(_element_values(model, combo_name, Kg), sparse)
+
+        # Calculate the stiffness reduction matrix
         if sparse == True:
-
-            from scipy.sparse.linalg import spsolve
-            
-            # Calculate the initial stiffness matrix
-            K11, K12, K21, K22 = _partition(model, model.K(combo_name, log, check_stability, sparse).tolil(), D1_indices, D2_indices)
-
-            # Calculate the geometric stiffness matrix
-            # The `combo_name` variable in the code below is not the name of the pushover load combination. Rather it is the name of the primary combination that the pushover load will be added to. Axial loads used to develop Kg are calculated from the displacements stored in `combo_name`.
-            Kg11, Kg12, Kg21, Kg22 = _partition(model, model.Kg(combo_name, log, sparse, False).tolil(), D1_indices, D2_indices)
-
-            # Calculate the stiffness reduction matrix
             Km11, Km12, Km21, Km22 = _partition(model, model.Km(combo_name, push_combo, step_num, log, sparse).tolil(), D1_indices, D2_indices)
-            
-            # The stiffness matrices are currently `lil` format which is great for
-            # memory, but slow for mathematical operations. They will be converted to
-            # `csr` format. The `+` operator performs matrix addition on `csr`
-            # matrices.
-            K11 = K11.tocsr() + Kg11.tocsr() + Km11.tocsr()
-            K12 = K12.tocsr() + Kg12.tocsr() + Km12.tocsr()
-            K21 = K21.tocsr() + Kg21.tocsr() + Km21.tocsr()
-            K22 = K22.tocsr() + Kg22.tocsr() + Km22.tocsr()
-
-        # Dense solver
+            K11 = K11 + Km11.tocsr()
+            K12 = K12 + Km12.tocsr()
         else:
-
-            # Initial stiffness matrix
-            K11, K12, K21, K22 = _partition(model, model.K(combo_name, log, check_stability, sparse), D1_indices, D2_indices)
-            
-            # Geometric stiffness matrix
-            # The `combo_name` variable in the code below is not the name of the pushover load combination. Rather it is the name of the primary combination that the pushover load will be added to. Axial loads used to develop Kg are calculated from the displacements stored in `combo_name`.
-            Kg11, Kg12, Kg21, Kg22 = _partition(model.Kg(combo_name, log, sparse, False), D1_indices, D2_indices)
-            
-            # Calculate the stiffness reduction matrix
             Km11, Km12, Km21, Km22 = _partition(model, model.Km(combo_name, push_combo, step_num, log, sparse), D1_indices, D2_indices)
-            
-            K11 = K11 + Kg11 + Km11
-            K12 = K12 + Kg12 + Km12
-            K21 = K21 + Kg21 + Km21
-            K22 = K22 + Kg22 + Km22
-        
+            K11 = K11 + Km11
+            K12 = K12 + Km12
+
         # Calculate the changes to the global displacement vector
         if log: print('- Calculating changes to the global displacement vector')
         if K11.shape == (0, 0):
@@ -328,17 +506,8 @@ def _pushover_step(model, combo_name, push_combo, step_num, P1, FER1, D1_indices
         else:
             try:
                 # Calculate the change in the displacements Delta_D1
-                if sparse == True:
-                    # The partitioned stiffness matrix is already in `csr` format. The `@`
-                    # operator performs matrix multiplication on sparse matrices.
-                    Delta_D1 = spsolve(K11.tocsr(), subtract(subtract(P1, FER1), K12.tocsr() @ D2))
-                    Delta_D1 = Delta_D1.reshape(len(Delta_D1), 1)
-                else:
-                    # The partitioned stiffness matrix is in `csr` format. It will be
-                    # converted to a 2D dense array for mathematical operations.
-                    Delta_D1 = solve(K11, subtract(subtract(P1, FER1), matmul(K12, D2)))
-
-            except:
+                Delta_D1 = _factorize(model, K11, sparse)(subtract(subtract(P1, FER1), K12 @ D2))
+            except Exception:
                 # Return out of the method if 'K' is singular and provide an error message
                 raise ValueError('The structure is unstable. Unable to proceed any further with analysis.')
 
@@ -376,6 +545,178 @@ def _pushover_step(model, combo_name, push_combo, step_num, P1, FER1, D1_indices
     # Flag the model as solved
     model.solution = 'Pushover'
 
+def _factorize(model, K11, sparse=True):
+    """Factors the partitioned stiffness matrix `K11` once so it can be reused to solve for any
+    number of right-hand sides. The model's `solver` backend is used if one has been set.
+    Otherwise the sparse LU backend is used when `sparse` is `True` and the dense LU backend when
+    it isn't. Timing and memory statistics for the analysis are kept in `model.solver_stats`.
+
+    :param K11: The partitioned stiffness matrix for the unknown displacements.
+    :type K11: sparse matrix or array
+    :param sparse: Indicates whether the sparse solver should be used when no backend has been
+                   set. Defaults to True.
+    :type sparse: bool, optional
+    :raises Exception: Occurs when the stiffness matrix is singular.
+    :return: The factored backend. Calling it returns the solution for a right-hand side vector
+             or matrix.
+    :rtype: Solver
+    """
+
+    # Reuse the backend selected earlier in this analysis so its statistics accumulate
+    backend = model._solver
+    if backend is None:
+        solver = model.solver
+        if solver is None:
+            solver = 'lu' if sparse == True else 'dense'
+        backend = model._solver = make_solver(solver, K11)
+        model.solver_stats = backend.stats
+
+    return backend.factor(K11)
+
+def _updated_solver(model, pattern, values, K11, sparse=True, max_update_rank=120):
+    """Returns a solver for `K11` that reuses the last factorization where it can. When only a few
+    elements have been activated or deactivated since `K11` was last factored, the change is
+    applied as a low-rank update with the Woodbury identity. `K11` is refactored once the
+    accumulated change touches more than `max_update_rank` free degrees of freedom.
+
+    :param pattern: The sparsity pattern `K11` was assembled from.
+    :type pattern: SparsityPattern
+    :param values: The element values `K11` was assembled from, as returned by `_element_values`.
+    :type values: dict
+    :param K11: The partitioned stiffness matrix for the unknown displacements.
+    :type K11: sparse matrix or array
+    :param sparse: Indicates whether the sparse solver should be used when no backend has been
+                   set. Defaults to True.
+    :type sparse: bool, optional
+    :param max_update_rank: The largest number of degrees of freedom a low-rank update may touch
+                            before `K11` is refactored. Set to 0 to refactor every time.
+                            Defaults to 120.
+    :type max_update_rank: int, optional
+    :return: The solver. Calling it returns the solution for a right-hand side.
+    :rtype: LowRankUpdate
+    """
+
+    solver = model._low_rank
+    if solver is not None and max_update_rank:
+        idx, S = pattern.update(values, model._low_rank_base)
+        if len(idx) <= max_update_rank:
+            try:
+                solver.update(idx, S)
+                return solver
+            except Exception:
+                # Let a full factorization decide whether the structure is really unstable
+                pass
+
+    model._low_rank = LowRankUpdate(_factorize(model, K11, sparse), K11.shape[0])
+    model._low_rank_base = values
+    return model._low_rank
+
+def _sparsity_pattern(model):
+    """Returns the sparsity pattern of the model's partitioned stiffness matrix. The pattern is
+    only rebuilt when the model's topology or equation numbering has changed since it was last
+    built. Equations must already have been numbered by `_partition_D`.
+
+    :rtype: SparsityPattern
+    """
+
+    pattern = model._sparsity_pattern
+    if pattern is None or not pattern.matches(model._dof_tables, model._equations, model._n_free):
+        pattern = SparsityPattern(model._dof_tables, model._equations, model._n_free)
+        model._sparsity_pattern = pattern
+
+        # A factorization of the old matrix can't be updated to the new one
+        model._low_rank = None
+        model._low_rank_base = None
+
+    return pattern
+
+def _element_values(model, combo_name, Kg=None):
+    """Returns the stacked element stiffness matrices used to refill a `SparsityPattern` for a load
+    combination. Elements that are inactive for the load combination are zeroed.
+
+    :param combo_name: The name of the load combination.
+    :type combo_name: str
+    :param Kg: Member geometric stiffness matrices to add to the member stiffness matrices, as
+               returned by `_member_Kg`. Defaults to None.
+    :type Kg: ndarray, optional
+    :return: The element matrices keyed by group name.
+    :rtype: dict
+    """
+
+    tables = model._dof_tables
+    values = {'node_springs': node_spring_values(tables['node_springs']),
+              'quads': tables['quads'].stiffness(),
+              'plates': tables['plates'].stiffness()}
+
+    for group in ('springs', 'members'):
+        K = tables[group].stiffness()
+        if group == 'members' and Kg is not None:
+            K = K + Kg
+        values[group] = K*tables[group].active(combo_name)[:, None, None]
+
+    return values
+
+def _member_Kg(model, combo_name, first_step=True):
+    """Returns the global geometric stiffness matrix of every sub-member in the model, stacked in
+    the order of the member DOF index table.
+
+    :param combo_name: The name of the load combination used to calculate the member axial forces.
+    :type combo_name: str
+    :param first_step: Takes the axial forces as zero if set to `True`, as they are in the first
+                       iteration of the first load step. Defaults to True.
+    :type first_step: bool, optional
+    :return: The member geometric stiffness matrices, shape `(n_members, 12, 12)`.
+    :rtype: ndarray
+    """
+
+    members = model._dof_tables['members'].elements
+
+    # For the first load step P = 0, and the geometric stiffness is zero
+    if first_step:
+        return zeros((len(members), 12, 12))
+
+    # The geometric stiffness is linear in the axial force, so scale each member's unit matrix by
+    # the axial force due to axial strain
+    batch = model._member_batch
+    active = array([member.active[combo_name] for member in members], dtype=bool)
+    P = batch.axial_forces(model._D[combo_name], model._dof_tables['members'].dofs, active)
+
+    return P[:, None, None]*batch.unit_geometric_stiffness()
+
+def _member_forces(model, D, fer, active=None, second_order=False):
+    """Returns the local end force vectors of every sub-member for one or more global displacement
+    vectors, matching `Member3D.f()`.
+
+    :param D: The global displacement vectors, shape `(n_dofs, m)`.
+    :type D: array
+    :param fer: The local sub-member fixed end reaction vectors, shape `(n_members, 12, m)`.
+    :type fer: array
+    :param active: Flags for the sub-members that are active, shape `(n_members, m)`. The axial
+                   displacements of inactive members are ignored, as they are by `Member3D.D()`.
+                   Defaults to None, which treats every member as active.
+    :type active: array, optional
+    :param second_order: Includes the geometric stiffness, using the member axial forces from
+                         their axial strains, if set to `True`. Defaults to False.
+    :type second_order: bool, optional
+    :return: The local end force vectors, shape `(n_members, 12, m)`.
+    :rtype: array
+    """
+
+    batch = model._member_batch
+    D_members = D[model._dof_tables['members'].dofs]
+    if active is not None:
+        D_members[:, [0, 6], :] *= active[:, None, :]
+
+    d = einsum('nij,njm->nim', batch.T, D_members)
+    f = einsum('nij,njm->nim', batch.k, d) + fer
+
+    if second_order:
+        batch.unit_geometric_stiffness()
+        P = (batch.E*batch.A/batch.L)[:, None]*(d[:, 6, :] - d[:, 0, :])
+        f += P[:, None, :]*einsum('nij,njm->nim', batch.kg_unit, d)
+
+    return f
+
 def _unpartition_disp(model, D1, D2, D1_indices, D2_indices):
     """Unpartitions displacements from the solver and returns them as a global displacement vector
 
@@ -393,31 +734,24 @@ def _unpartition_disp(model, D1, D2, D1_indices, D2_indices):
     :rtype: array
     """
     
-    D = zeros((len(model.nodes)*6, 1))
-
-    # Step through each node in the model
-    for node in model.nodes.values():
-        
-        # Step through each degree of freedom at the node
-        for i in range(6):
-
-            # Check if the dof is in the list of enforced displacements
-            if node.ID*6 + i in D2_indices:
-                # Get the enforced displacement
-                D[(node.ID*6 + i, 0)] = D2[D2_indices.index(node.ID*6 + i), 0]
-            else:
-                # Get the calculated displacement
-                D[(node.ID*6 + i, 0)] = D1[D1_indices.index(node.ID*6 + i), 0]
+    # Scatter the calculated and enforced displacements into their global positions. Each column of
+    # `D1` and `D2` holds the displacements for one load combination.
+    D1 = atleast_2d(array(D1, dtype=float).T).T if len(D1_indices) else zeros((0, 1))
+    D2 = atleast_2d(array(D2, dtype=float).T).T if len(D2_indices) else zeros((0, 1))
+    D = zeros((len(model.nodes)*6, max(D1.shape[1], D2.shape[1])))
+    D[D1_indices, :] = D1
+    D[D2_indices, :] = D2
     
     # Return the displacement vector
     return D
 
 def _store_displacements(model, D1, D2, D1_indices, D2_indices, combo):
-    """Stores calculated displacements from the solver into the model's displacement vector `_D` and into each node object in the model
+    """Stores calculated displacements from the solver into the model's result store, which backs the model's displacement vectors `_D` and each node's displacement dictionaries
 
     :param model: The finite element model being evaluated.
     :type model: FEModel3D
-    :param D1: An array of calculated displacements
+    :param D1: An array of calculated displacements. When several load combinations are given,
+               each column holds the displacements for one load combination.
     :type D1: array
     :param D2: An array of enforced displacements
     :type D2: array
@@ -425,28 +759,23 @@ def _store_displacements(model, D1, D2, D1_indices, D2_indices, combo):
     :type D1_indices: list
     :param D2_indices: A list of the degree of freedom indices for each displacement in D2
     :type D2_indices: list
-    :param combo: The load combination to store the displacements for
-    :type combo: LoadCombo
+    :param combo: The load combination (or list of load combinations) to store the displacements for
+    :type combo: LoadCombo or iterable
     """
-    
+
+    combos = [combo] if isinstance(combo, LoadCombo) else list(combo)
+
     # The raw results from the solver are partitioned. Unpartition them.
     D = _unpartition_disp(model, D1, D2, D1_indices, D2_indices)
-    
-    # Store the displacements in the model's global displacement vector
-    model._D[combo.name] = D
-
-    # Store the calculated global nodal displacements into each node object
-    for node in model.nodes.values():
 
-        node.DX[combo.name] = D[node.ID*6 + 0, 0]
-        node.DY[combo.name] = D[node.ID*6 + 1, 0]
-        node.DZ[combo.name] = D[node.ID*6 + 2, 0]
-        node.RX[combo.name] = D[node.ID*6 + 3, 0]
-        node.RY[combo.name] = D[node.ID*6 + 4, 0]
-        node.RZ[combo.name] = D[node.ID*6 + 5, 0]
+    # Store each column for its load combination. The nodes read their displacements from the
+    # model's result store.
+    if D.shape[1] != len(combos):
+        D = D[:, [0]*len(combos)]
+    model._results.set_displacements([combo.name for combo in combos], D)
 
 def _sum_displacements(model, Delta_D1, Delta_D2, D1_indices, D2_indices, combo):
-    """Sums calculated displacements for a load step from the solver into the model's displacement vector `_D` and into each node object in the model.
+    """Sums calculated displacements for a load step from the solver into the model's result store, which backs the model's displacement vectors `_D` and each node's displacement dictionaries.
 
     :param model: The finite element model being evaluated.
     :type model: FEModel3D
@@ -465,19 +794,10 @@ def _sum_displacements(model, Delta_D1, Delta_D2, D1_indices, D2_indices, combo)
     # The raw results from the solver are partitioned. Unpartition them.
     Delta_D = _unpartition_disp(model, Delta_D1, Delta_D2, D1_indices, D2_indices)
 
-    # Sum the load step's global displacement vector with the model's global displacement vector
+    # Sum the load step's global displacement vector with the model's global displacement vector.
+    # The nodes read their displacements from the model's result store.
     model._D[combo.name] += Delta_D
 
-    # Sum the load step's calculated global nodal displacements to each node object's global displacement
-    for node in model.nodes.values():
-
-        node.DX[combo.name] += Delta_D[node.ID*6 + 0, 0]
-        node.DY[combo.name] += Delta_D[node.ID*6 + 1, 0]
-        node.DZ[combo.name] += Delta_D[node.ID*6 + 2, 0]
-        node.RX[combo.name] += Delta_D[node.ID*6 + 3, 0]
-        node.RY[combo.name] += Delta_D[node.ID*6 + 4, 0]
-        node.RZ[combo.name] += Delta_D[node.ID*6 + 5, 0]
-
 def _check_TC_convergence(model, combo_name="Combo 1", log=True, spring_tolerance=0, member_tolerance=0):
 
     # Assume the model has converged until we find out otherwise
@@ -564,16 +884,224 @@ def _check_TC_convergence(model, combo_name="Combo 1", log=True, spring_toleranc
                 # Flag the analysis as not converged
                 convergence = False
 
-        # Reset the sub-member's flag to unsolved. This will allow it to resolve for the same load combination after subsequent iterations have made further changes.
+        # Drop the sub-members' cached segments. This will allow them to resolve for the same load combination after subsequent iterations have made further changes.
         for sub_member in phys_member.sub_members.values():
-            sub_member._solved_combo = None
+            sub_member._clear_segments(combo_name)
 
     # Return whether the TC analysis has converged
     return convergence
   
-def _calc_reactions(model, log=False, combo_tags=None):
+# Maps nodal load directions to the corresponding degree of freedom at the node
+_LOAD_DOFS = {'FX': 0, 'FY': 1, 'FZ': 2, 'MX': 3, 'MY': 4, 'MZ': 5}
+
+def _case_P(model, cases):
+    """Assembles the global nodal force vector for each load case in a single pass over the nodal
+    loads.
+
+    :param model: The finite element model being evaluated.
+    :type model: FEModel3D
+    :param cases: The names of the load cases.
+    :type cases: list
+    :return: A matrix whose columns are the global nodal force vectors for each load case.
+    :rtype: array
+    """
+
+    index = {case: i for i, case in enumerate(cases)}
+    P = zeros((len(model.nodes)*6, len(cases)))
+
+    for node in model.nodes.values():
+        for load in node.NodeLoads:
+            if load[2] in index and load[0] in _LOAD_DOFS:
+                P[node.ID*6 + _LOAD_DOFS[load[0]], index[load[2]]] += load[1]
+
+    return P
+
+def _assemble_FER(model, combo_name):
+    """Assembles the global fixed end reaction vector for a load combination.
+
+    :param model: The finite element model being evaluated.
+    :type model: FEModel3D
+    :param combo_name: The name of the load combination.
+    :type combo_name: str
+    :return: The local fixed end reaction vectors for each sub-member stacked into an
+             `(n_members, 12, 1)` array, and the global fixed end reaction vector.
+    :rtype: tuple
+    """
+
+    tables = model._dof_tables
+    members, plates, quads = tables['members'], tables['plates'], tables['quads']
+
+    # Member fixed end reactions are calculated in local coordinates and then transformed
+    fer = stack([member.fer(combo_name) for member in members.elements], 12, 1)
+    blocks = [(members.dofs, einsum('nij,njk->nik', model._member_batch.T_inv, fer)),
+              (plates.dofs, stack([plate.FER(combo_name) for plate in plates.elements], 24, 1)),
+              (quads.dofs, stack([quad.FER(combo_name) for quad in quads.elements], 24, 1))]
+
+    return fer, assemble_vector(blocks, len(model.nodes)*6)
+
+def _load_factors(combo_list):
+    """Returns the load cases used by a list of load combinations, along with the matrix of load
+    factors that maps load case results onto load combination results.
+
+    :param combo_list: The load combinations.
+    :type combo_list: list
+    :return: The load case names, and an `(n_cases, n_combos)` matrix of load factors.
+    :rtype: tuple
+    """
+
+    cases = []
+    for combo in combo_list:
+        for case in combo.factors:
+            if case not in cases:
+                cases.append(case)
+
+    index = {case: i for i, case in enumerate(cases)}
+    factors = zeros((len(cases), len(combo_list)))
+    for j, combo in enumerate(combo_list):
+        for case, factor in combo.factors.items():
+            factors[index[case], j] += factor
+
+    return cases, factors
+
+def _case_loads(model, cases):
+    """Assembles the load vectors for each load case.
+
+    Element fixed end reactions are evaluated through load combinations, so each load case is
+    temporarily registered as a load combination with a unit load factor.
+
+    :param model: The finite element model being evaluated.
+    :type model: FEModel3D
+    :param cases: The names of the load cases.
+    :type cases: list
+    :return: The global nodal force vectors `P` and fixed end reaction vectors `FER` for each load
+             case as the columns of two matrices, and the local sub-member fixed end reaction
+             vectors stacked into an `(n_members, 12, n_cases)` array.
+    :rtype: tuple
+    """
+
+    P = _case_P(model, cases)
+    FER = zeros((len(model.nodes)*6, len(cases)))
+    fer = zeros((len(model._dof_tables['members'].elements), 12, len(cases)))
+
+    for i, case in enumerate(cases):
+
+        name = '__case__' + str(case)
+        while name in model.load_combos:
+            name = '_' + name
+
+        model.load_combos[name] = LoadCombo(name, factors={case: 1.0})
+        try:
+            fer_case, FER_case = _assemble_FER(model, name)
+        finally:
+            del model.load_combos[name]
+
+        FER[:, i] = FER_case[:, 0]
+        fer[:, :, i] = fer_case[:, :, 0]
+
+    return P, FER, fer
+
+def _spring_support_stiffness(model):
+    """Returns the stiffness of each active nodal spring support, both as used in the global
+    stiffness matrix and as signed by the spring's direction for reporting reactions.
+
+    :param model: The finite element model being evaluated.
+    :type model: FEModel3D
+    :return: Two global vectors of spring stiffnesses, zero where no active spring is defined.
+    :rtype: tuple
     """
-    Calculates reactions internally once the model is solved.
+
+    k = zeros(len(model.nodes)*6)
+    k_signed = zeros(len(model.nodes)*6)
+
+    for node, attr, dof in model._dof_tables['node_springs']:
+        spring = getattr(node, attr)
+        if spring[2]:
+            k[dof] += float(spring[0])
+            k_signed[dof] += float(spring[0]) if spring[1] != '-' else -float(spring[0])
+
+    return k, k_signed
+
+def _reaction_vectors(model, R2, D2_indices, D):
+    """Returns global reaction vectors. Reactions are only reported for the supported degrees of
+    freedom. Reactions from active nodal spring supports are added on top.
+
+    :param model: The finite element model being evaluated.
+    :type model: FEModel3D
+    :param R2: The reactions at the degrees of freedom with known displacements, with one column for
+               each load combination.
+    :type R2: array
+    :param D2_indices: A list of the degree of freedom indices with known displacements.
+    :type D2_indices: list
+    :param D: The global displacement vectors, with one column for each load combination. Used for
+              the nodal spring support reactions.
+    :type D: array
+    :return: The global reaction vectors, with one column for each load combination.
+    :rtype: array
+    """
+
+    n = len(model.nodes)*6
+    R = zeros((n, R2.shape[1]))
+    R[D2_indices, :] = R2
+
+    # Reactions are only reported where the node is supported. Enforced displacements at
+    # unsupported degrees of freedom do not generate a reaction.
+    supported = zeros(n, dtype=bool)
+    for node in model.nodes.values():
+        supported[node.ID*6:node.ID*6 + 6] = (node.support_DX, node.support_DY, node.support_DZ,
+                                              node.support_RX, node.support_RY, node.support_RZ)
+    R[~supported, :] = 0.0
+
+    # Add the reactions from active spring supports
+    k, k_signed = _spring_support_stiffness(model)
+    spring_dofs = k_signed.nonzero()[0]
+    if len(spring_dofs):
+        R[spring_dofs, :] += k_signed[spring_dofs, None]*D[spring_dofs, :]
+
+    return R
+
+def _store_reactions(model, R2, D2_indices, combo_list):
+    """Stores reactions into each node object in the model. Reactions are only reported for the
+    supported degrees of freedom. Reactions from active nodal spring supports are added on top.
+
+    :param model: The finite element model being evaluated.
+    :type model: FEModel3D
+    :param R2: The reactions at the degrees of freedom with known displacements, with one column for
+               each load combination.
+    :type R2: array
+    :param D2_indices: A list of the degree of freedom indices with known displacements.
+    :type D2_indices: list
+    :param combo_list: The load combinations the columns of `R2` belong to.
+    :type combo_list: list
+    :return: The global reaction vectors, with one column for each load combination.
+    :rtype: array
+    """
+
+    D = hstack([model._D[combo.name] for combo in combo_list])
+    R = _reaction_vectors(model, R2, D2_indices, D)
+
+    # Store the reactions into each node object
+    _set_reactions(model, R, combo_list)
+
+    return R
+
+def _set_reactions(model, R, combo_list):
+    """Stores global reaction vectors into the model's result store, where each node object reads
+    them from.
+
+    :param R: The global reaction vectors, with one column for each load combination.
+    :type R: array
+    :param combo_list: The load combinations the columns of `R` belong to.
+    :type combo_list: list
+    """
+
+    model._results.set_reactions([combo.name for combo in combo_list], R)
+
+def _calc_reactions(model, log=False, combo_tags=None, combo_list=None):
+    """
+    Calculates reactions internally once the model is solved. Reactions at the degrees of freedom
+    with known displacements are recovered from the partitioned stiffness matrix as
+    `R2 = K21*D1 + K22*D2 + FER2 - P2` for every load combination, using each combination's final
+    active elements (and final geometric stiffness for P-Delta analysis).
 
     Parameters
     ----------
@@ -583,260 +1111,46 @@ def _calc_reactions(model, log=False, combo_tags=None):
         Prints updates to the console if set to True. Default is False.
     combo_tags : string, optional
         A list of tags that will be used to identify which load combinations need their reactions calculated. If set to `None` then all load combinations will have their reactions calculated. Default is `None`.
+    combo_list : list, optional
+        The load combinations to calculate reactions for. Overrides `combo_tags` if given. Default is `None`.
+
+    Returns
+    -------
+    array
+        The global reaction vectors, with one column for each load combination.
     """
 
     # Print a status update to the console
     if log: print('- Calculating reactions')
 
     # Identify which load combinations to evaluate
-    combo_list = _identify_combos(model, combo_tags)
+    if combo_list is None:
+        combo_list = list(_identify_combos(model, combo_tags))
 
-    # Calculate the reactions node by node
-    for node in model.nodes.values():
-        
-        # Step through each load combination
-        for combo in combo_list:
-            
-            # Initialize reactions for this node and load combination
-            node.RxnFX[combo.name] = 0.0
-            node.RxnFY[combo.name] = 0.0
-            node.RxnFZ[combo.name] = 0.0
-            node.RxnMX[combo.name] = 0.0
-            node.RxnMY[combo.name] = 0.0
-            node.RxnMZ[combo.name] = 0.0
-
-            # Determine if the node has any supports
-            if (node.support_DX or node.support_DY or node.support_DZ 
-            or  node.support_RX or node.support_RY or node.support_RZ):
-
-                # Sum the spring end forces at the node
-                for spring in model.springs.values():
-
-                    if spring.i_node == node and spring.active[combo.name] == True:
-                        
-                        # Get the spring's global force matrix
-                        # Storing it as a local variable eliminates the need to rebuild it every time a term is needed                    
-                        spring_F = spring.F(combo.name)
-
-                        if node.support_DX: node.RxnFX[combo.name] += spring_F[0, 0]
-                        if node.support_DY: node.RxnFY[combo.name] += spring_F[1, 0]
-                        if node.support_DZ: node.RxnFZ[combo.name] += spring_F[2, 0]
-                        if node.support_RX: node.RxnMX[combo.name] += spring_F[3, 0]
-                        if node.support_RY: node.RxnMY[combo.name] += spring_F[4, 0]
-                        if node.support_RZ: node.RxnMZ[combo.name] += spring_F[5, 0]
-
-                    elif spring.j_node == node and spring.active[combo.name] == True:
-                    
-                        # Get the spring's global force matrix
-                        # Storing it as a local variable eliminates the need to rebuild it every time a term is needed                    
-                        spring_F = spring.F(combo.name)
-                    
-                        if node.support_DX: node.RxnFX[combo.name] += spring_F[6, 0]
-                        if node.support_DY: node.RxnFY[combo.name] += spring_F[7, 0]
-                        if node.support_DZ: node.RxnFZ[combo.name] += spring_F[8, 0]
-                        if node.support_RX: node.RxnMX[combo.name] += spring_F[9, 0]
-                        if node.support_RY: node.RxnMY[combo.name] += spring_F[10, 0]
-                        if node.support_RZ: node.RxnMZ[combo.name] += spring_F[11, 0]
-
-                # Step through each physical member in the model
-                for phys_member in model.members.values():
-
-                    # Sum the sub-member end forces at the node
-                    for member in phys_member.sub_members.values():
-                        
-                        if member.i_node == node and phys_member.active[combo.name] == True:
-                        
-                            # Get the member's global force matrix
-                            # Storing it as a local variable eliminates the need to rebuild it every time a term is needed                    
-                            member_F = member.F(combo.name)
-
-                            if node.support_DX: node.RxnFX[combo.name] += member_F[0, 0]
-                            if node.support_DY: node.RxnFY[combo.name] += member_F[1, 0]
-                            if node.support_DZ: node.RxnFZ[combo.name] += member_F[2, 0]
-                            if node.support_RX: node.RxnMX[combo.name] += member_F[3, 0]
-                            if node.support_RY: node.RxnMY[combo.name] += member_F[4, 0]
-                            if node.support_RZ: node.RxnMZ[combo.name] += member_F[5, 0]
-
-                        elif member.j_node == node and phys_member.active[combo.name] == True:
-                        
-                            # Get the member's global force matrix
-                            # Storing it as a local variable eliminates the need to rebuild it every time a term is needed                    
-                            member_F = member.F(combo.name)
-                        
-                            if node.support_DX: node.RxnFX[combo.name] += member_F[6, 0]
-                            if node.support_DY: node.RxnFY[combo.name] += member_F[7, 0]
-                            if node.support_DZ: node.RxnFZ[combo.name] += member_F[8, 0]
-                            if node.support_RX: node.RxnMX[combo.name] += member_F[9, 0]
-                            if node.support_RY: node.RxnMY[combo.name] += member_F[10, 0]
-                            if node.support_RZ: node.RxnMZ[combo.name] += member_F[11, 0]
+    # The global DOFs with known displacements, in equation order
+    D2_indices = argsort(model._equations)[model._n_free:]
 
-                # Sum the plate forces at the node
-                for plate in model.plates.values():
+    # Nodal spring supports are reported separately, so they're taken back out of K22
+    k_springs = _spring_support_stiffness(model)[0][D2_indices].reshape(-1, 1)
 
-                    if plate.i_node == node:
+    # Second order analyses include the geometric stiffness from the final member axial forces
+    second_order = model.solution in ('P-Delta', 'Pushover')
 
-                        # Get the plate's global force matrix
-                        # Storing it as a local variable eliminates the need to rebuild it every time a term is needed                    
-                        plate_F = plate.F(combo.name)
-                
-                        if node.support_DX: node.RxnFX[combo.name] += plate_F[0, 0]
-                        if node.support_DY: node.RxnFY[combo.name] += plate_F[1, 0]
-                        if node.support_DZ: node.RxnFZ[combo.name] += plate_F[2, 0]
-                        if node.support_RX: node.RxnMX[combo.name] += plate_F[3, 0]
-                        if node.support_RY: node.RxnMY[combo.name] += plate_F[4, 0]
-                        if node.support_RZ: node.RxnMZ[combo.name] += plate_F[5, 0]
-
-                    elif plate.j_node == node:
-
-                        # Get the plate's global force matrix
-                        # Storing it as a local variable eliminates the need to rebuild it every time a term is needed                    
-                        plate_F = plate.F(combo.name)
-                
-                        if node.support_DX: node.RxnFX[combo.name] += plate_F[6, 0]
-                        if node.support_DY: node.RxnFY[combo.name] += plate_F[7, 0]
-                        if node.support_DZ: node.RxnFZ[combo.name] += plate_F[8, 0]
-                        if node.support_RX: node.RxnMX[combo.name] += plate_F[9, 0]
-                        if node.support_RY: node.RxnMY[combo.name] += plate_F[10, 0]
-                        if node.support_RZ: node.RxnMZ[combo.name] += plate_F[11, 0]
-
-                    elif plate.m_node == node:
-
-                        # Get the plate's global force matrix
-                        # Storing it as a local variable eliminates the need to rebuild it every time a term is needed                    
-                        plate_F = plate.F(combo.name)
-                
-                        if node.support_DX: node.RxnFX[combo.name] += plate_F[12, 0]
-                        if node.support_DY: node.RxnFY[combo.name] += plate_F[13, 0]
-                        if node.support_DZ: node.RxnFZ[combo.name] += plate_F[14, 0]
-                        if node.support_RX: node.RxnMX[combo.name] += plate_F[15, 0]
-                        if node.support_RY: node.RxnMY[combo.name] += plate_F[16, 0]
-                        if node.support_RZ: node.RxnMZ[combo.name] += plate_F[17, 0]
-
-                    elif plate.n_node == node:
-
-                        # Get the plate's global force matrix
-                        # Storing it as a local variable eliminates the need to rebuild it every time a term is needed                    
-                        plate_F = plate.F(combo.name)
-                
-                        if node.support_DX: node.RxnFX[combo.name] += plate_F[18, 0]
-                        if node.support_DY: node.RxnFY[combo.name] += plate_F[19, 0]
-                        if node.support_DZ: node.RxnFZ[combo.name] += plate_F[20, 0]
-                        if node.support_RX: node.RxnMX[combo.name] += plate_F[21, 0]
-                        if node.support_RY: node.RxnMY[combo.name] += plate_F[22, 0]
-                        if node.support_RZ: node.RxnMZ[combo.name] += plate_F[23, 0]
-
-                # Sum the quad forces at the node
-                for quad in model.quads.values():
-
-                    if quad.i_node == node:
-
-                        # Get the quad's global force matrix
-                        # Storing it as a local variable eliminates the need to rebuild it every time a term is needed                    
-                        quad_F = quad.F(combo.name)
-
-                        if node.support_DX: node.RxnFX[combo.name] += quad_F[0, 0]
-                        if node.support_DY: node.RxnFY[combo.name] += quad_F[1, 0]
-                        if node.support_DZ: node.RxnFZ[combo.name] += quad_F[2, 0]
-                        if node.support_RX: node.RxnMX[combo.name] += quad_F[3, 0]
-                        if node.support_RY: node.RxnMY[combo.name] += quad_F[4, 0]
-                        if node.support_RZ: node.RxnMZ[combo.name] += quad_F[5, 0]
-
-                    elif quad.j_node == node:
-
-                        # Get the quad's global force matrix
-                        # Storing it as a local variable eliminates the need to rebuild it every time a term is needed                    
-                        quad_F = quad.F(combo.name)
-                
-                        if node.support_DX: node.RxnFX[combo.name] += quad_F[6, 0]
-                        if node.support_DY: node.RxnFY[combo.name] += quad_F[7, 0]
-                        if node.support_DZ: node.RxnFZ[combo.name] += quad_F[8, 0]
-                        if node.support_RX: node.RxnMX[combo.name] += quad_F[9, 0]
-                        if node.support_RY: node.RxnMY[combo.name] += quad_F[10, 0]
-                        if node.support_RZ: node.RxnMZ[combo.name] += quad_F[11, 0]
-
-                    elif quad.m_node == node:
-
-                        # Get the quad's global force matrix
-                        # Storing it as a local variable eliminates the need to rebuild it every time a term is needed                    
-                        quad_F = quad.F(combo.name)
-                
-                        if node.support_DX: node.RxnFX[combo.name] += quad_F[12, 0]
-                        if node.support_DY: node.RxnFY[combo.name] += quad_F[13, 0]
-                        if node.support_DZ: node.RxnFZ[combo.name] += quad_F[14, 0]
-                        if node.support_RX: node.RxnMX[combo.name] += quad_F[15, 0]
-                        if node.support_RY: node.RxnMY[combo.name] += quad_F[16, 0]
-                        if node.support_RZ: node.RxnMZ[combo.name] += quad_F[17, 0]
-
-                    elif quad.n_node == node:
-
-                        # Get the quad's global force matrix
-                        # Storing it as a local variable eliminates the need to rebuild it every time a term is needed                    
-                        quad_F = quad.F(combo.name)
-                
-                        if node.support_DX: node.RxnFX[combo.name] += quad_F[18, 0]
-                        if node.support_DY: node.RxnFY[combo.name] += quad_F[19, 0]
-                        if node.support_DZ: node.RxnFZ[combo.name] += quad_F[20, 0]
-                        if node.support_RX: node.RxnMX[combo.name] += quad_F[21, 0]
-                        if node.support_RY: node.RxnMY[combo.name] += quad_F[22, 0]
-                        if node.support_RZ: node.RxnMZ[combo.name] += quad_F[23, 0]
-                
-                # Sum the joint loads applied to the node
-                for load in node.NodeLoads:
+    pattern = _sparsity_pattern(model)
+    R2 = zeros((len(D2_indices), len(combo_list)))
+    for j, combo in enumerate(combo_list):
 
-                    for case, factor in combo.factors.items():
-                        
-                        if load[2] == case:
-
-                            if load[0] == 'FX' and node.support_DX:
-                                node.RxnFX[combo.name] -= load[1]*factor
-                            elif load[0] == 'FY' and node.support_DY:
-                                node.RxnFY[combo.name] -= load[1]*factor
-                            elif load[0] == 'FZ' and node.support_DZ:
-                                node.RxnFZ[combo.name] -= load[1]*factor
-                            elif load[0] == 'MX' and node.support_RX:
-                                node.RxnMX[combo.name] -= load[1]*factor
-                            elif load[0] == 'MY' and node.support_RY:
-                                node.RxnMY[combo.name] -= load[1]*factor
-                            elif load[0] == 'MZ' and node.support_RZ:
-                                node.RxnMZ[combo.name] -= load[1]*factor
-            
-            # Calculate any reactions due to active spring supports at the node
-            if node.spring_DX[0] != None and node.spring_DX[2] == True:
-                sign = node.spring_DX[1]
-                k = node.spring_DX[0]
-                if sign != None: k = float(sign + str(k))
-                DX = node.DX[combo.name]
-                node.RxnFX[combo.name] += k*DX
-            if node.spring_DY[0] != None and node.spring_DY[2] == True:
-                sign = node.spring_DY[1]
-                k = node.spring_DY[0]
-                if sign != None: k = float(sign + str(k))
-                DY = node.DY[combo.name]
-                node.RxnFY[combo.name] += k*DY
-            if node.spring_DZ[0] != None and node.spring_DZ[2] == True:
-                sign = node.spring_DZ[1]
-                k = node.spring_DZ[0]
-                if sign != None: k = float(sign + str(k))
-                DZ = node.DZ[combo.name]
-                node.RxnFZ[combo.name] += k*DZ
-            if node.spring_RX[0] != None and node.spring_RX[2] == True:
-                sign = node.spring_RX[1]
-                k = node.spring_RX[0]
-                if sign != None: k = float(sign + str(k))
-                RX = node.RX[combo.name]
-                node.RxnMX[combo.name] += k*RX
-            if node.spring_RY[0] != None and node.spring_RY[2] == True:
-                sign = node.spring_RY[1]
-                k = node.spring_RY[0]
-                if sign != None: k = float(sign + str(k))
-                RY = node.RY[combo.name]
-                node.RxnMY[combo.name] += k*RY
-            if node.spring_RZ[0] != None and node.spring_RZ[2] == True:
-                sign = node.spring_RZ[1]
-                k = node.spring_RZ[0]
-                if sign != None: k = float(sign + str(k))
-                RZ = node.RZ[combo.name]
-                node.RxnMZ[combo.name] += k*RZ
+        Kg = _member_Kg(model, combo.name, False) if second_order else None
+        K11, K12, K21, K22 = pattern.assemble(_element_values(model, combo.name, Kg))
+
+        D1, D2 = _partition_vector(model, model._D[combo.name])
+        FER1, FER2 = _partition_vector(model, _assemble_FER(model, combo.name)[1])
+        P1, P2 = _partition_vector(model, model.P(combo.name))
+
+        R2[:, [j]] = K21 @ D1 + K22 @ D2 + FER2 - P2 - k_springs*D2
+
+    # Store the reactions at the supported DOFs, plus the nodal spring support reactions
+    return _store_reactions(model, R2, D2_indices, combo_list)
 
 def _check_statics(model, combo_tags=None):
     '''
@@ -944,8 +1258,9 @@ def _partition_D(model):
     D2_indices = [] # A list of the indices for the known nodal displacements
     D2 = []         # A list of the values of the known nodal displacements
 
-    # Create the auxiliary table
-    for node in model.nodes.values():
+    # Create the auxiliary table. Nodes are visited in ID order so equations follow the node
+    # numbering, including any reordering applied by `_renumber`.
+    for node in sorted(model.nodes.values(), key=lambda node: node.ID):
         
         # Unknown displacement DX
         if node.support_DX == False and node.EnforcedDX == None:
@@ -1025,9 +1340,31 @@ def _partition_D(model):
     # Convert D2 from a list to a matrix
     D2 = array(D2, ndmin=2).T
 
+    # Number the equations so the unknown displacements come first and the known displacements
+    # last. In equation order the partitions K11, K12, K21 and K22 are contiguous blocks of the
+    # global stiffness matrix, so they can be assembled directly rather than sliced out of it.
+    model._n_free = len(D1_indices)
+    model._equations = zeros(len(D1_indices) + len(D2_indices), dtype=int)
+    model._equations[D1_indices] = arange(len(D1_indices))
+    model._equations[D2_indices] = arange(len(D1_indices), len(D1_indices) + len(D2_indices))
+
     # Return the indices and the known displacements
     return D1_indices, D2_indices, D2
 
+def _partition_vector(model, vector):
+    """Partitions a global vector (or a matrix of column vectors) into the terms for unknown and
+    known displacements, using the equation numbers assigned by `_partition_D`.
+
+    :param vector: The global vector, with one row per global degree of freedom.
+    :type vector: ndarray
+    :return: The rows for unknown displacements and the rows for known displacements.
+    :rtype: ndarray, ndarray
+    """
+
+    ordered = zeros(vector.shape)
+    ordered[model._equations] = vector
+    return ordered[:model._n_free], ordered[model._n_free:]
+
 def _partition(model, unp_matrix, D1_indices, D2_indices):
     """Partitions a matrix (or vector) into submatrices (or subvectors) based on degree of freedom boundary conditions.
 
@@ -1061,7 +1398,8 @@ def _partition(model, unp_matrix, D1_indices, D2_indices):
 def _renumber(model):
     """
     Assigns node and element ID numbers to be used internally by the program. Numbers are
-    assigned according to the order in which they occur in each dictionary.
+    assigned according to the order in which they occur in each dictionary. Nodes are then
+    renumbered using the model's `reordering` method, if one has been set.
     """
     
     # Number each node in the model
@@ -1074,16 +1412,37 @@ def _renumber(model):
 
     # Descritize all the physical members and number each member in the model
     id = 0
+    sub_members = []
     for phys_member in model.members.values():
         phys_member.descritize()
         for member in phys_member.sub_members.values():
             member.ID = id
+            sub_members.append(member)
             id += 1
+
+    # Compute the stiffness and transformation matrices for all the sub-members at once
+    model._member_batch = MemberBatch(sub_members)
     
     # Number each plate in the model
     for id, plate in enumerate(model.plates.values()):
         plate.ID = id
     
-    # Number each quadrilateral in the model
+    # Number each quadrilateral in the model. Their local coordinates are needed by `fer()` as
+    # well as `k()`, and load vectors may be built before the stiffness matrix.
     for id, quad in enumerate(model.quads.values()):
         quad.ID = id
+        quad._local_coords()
+
+    # Build the DOF index tables used to assemble the global matrices
+    model._dof_tables = dof_tables(model)
+
+    # Renumber the nodes to reduce the bandwidth and fill-in of the stiffness matrix if requested.
+    # `_node_order` stores the permutation: the node renumbered `k` is the `_node_order[k]`th node
+    # in the model's `nodes` dictionary.
+    model._node_order = None
+    if model.reordering is not None:
+        nodes = list(model.nodes.values())
+        model._node_order = node_ordering(node_graph(model._dof_tables, len(nodes)), model.reordering)
+        for id, index in enumerate(model._node_order):
+            nodes[index].ID = id
+        model._dof_tables = dof_tables(model)
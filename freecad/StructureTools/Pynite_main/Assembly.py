@@ -0,0 +1,398 @@
+"""
+Vectorized assembly of global matrices.
+
+Element matrices are stacked into `(n_elem, n_dof, n_dof)` arrays and scattered into the global
+matrix in a single pass using DOF index tables built from the node IDs assigned by `_renumber`.
+"""
+
+import numpy as np
+from scipy.sparse import coo_matrix, csr_matrix
+
+# Support spring attributes in the same order as a node's 6 degrees of freedom
+_SPRING_ATTRS = ('spring_DX', 'spring_DY', 'spring_DZ', 'spring_RX', 'spring_RY', 'spring_RZ')
+
+
+class ElementGroup():
+    """
+    A group of elements of the same type sharing one DOF index table.
+    """
+
+    def __init__(self, elements, node_attrs, owners=None, K=None):
+        """Builds the DOF index table for a group of elements.
+
+        :param elements: The elements in the group, in ID order.
+        :type elements: list
+        :param node_attrs: The names of the element attributes holding its nodes, in the order the
+                           nodes appear in the element's global stiffness matrix.
+        :type node_attrs: tuple
+        :param owners: The objects whose `active` flags control each element. Defaults to the
+                       elements themselves.
+        :type owners: list, optional
+        :param K: The stacked global stiffness matrices of the elements, if already known.
+        :type K: ndarray, optional
+        """
+
+        self.elements = elements
+        self.owners = elements if owners is None else owners
+        self._K = K
+
+        # Global DOF index table. Row `e` holds the global DOF numbers of element `e`'s local DOFs.
+        node_IDs = [[getattr(element, attr).ID for attr in node_attrs] for element in elements]
+        self.dofs = element_dofs(node_IDs, len(node_attrs))
+
+    def stiffness(self):
+        """Returns the stacked global stiffness matrices of the elements in the group. They are
+        computed on first use and reused until the model is renumbered.
+
+        :return: The element global stiffness matrices, shape `(n_elem, n, n)`.
+        :rtype: ndarray
+        """
+
+        if self._K is None:
+            self._K = stack([element.K() for element in self.elements], self.dofs.shape[1])
+        return self._K
+
+    def active(self, combo_name):
+        """Returns a boolean mask of the elements active for a load combination.
+
+        :param combo_name: The name of the load combination.
+        :type combo_name: str
+        :rtype: ndarray
+        """
+
+        return np.array([bool(owner.active[combo_name]) for owner in self.owners], dtype=bool)
+
+
+def element_dofs(node_IDs, nodes_per_element):
+    """Returns the global DOF index table for a group of elements.
+
+    :param node_IDs: The node IDs for each element.
+    :type node_IDs: list or ndarray
+    :param nodes_per_element: The number of nodes per element.
+    :type nodes_per_element: int
+    :return: An integer array of shape `(n_elem, 6*nodes_per_element)`.
+    :rtype: ndarray
+    """
+
+    IDs = np.asarray(node_IDs, dtype=np.int64).reshape(-1, nodes_per_element)
+    return (IDs[:, :, None]*6 + np.arange(6)).reshape(IDs.shape[0], 6*nodes_per_element)
+
+
+def dof_tables(model):
+    """Builds the DOF index tables for every element type in the model. Node and element IDs must
+    already have been assigned by `_renumber`.
+
+    :param model: The model to build the tables for.
+    :type model: FEModel3D
+    :return: A dictionary of `ElementGroup` objects keyed by element type, plus a table of the
+             nodal spring supports defined in the model.
+    :rtype: dict
+    """
+
+    # Sub-members are numbered in the order they appear in their physical members. Their active
+    # state is tracked by the physical member they belong to.
+    sub_members, phys_members = [], []
+    for phys_member in model.members.values():
+        for member in phys_member.sub_members.values():
+            sub_members.append(member)
+            phys_members.append(phys_member)
+
+    # The batched member stiffness matrices are built by `_renumber` in the same order
+    batch = model._member_batch
+    tables = {'springs': ElementGroup(list(model.springs.values()), ('i_node', 'j_node')),
+              'members': ElementGroup(sub_members, ('i_node', 'j_node'), phys_members,
+                                      None if batch is None else batch.K),
+              'quads': ElementGroup(list(model.quads.values()),
+                                    ('i_node', 'j_node', 'm_node', 'n_node')),
+              'plates': ElementGroup(list(model.plates.values()),
+                                     ('i_node', 'j_node', 'm_node', 'n_node'))}
+
+    # Nodal spring supports are stored as (node, attribute name, global DOF) triplets so their
+    # stiffness and active state can be gathered without visiting every node.
+    tables['node_springs'] = [(node, attr, node.ID*6 + i) for node in model.nodes.values()
+                              for i, attr in enumerate(_SPRING_ATTRS)
+                              if getattr(node, attr)[0] is not None]
+
+    return tables
+
+
+def node_spring_terms(node_springs):
+    """Returns the global DOFs and stiffnesses of all active nodal spring supports.
+
+    :param node_springs: The nodal spring table built by `dof_tables`.
+    :type node_springs: list
+    :return: The global DOFs as an `(n, 1)` array and the stiffnesses as an `(n, 1, 1)` array.
+    :rtype: tuple
+    """
+
+    active = [(dof, float(getattr(node, attr)[0])) for node, attr, dof in node_springs
+              if getattr(node, attr)[2]]
+    dofs = np.array([dof for dof, k in active], dtype=np.int64).reshape(-1, 1)
+    k = np.array([k for dof, k in active], dtype=float).reshape(-1, 1, 1)
+
+    return dofs, k
+
+
+def node_spring_values(node_springs):
+    """Returns the stiffnesses of every nodal spring support, with inactive springs zeroed.
+
+    :param node_springs: The nodal spring table built by `dof_tables`.
+    :type node_springs: list
+    :return: The stiffnesses as an `(n, 1, 1)` array, in the same order as the table.
+    :rtype: ndarray
+    """
+
+    return np.array([float(getattr(node, attr)[0]) if getattr(node, attr)[2] else 0.0
+                     for node, attr, dof in node_springs], dtype=float).reshape(-1, 1, 1)
+
+
+def assemble(blocks, size, sparse=True):
+    """Assembles stacked element matrices into a global matrix.
+
+    :param blocks: A list of `(dofs, matrices)` pairs, where `dofs` has shape `(n_elem, n)` and
+                   `matrices` has shape `(n_elem, n, n)`.
+    :type blocks: list
+    :param size: The number of rows (and columns) in the global matrix.
+    :type size: int
+    :param sparse: Returns a `coo_matrix` if set to `True`, and a dense array otherwise.
+    :type sparse: bool, optional
+    :return: The global matrix. Duplicate entries are summed.
+    :rtype: coo_matrix or ndarray
+    """
+
+    row, col, data = [], [], []
+    for dofs, matrices in blocks:
+        if len(dofs) == 0:
+            continue
+        n = dofs.shape[1]
+        row.append(np.broadcast_to(dofs[:, :, None], (dofs.shape[0], n, n)).ravel())
+        col.append(np.broadcast_to(dofs[:, None, :], (dofs.shape[0], n, n)).ravel())
+        data.append(np.asarray(matrices, dtype=float).ravel())
+
+    if row:
+        row, col, data = np.concatenate(row), np.concatenate(col), np.concatenate(data)
+    else:
+        row, col, data = np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0)
+
+    K = coo_matrix((data, (row, col)), shape=(size, size))
+
+    if sparse:
+        return K
+    else:
+        return K.toarray()
+
+
+def assemble_vector(blocks, size):
+    """Assembles stacked element vectors into a global vector.
+
+    :param blocks: A list of `(dofs, vectors)` pairs, where `dofs` has shape `(n_elem, n)` and
+                   `vectors` has shape `(n_elem, n, 1)`.
+    :type blocks: list
+    :param size: The number of rows in the global vector.
+    :type size: int
+    :return: The global vector as a `(size, 1)` array. Duplicate entries are summed.
+    :rtype: ndarray
+    """
+
+    rows = [dofs.ravel() for dofs, vectors in blocks if len(dofs)]
+    data = [np.asarray(vectors, dtype=float).ravel() for dofs, vectors in blocks if len(dofs)]
+
+    if not rows:
+        return np.zeros((size, 1))
+
+    return np.bincount(np.concatenate(rows), weights=np.concatenate(data),
+                       minlength=size).reshape(size, 1)
+
+
+class SparsityPattern():
+    """
+    The symbolic structure of the partitioned global stiffness matrix.
+
+    Every element term that can appear in the global stiffness matrix, whether or not the element
+    is currently active, is mapped once to a slot in the `data` array of one of the four CSR
+    partitions `K11`, `K12`, `K21` and `K22`. Iterative analyses (tension/compression-only and
+    P-Delta) then refill the existing matrices in place with `assemble()` rather than building,
+    converting and slicing a new global matrix on every iteration. Inactive elements are zeroed
+    rather than removed, so the structure never changes.
+    """
+
+    # The order the element groups are laid out in the entry arrays
+    groups = ('node_springs', 'springs', 'members', 'quads', 'plates')
+
+    def __init__(self, tables, equations, n_free):
+        """Builds the pattern for a set of DOF index tables and an equation numbering.
+
+        :param tables: The DOF index tables built by `dof_tables`.
+        :type tables: dict
+        :param equations: The equation number of each global DOF. Unknown displacements are
+                          numbered first and known displacements last.
+        :type equations: ndarray
+        :param n_free: The number of unknown displacements.
+        :type n_free: int
+        """
+
+        self.equations = np.array(equations, dtype=np.int64)
+        self.n_free = n_free
+        n1, n2 = n_free, len(self.equations) - n_free
+
+        # The DOF index table of each group, and the equation numbers of every element term
+        self.dofs = _group_dofs(tables)
+        rows, cols = [], []
+        for group in self.groups:
+            dofs = self.equations[self.dofs[group]]
+            n = dofs.shape[1]
+            rows.append(np.broadcast_to(dofs[:, :, None], (dofs.shape[0], n, n)).ravel())
+            cols.append(np.broadcast_to(dofs[:, None, :], (dofs.shape[0], n, n)).ravel())
+        rows, cols = np.concatenate(rows), np.concatenate(cols)
+        self.n_entries = len(rows)
+
+        # In equation order each partition is a contiguous block of the global matrix. Find which
+        # partition each equation belongs to, and its position within that partition.
+        free = np.arange(n1 + n2) < n1
+        position = np.arange(n1 + n2) - np.where(free, 0, n1)
+
+        # For each partition find the entries that fall in it, the unique (row, column) pairs they
+        # sum into, and the slot in the CSR `data` array each entry is added to
+        self.blocks = []
+        for row_free, col_free, n_rows, n_cols in ((True, True, n1, n1), (True, False, n1, n2),
+                                                   (False, True, n2, n1), (False, False, n2, n2)):
+
+            entries = np.flatnonzero((free[rows] == row_free) & (free[cols] == col_free))
+            keys = position[rows[entries]]*max(n_cols, 1) + position[cols[entries]]
+            keys, slots = np.unique(keys, return_inverse=True)
+
+            indptr = np.zeros(n_rows + 1, dtype=np.int64)
+            np.cumsum(np.bincount(keys//max(n_cols, 1), minlength=n_rows), out=indptr[1:])
+            matrix = csr_matrix((np.zeros(len(keys)), keys % max(n_cols, 1), indptr),
+                                shape=(n_rows, n_cols))
+
+            self.blocks.append((entries, np.ravel(slots), matrix))
+
+    def matches(self, tables, equations, n_free):
+        """Returns `True` if the pattern was built for the same topology and equation numbering.
+        """
+
+        if n_free != self.n_free or not np.array_equal(self.equations, equations):
+            return False
+
+        dofs = _group_dofs(tables)
+        return all(np.array_equal(self.dofs[group], dofs[group]) for group in self.groups)
+
+    def assemble(self, values, sparse=True):
+        """Refills the partitioned global stiffness matrix with new element values.
+
+        :param values: The stacked element matrices for each group in `groups`, laid out in the
+                       same order as the DOF index tables. Inactive elements should be zeroed.
+                       Groups that are missing are taken as zero.
+        :type values: dict
+        :param sparse: Returns the `csr_matrix` partitions if set to `True`, and dense arrays
+                       otherwise. The sparse partitions are reused by the next call.
+        :type sparse: bool, optional
+        :return: The partitions `K11`, `K12`, `K21` and `K22`.
+        :rtype: tuple
+        """
+
+        data = np.concatenate([_group_values(values, group, self.dofs[group].shape[0]*
+                                             self.dofs[group].shape[1]**2)
+                               for group in self.groups])
+
+        partitions = []
+        for entries, slots, matrix in self.blocks:
+            matrix.data[:] = np.bincount(slots, weights=data[entries], minlength=len(matrix.data))
+            partitions.append(matrix if sparse else matrix.toarray())
+
+        return tuple(partitions)
+
+    def update(self, values, base):
+        """Returns the change to `K11` between two sets of element values as a dense correction to
+        the rows and columns it touches. Only elements whose values differ contribute, so
+        activating or deactivating a few elements gives a low-rank correction.
+
+        :param values: The new stacked element matrices for each group, as for `assemble()`.
+        :type values: dict
+        :param base: The element matrices `K11` was last assembled and factored from.
+        :type base: dict
+        :return: The equation numbers of the free DOFs touched, and the correction to those rows
+                 and columns.
+        :rtype: ndarray, ndarray
+        """
+
+        rows, cols, data = [], [], []
+        for group in self.groups:
+            dofs = self.dofs[group]
+            if len(dofs) == 0:
+                continue
+            shape = (len(dofs), dofs.shape[1], dofs.shape[1])
+            diff = _group_values(values, group, shape) - _group_values(base, group, shape)
+            changed = np.flatnonzero(np.abs(diff).reshape(len(dofs), -1).max(axis=1) > 0)
+            if len(changed) == 0:
+                continue
+            equations = self.equations[dofs[changed]]
+            n = equations.shape[1]
+            rows.append(np.broadcast_to(equations[:, :, None], (len(changed), n, n)).ravel())
+            cols.append(np.broadcast_to(equations[:, None, :], (len(changed), n, n)).ravel())
+            data.append(diff[changed].ravel())
+
+        if not rows:
+            return np.zeros(0, dtype=np.int64), np.zeros((0, 0))
+
+        rows, cols, data = np.concatenate(rows), np.concatenate(cols), np.concatenate(data)
+        free = (rows < self.n_free) & (cols < self.n_free) & (data != 0)
+        rows, cols, data = rows[free], cols[free], data[free]
+
+        idx, inverse = np.unique(np.concatenate((rows, cols)), return_inverse=True)
+        inverse = np.ravel(inverse)
+        S = np.zeros((len(idx), len(idx)))
+        np.add.at(S, (inverse[:len(rows)], inverse[len(rows):]), data)
+
+        return idx, S
+
+    def diagonal(self, values):
+        """Returns the diagonal of the global stiffness matrix for a set of element values, in
+        global DOF order, without assembling the matrix.
+
+        :param values: The stacked element matrices for each group, as for `assemble()`.
+        :type values: dict
+        :return: The diagonal terms.
+        :rtype: ndarray
+        """
+
+        diagonal = np.zeros(len(self.equations))
+        for group in self.groups:
+            dofs = self.dofs[group]
+            if values.get(group) is None or len(dofs) == 0:
+                continue
+            terms = np.diagonal(np.asarray(values[group], dtype=float), axis1=1, axis2=2)
+            diagonal += np.bincount(dofs.ravel(), weights=terms.ravel(), minlength=len(diagonal))
+
+        return diagonal
+
+
+def _group_values(values, group, shape):
+    """Returns the element values for a group, taking a missing group as zero.
+    """
+
+    if values.get(group) is None:
+        return np.zeros(shape)
+    return np.asarray(values[group], dtype=float).reshape(shape)
+
+
+def _group_dofs(tables):
+    """Returns the DOF index table of each group used by `SparsityPattern`.
+    """
+
+    dofs = {group: tables[group].dofs for group in SparsityPattern.groups[1:]}
+    dofs['node_springs'] = np.array([dof for node, attr, dof in tables['node_springs']],
+                                    dtype=np.int64).reshape(-1, 1)
+    return dofs
+
+
+def stack(matrices, n, m=None):
+    """Stacks a list of `n x m` element matrices into one `(n_elem, n, m)` array. `m` defaults to
+    `n` for square matrices.
+    """
+
+    m = n if m is None else m
+    if len(matrices) == 0:
+        return np.zeros((0, n, m))
+    return np.array(matrices, dtype=float).reshape(-1, n, m)
@@ -0,0 +1,85 @@
+"""
+Result envelopes across load combinations.
+
+An `Envelope` keeps a running maximum, minimum and maximum absolute value of a table of results,
+along with the load combination that governs each one. Results are fed to it one block of load
+combinations at a time, so the memory it needs depends only on the size of the table.
+"""
+
+import numpy as np
+
+
+class Envelope():
+    """
+    Running maximum, minimum and maximum absolute values of a table of results.
+    """
+
+    def __init__(self, labels, columns):
+        """
+        :param labels: The name of each row in the table, such as node or member names.
+        :type labels: list
+        :param columns: The name of each column in the table, such as 'DX' or 'Fy'.
+        :type columns: tuple
+        """
+
+        self.labels = list(labels)
+        self.columns = tuple(columns)
+        self.index = {label: i for i, label in enumerate(self.labels)}
+        self.combos = []  # The load combinations included so far, in the order they were added
+
+        shape = (len(self.labels), len(self.columns))
+        self.max = np.full(shape, -np.inf)
+        self.min = np.full(shape, np.inf)
+        self.abs_max = np.zeros(shape)
+
+        # The index in `combos` of the governing load combination for each value
+        self.max_combo = np.full(shape, -1, dtype=np.int64)
+        self.min_combo = np.full(shape, -1, dtype=np.int64)
+        self.abs_max_combo = np.full(shape, -1, dtype=np.int64)
+
+    def update(self, values, combo_names):
+        """Adds the results for a block of load combinations to the envelope.
+
+        :param values: The results, shape `(n_labels, n_columns, len(combo_names))`.
+        :type values: array
+        :param combo_names: The load combination names, one for each slice along the last axis.
+        :type combo_names: list
+        """
+
+        if not len(combo_names):
+            return
+
+        offset = len(self.combos)
+        self.combos.extend(combo_names)
+        values = np.asarray(values, dtype=float)
+
+        for running, running_combo, block, block_combo, better in (
+                (self.max, self.max_combo, values.max(axis=2), values.argmax(axis=2), np.greater),
+                (self.min, self.min_combo, values.min(axis=2), values.argmin(axis=2), np.less),
+                (self.abs_max, self.abs_max_combo, np.abs(values).max(axis=2),
+                 np.abs(values).argmax(axis=2), np.greater)):
+
+            # Ties keep the load combination that was added first
+            replace = better(block, running) | (running_combo < 0)
+            running[replace] = block[replace]
+            running_combo[replace] = block_combo[replace] + offset
+
+    def governing(self, label, column, kind='abs_max'):
+        """Returns an enveloped value and the load combination that governs it.
+
+        :param label: The row name, such as a node or member name.
+        :type label: str
+        :param column: The column name, such as 'DX' or 'Fy'.
+        :type column: str
+        :param kind: 'max', 'min' or 'abs_max'. Defaults to 'abs_max'.
+        :type kind: str, optional
+        :return: The value and the name of the governing load combination.
+        :rtype: tuple
+        """
+
+        if kind not in ('max', 'min', 'abs_max'):
+            raise ValueError(f"Unknown envelope '{kind}'. Use 'max', 'min' or 'abs_max'.")
+
+        i, j = self.index[label], self.columns.index(column)
+        combo = getattr(self, kind + '_combo')[i, j]
+        return getattr(self, kind)[i, j], self.combos[combo] if combo >= 0 else None
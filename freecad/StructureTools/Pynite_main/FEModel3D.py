@@ -6,8 +6,7 @@ from os import rename
 import warnings
 from math import isclose
 
-from numpy import array, zeros, matmul, divide, subtract, atleast_2d, all
-from numpy.linalg import solve
+from numpy import array, zeros, ones, subtract, hstack, vstack, concatenate, einsum
 
 from .Node3D import Node3D
 from .Material import Material
@@ -19,11 +18,18 @@ from .Quad3D import Quad3D
 from .Plate3D import Plate3D
 from .LoadCombo import LoadCombo
 from .Mesh import Mesh
+from .Assembly import dof_tables, node_spring_terms, assemble
 # from Mesh import RectangleMesh
 # from Mesh import AnnulusMesh
 # from Mesh import FrustrumMesh
 # from Mesh import CylinderMesh
-from .Analysis import _prepare_model, _identify_combos,_check_stability, _PDelta_step, _pushover_step, _store_displacements ,  _sum_displacements, _check_TC_convergence, _calc_reactions, _check_statics, _partition_D, _partition, _renumber
+from .Analysis import _prepare_model, _identify_combos,_check_stability, _PDelta_step, _pushover_step, _store_displacements , _calc_reactions, _check_statics, _partition_D, _partition_vector, _factorize, \
+                      _load_factors, _case_loads, _case_P, _assemble_FER, _spring_support_stiffness, _store_reactions, \
+                      _sparsity_pattern, _element_values, _member_Kg, _updated_solver, _TC_step, _unpartition_disp, \
+                      _reaction_vectors, _member_forces
+from .Parallel import solve_combos
+from .Envelopes import Envelope
+from .MemberResults import extract
 
 
 # %%
@@ -60,7 +66,36 @@ class FEModel3D():
         self.load_combos.pop(str)
         self._D = {str:[]}                 # A dictionary of the model's nodal displacements by load combination
         self._D.pop(str)
-        
+        self._results = None               # Columnar store of nodal displacements and reactions by load combination
+
+        self._dof_tables = None    # DOF index tables used for assembly, built when the model is numbered
+        self._member_batch = None  # Batched sub-member matrices, built when the model is numbered
+        self._end_forces = {}      # Cached sub-member local end force vectors by load combination
+        self._combo_factors = {}   # Load case factors for each combination solved by superposition
+        self._sparsity_pattern = None  # Partitioned stiffness matrix structure reused by iterative analyses
+        self._equations = None     # Equation number of each global DOF, with unknown displacements first
+        self._n_free = None        # Number of unknown displacements
+
+        self._node_order = None    # Node permutation applied by the last reordering, if any
+
+        # Optional node reordering applied when the model is numbered for analysis. Set to 'rcm'
+        # (reverse Cuthill-McKee) or 'min_degree' (minimum degree) to reduce the bandwidth and
+        # fill-in of the stiffness matrix for models whose nodes were added in an arbitrary order.
+        self.reordering = None
+
+        # The linear solver backend used to solve for the unknown displacements. Set to 'lu' (sparse
+        # LU), 'symmetric' (sparse Cholesky/LDL^T), 'cg' (preconditioned conjugate gradients),
+        # 'dense' (dense LU), 'auto' to pick one based on the size and density of the stiffness
+        # matrix, or a `Solver` instance. When left as `None` the `sparse` argument of each
+        # analysis method selects 'lu' or 'dense'.
+        self.solver = None
+        self.solver_stats = None   # Factor time, solve time and memory reported by the last analysis
+        self._solver = None        # The solver backend used by the current analysis
+        self._low_rank = None      # Factorization with low-rank updates reused by T/C iterations
+        self._low_rank_base = None  # Element values the low-rank updates are measured from
+        self.pdelta_report = None  # Iterations, solves and residual norms for each P-Delta combo
+        self.envelopes = None      # Result envelopes from the last call to `analyze_envelope`
+
         self.solution = None  # Indicates the solution type for the latest run of the model
 
     @property
@@ -1307,6 +1342,8 @@ class FEModel3D():
             member.SegmentsZ = []
             member.SegmentsY = []
             member.SegmentsX = []
+            member._clear_segments()
+        self._end_forces = {}
         
         # Delete the plate loads
         for plate in self.plates.values():
@@ -1357,301 +1394,49 @@ class FEModel3D():
         :rtype: ndarray or coo_matrix
         """           
         
-        # Determine if a sparse matrix has been requested
-        if sparse == True:
-            # The stiffness matrix will be stored as a scipy `coo_matrix`. Scipy's
-            # documentation states that this type of matrix is ideal for efficient
-            # construction of finite element matrices. When converted to another
-            # format, the `coo_matrix` sums values at the same (i, j) index. We'll
-            # build the matrix from three lists.
-            row = []
-            col = []
-            data = []
-        else:
-            # Initialize a dense matrix of zeros
-            K = zeros((len(self.nodes)*6, len(self.nodes)*6))
-        
-        # Add stiffness terms for each nodal spring in the model
-        if log: print('- Adding nodal spring support stiffness terms to global stiffness matrix')
-        for node in self.nodes.values():
-            
-            # Determine if the node has any spring supports
-            if node.spring_DX[0] != None:
-
-                # Check for an active spring support
-                if node.spring_DX[2] == True:
-                    m, n = node.ID*6, node.ID*6
-                    if sparse == True:
-                        data.append(float(node.spring_DX[0]))
-                        row.append(m)
-                        col.append(n)
-                    else:
-                        K[m, n] += float(node.spring_DX[0])
-
-            if node.spring_DY[0] != None:
-
-                # Check for an active spring support
-                if node.spring_DY[2] == True:
-                    m, n = node.ID*6 + 1, node.ID*6 + 1
-                    if sparse == True:
-                        data.append(float(node.spring_DY[0]))
-                        row.append(m)
-                        col.append(n)
-                    else:
-                        K[m, n] += float(node.spring_DY[0])
-
-            if node.spring_DZ[0] != None:
-
-                # Check for an active spring support
-                if node.spring_DZ[2] == True:
-                    m, n = node.ID*6 + 2, node.ID*6 + 2
-                    if sparse == True:
-                        data.append(float(node.spring_DZ[0]))
-                        row.append(m)
-                        col.append(n)
-                    else:
-                        K[m, n] += float(node.spring_DZ[0])
-        
-            if node.spring_RX[0] != None:
-
-                # Check for an active spring support
-                if node.spring_RX[2] == True:
-                    m, n = node.ID*6 + 3, node.ID*6 + 3
-                    if sparse == True:
-                        data.append(float(node.spring_RX[0]))
-                        row.append(m)
-                        col.append(n)
-                    else:
-                        K[m, n] += float(node.spring_RX[0])
+        # Get the DOF index tables built when the model was last numbered
+        tables = self._dof_tables
+        if tables is None:
+            tables = self._dof_tables = dof_tables(self)
 
-            if node.spring_RY[0] != None:
+        # Each block below is a pair of arrays: the global DOF numbers of each element and the
+        # element global stiffness matrices stacked into one `(n_elem, n, n)` array
+        blocks = []
 
-                # Check for an active spring support
-                if node.spring_RY[2] == True:
-                    m, n = node.ID*6 + 4, node.ID*6 + 4
-                    if sparse == True:
-                        data.append(float(node.spring_RY[0]))
-                        row.append(m)
-                        col.append(n)
-                    else:
-                        K[m, n] += float(node.spring_RY[0])
-            
-            if node.spring_RZ[0] != None:
-
-                # Check for an active spring support
-                if node.spring_RZ[2] == True:
-                    m, n = node.ID*6 + 5, node.ID*6 + 5
-                    if sparse == True:
-                        data.append(float(node.spring_RZ[0]))
-                        row.append(m)
-                        col.append(n)
-                    else:
-                        K[m, n] += float(node.spring_RZ[0])
+        # Add stiffness terms for each nodal spring in the model
+        if log: print('- Adding nodal spring support stiffness terms to global stiffness matrix')
+        blocks.append(node_spring_terms(tables['node_springs']))
 
         # Add stiffness terms for each spring in the model
         if log: print('- Adding spring stiffness terms to global stiffness matrix')
-        for spring in self.springs.values():
-            
-            if spring.active[combo_name] == True:
-
-                # Get the spring's global stiffness matrix
-                # Storing it as a local variable eliminates the need to rebuild it every time a term is needed
-                spring_K = spring.K()
-
-                # Step through each term in the spring's stiffness matrix
-                # 'a' & 'b' below are row/column indices in the spring's stiffness matrix
-                # 'm' & 'n' are corresponding row/column indices in the global stiffness matrix
-                for a in range(12):
-                
-                    # Determine if index 'a' is related to the i-node or j-node
-                    if a < 6:
-                        # Find the corresponding index 'm' in the global stiffness matrix
-                        m = spring.i_node.ID*6 + a
-                    else:
-                        # Find the corresponding index 'm' in the global stiffness matrix
-                        m = spring.j_node.ID*6 + (a-6)
-                    
-                    for b in range(12):
-                    
-                        # Determine if index 'b' is related to the i-node or j-node
-                        if b < 6:
-                            # Find the corresponding index 'n' in the global stiffness matrix
-                            n = spring.i_node.ID*6 + b
-                        else:
-                            # Find the corresponding index 'n' in the global stiffness matrix
-                            n = spring.j_node.ID*6 + (b-6)
-                    
-                        # Now that 'm' and 'n' are known, place the term in the global stiffness matrix
-                        if sparse == True:
-                            row.append(m)
-                            col.append(n)
-                            data.append(spring_K[a, b])
-                        else:
-                            K[m, n] += spring_K[a, b]
+        springs = tables['springs']
+        active = springs.active(combo_name)
+        blocks.append((springs.dofs[active], springs.stiffness()[active]))
 
         # Add stiffness terms for each physical member in the model
         if log: print('- Adding member stiffness terms to global stiffness matrix')
-        for phys_member in self.members.values():
-            
-            # Check to see if the physical member is active for the given load combination
-            if phys_member.active[combo_name] == True:
-
-                # Step through each sub-member in the physical member and add terms
-                for member in phys_member.sub_members.values():
-                    
-                    # Get the member's global stiffness matrix
-                    # Storing it as a local variable eliminates the need to rebuild it every time a term is needed
-                    member_K = member.K()
+        members = tables['members']
+        active = members.active(combo_name)
+        blocks.append((members.dofs[active], members.stiffness()[active]))
 
-                    # Step through each term in the member's stiffness matrix
-                    # 'a' & 'b' below are row/column indices in the member's stiffness matrix
-                    # 'm' & 'n' are corresponding row/column indices in the global stiffness matrix
-                    for a in range(12):
-                    
-                        # Determine if index 'a' is related to the i-node or j-node
-                        if a < 6:
-                            # Find the corresponding index 'm' in the global stiffness matrix
-                            m = member.i_node.ID*6 + a
-                        else:
-                            # Find the corresponding index 'm' in the global stiffness matrix
-                            m = member.j_node.ID*6 + (a-6)
-                        
-                        for b in range(12):
-                        
-                            # Determine if index 'b' is related to the i-node or j-node
-                            if b < 6:
-                                # Find the corresponding index 'n' in the global stiffness matrix
-                                n = member.i_node.ID*6 + b
-                            else:
-                                # Find the corresponding index 'n' in the global stiffness matrix
-                                n = member.j_node.ID*6 + (b-6)
-                        
-                            # Now that 'm' and 'n' are known, place the term in the global stiffness matrix
-                            if sparse == True:
-                                row.append(m)
-                                col.append(n)
-                                data.append(member_K[a, b])
-                            else:
-                                K[m, n] += member_K[a, b]
-                
         # Add stiffness terms for each quadrilateral in the model
         if log: print('- Adding quadrilateral stiffness terms to global stiffness matrix')
-        for quad in self.quads.values():
-            
-            # Get the quadrilateral's global stiffness matrix
-            # Storing it as a local variable eliminates the need to rebuild it every time a term is needed
-            quad_K = quad.K()
-
-            # Step through each term in the quadrilateral's stiffness matrix
-            # 'a' & 'b' below are row/column indices in the quadrilateral's stiffness matrix
-            # 'm' & 'n' are corresponding row/column indices in the global stiffness matrix
-            for a in range(24):
-
-                # Determine which node the index 'a' is related to
-                if a < 6:
-                    # Find the corresponding index 'm' in the global stiffness matrix
-                    m = quad.i_node.ID*6 + a
-                elif a < 12:
-                    # Find the corresponding index 'm' in the global stiffness matrix
-                    m = quad.j_node.ID*6 + (a - 6)
-                elif a < 18:
-                    # Find the corresponding index 'm' in the global stiffness matrix
-                    m = quad.m_node.ID*6 + (a - 12)
-                else:
-                    # Find the corresponding index 'm' in the global stiffness matrix
-                    m = quad.n_node.ID*6 + (a - 18)
-
-                for b in range(24):
-
-                    # Determine which node the index 'b' is related to
-                    if b < 6:
-                        # Find the corresponding index 'n' in the global stiffness matrix
-                        n = quad.i_node.ID*6 + b
-                    elif b < 12:
-                        # Find the corresponding index 'n' in the global stiffness matrix
-                        n = quad.j_node.ID*6 + (b - 6)
-                    elif b < 18:
-                        # Find the corresponding index 'n' in the global stiffness matrix
-                        n = quad.m_node.ID*6 + (b - 12)
-                    else:
-                        # Find the corresponding index 'n' in the global stiffness matrix
-                        n = quad.n_node.ID*6 + (b - 18)
-                    
-                    # Now that 'm' and 'n' are known, place the term in the global stiffness matrix
-                    if sparse == True:
-                        row.append(m)
-                        col.append(n)
-                        data.append(quad_K[a, b])
-                    else:
-                        K[m, n] += quad_K[a, b]
-        
+        quads = tables['quads']
+        blocks.append((quads.dofs, quads.stiffness()))
+
         # Add stiffness terms for each plate in the model
         if log: print('- Adding plate stiffness terms to global stiffness matrix')
-        for plate in self.plates.values():
-            
-            # Get the plate's global stiffness matrix
-            # Storing it as a local variable eliminates the need to rebuild it every time a term is needed
-            plate_K = plate.K()
-
-            # Step through each term in the plate's stiffness matrix
-            # 'a' & 'b' below are row/column indices in the plate's stiffness matrix
-            # 'm' & 'n' are corresponding row/column indices in the global stiffness matrix
-            for a in range(24):
-
-                # Determine which node the index 'a' is related to
-                if a < 6:
-                    # Find the corresponding index 'm' in the global stiffness matrix
-                    m = plate.i_node.ID*6 + a
-                elif a < 12:
-                    # Find the corresponding index 'm' in the global stiffness matrix
-                    m = plate.j_node.ID*6 + (a - 6)
-                elif a < 18:
-                    # Find the corresponding index 'm' in the global stiffness matrix
-                    m = plate.m_node.ID*6 + (a - 12)
-                else:
-                    # Find the corresponding index 'm' in the global stiffness matrix
-                    m = plate.n_node.ID*6 + (a - 18)
-
-                for b in range(24):
-
-                    # Determine which node the index 'b' is related to
-                    if b < 6:
-                        # Find the corresponding index 'n' in the global stiffness matrix
-                        n = plate.i_node.ID*6 + b
-                    elif b < 12:
-                        # Find the corresponding index 'n' in the global stiffness matrix
-                        n = plate.j_node.ID*6 + (b - 6)
-                    elif b < 18:
-                        # Find the corresponding index 'n' in the global stiffness matrix
-                        n = plate.m_node.ID*6 + (b - 12)
-                    else:
-                        # Find the corresponding index 'n' in the global stiffness matrix
-                        n = plate.n_node.ID*6 + (b - 18)
-                    
-                    # Now that 'm' and 'n' are known, place the term in the global stiffness matrix
-                    if sparse == True:
-                        row.append(m)
-                        col.append(n)
-                        data.append(plate_K[a, b])
-                    else:
-                        K[m, n] += plate_K[a, b]
+        plates = tables['plates']
+        blocks.append((plates.dofs, plates.stiffness()))
 
-        if sparse:
-            # The stiffness matrix will be stored as a scipy `coo_matrix`. Scipy's
-            # documentation states that this type of matrix is ideal for efficient
-            # construction of finite element matrices. When converted to another
-            # format, the `coo_matrix` sums values at the same (i, j) index.
-            from scipy.sparse import coo_matrix
-            row = array(row)
-            col = array(col)
-            data = array(data)
-            K = coo_matrix((data, (row, col)), shape=(len(self.nodes)*6, len(self.nodes)*6))
+        # Scatter all the element terms into the global stiffness matrix in a single pass. The
+        # `coo_matrix` used internally sums values at the same (i, j) index.
+        K = assemble(blocks, len(self.nodes)*6, sparse)
 
         # Check that there are no nodal instabilities
         if check_stability:
             if log: print('- Checking nodal stability')
-            if sparse: _check_stability(self, K.tocsr())
-            else: _check_stability(self, K)
+            _check_stability(self, K.diagonal())
 
         # Return the global stiffness matrix
         return K    
@@ -1671,66 +1456,17 @@ class FEModel3D():
         :rtype: ndarray or coo_matrix
         """
         
-        if sparse == True:
-            # Initialize a zero matrix to hold all the stiffness terms. The matrix will be stored as a scipy sparse `lil_matrix`. This matrix format has several advantages. It uses less memory if the matrix is sparse, supports slicing, and can be converted to other formats (sparse or dense) later on for mathematical operations.
-            from scipy.sparse import lil_matrix
-            Kg = lil_matrix((len(self.nodes)*6, len(self.nodes)*6))
-        else:
-            Kg = zeros(len(self.nodes)*6, len(self.nodes)*6)
-        
+        # Get the DOF index tables built when the model was last numbered
+        tables = self._dof_tables
+        if tables is None:
+            tables = self._dof_tables = dof_tables(self)
+
         # Add stiffness terms for each physical member in the model
         if log: print('- Adding member geometric stiffness terms to global geometric stiffness matrix')
-        for phys_member in self.members.values():
-            
-            # Check to see if the physical member is active for the given load combination
-            if phys_member.active[combo_name] == True:
-
-                # Step through each sub-member in the physical member and add terms
-                for member in phys_member.sub_members.values():
-
-                    # Calculate the axial force in the member
-                    E = member.material.E
-                    A = member.section.A
-                    L = member.L()
-
-                    # Calculate the axial force acting on the member
-                    if first_step:
-                        # For the first load step take P = 0
-                        P = 0
-                    else:
-                        # Calculate the member axial force due to axial strain
-                        d = member.d(combo_name)
-                        P = E*A/L*(d[6, 0] - d[0, 0])
-
-                    # Get the member's global stiffness matrix
-                    # Storing it as a local variable eliminates the need to rebuild it every time a term is needed
-                    member_Kg = member.Kg(P)
-
-                    # Step through each term in the member's stiffness matrix
-                    # 'a' & 'b' below are row/column indices in the member's stiffness matrix
-                    # 'm' & 'n' are corresponding row/column indices in the global stiffness matrix
-                    for a in range(12):
-                    
-                        # Determine if index 'a' is related to the i-node or j-node
-                        if a < 6:
-                            # Find the corresponding index 'm' in the global stiffness matrix
-                            m = member.i_node.ID*6 + a
-                        else:
-                            # Find the corresponding index 'm' in the global stiffness matrix
-                            m = member.j_node.ID*6 + (a-6)
-                        
-                        for b in range(12):
-                        
-                            # Determine if index 'b' is related to the i-node or j-node
-                            if b < 6:
-                                # Find the corresponding index 'n' in the global stiffness matrix
-                                n = member.i_node.ID*6 + b
-                            else:
-                                # Find the corresponding index 'n' in the global stiffness matrix
-                                n = member.j_node.ID*6 + (b-6)
-                        
-                            # Now that 'm' and 'n' are known, place the term in the global stiffness matrix
-                            Kg[m, n] += member_Kg[(a, b)]
+        members = tables['members']
+        active = members.active(combo_name)
+        Kg = assemble([(members.dofs[active], _member_Kg(self, combo_name, first_step)[active])],
+                      len(self.nodes)*6, sparse)
 
         # Return the global geometric stiffness matrix
         return Kg
@@ -1834,92 +1570,12 @@ class FEModel3D():
         :rtype: array
         """        
         
-        # Initialize a zero vector to hold all the terms
-        FER = zeros((len(self.nodes) * 6, 1))
-        
-        # Step through each physical member in the model
-        for phys_member in self.members.values():
-            
-            # Step through each sub-member and add terms
-            for member in phys_member.sub_members.values():
+        # Get the DOF index tables built when the model was last numbered
+        if self._dof_tables is None:
+            self._dof_tables = dof_tables(self)
 
-                # Get the member's global fixed end reaction vector
-                # Storing it as a local variable eliminates the need to rebuild it every time a term is needed
-                member_FER = member.FER(combo_name)
-
-                # Step through each term in the member's fixed end reaction vector
-                # 'a' below is the row index in the member's fixed end reaction vector
-                # 'm' below is the corresponding row index in the global fixed end reaction vector
-                for a in range(12):
-                    
-                    # Determine if index 'a' is related to the i-node or j-node
-                    if a < 6:
-                        # Find the corresponding index 'm' in the global fixed end reaction vector
-                        m = member.i_node.ID * 6 + a
-                    else:
-                        # Find the corresponding index 'm' in the global fixed end reaction vector
-                        m = member.j_node.ID * 6 + (a - 6)
-                    
-                    # Now that 'm' is known, place the term in the global fixed end reaction vector
-                    FER[m, 0] += member_FER[a, 0]
-        
-        # Add terms for each rectangle in the model
-        for plate in self.plates.values():
-            
-            # Get the quadrilateral's global fixed end reaction vector
-            # Storing it as a local variable eliminates the need to rebuild it every time a term is needed
-            plate_FER = plate.FER(combo_name)
-
-            # Step through each term in the quadrilateral's fixed end reaction vector
-            # 'a' below is the row index in the quadrilateral's fixed end reaction vector
-            # 'm' below is the corresponding row index in the global fixed end reaction vector
-            for a in range(24):
-                
-                # Determine if index 'a' is related to the i-node, j-node, m-node, or n-node
-                if a < 6:
-                    # Find the corresponding index 'm' in the global fixed end reaction vector
-                    m = plate.i_node.ID*6 + a
-                elif a < 12:
-                    # Find the corresponding index 'm' in the global fixed end reaction vector
-                    m = plate.j_node.ID*6 + (a - 6)
-                elif a < 18:
-                    # Find the corresponding index 'm' in the global fixed end reaction vector
-                    m = plate.m_node.ID*6 + (a - 12)
-                else:
-                    # Find the corresponding index 'm' in the global fixed end reaction vector
-                    m = plate.n_node.ID*6 + (a - 18)
-                
-                # Now that 'm' is known, place the term in the global fixed end reaction vector
-                FER[m, 0] += plate_FER[a, 0]
-
-        # Add terms for each quadrilateral in the model
-        for quad in self.quads.values():
-            
-            # Get the quadrilateral's global fixed end reaction vector
-            # Storing it as a local variable eliminates the need to rebuild it every time a term is needed
-            quad_FER = quad.FER(combo_name)
-
-            # Step through each term in the quadrilateral's fixed end reaction vector
-            # 'a' below is the row index in the quadrilateral's fixed end reaction vector
-            # 'm' below is the corresponding row index in the global fixed end reaction vector
-            for a in range(24):
-                
-                # Determine if index 'a' is related to the i-node, j-node, m-node, or n-node
-                if a < 6:
-                    # Find the corresponding index 'm' in the global fixed end reaction vector
-                    m = quad.i_node.ID*6 + a
-                elif a < 12:
-                    # Find the corresponding index 'm' in the global fixed end reaction vector
-                    m = quad.j_node.ID*6 + (a - 6)
-                elif a < 18:
-                    # Find the corresponding index 'm' in the global fixed end reaction vector
-                    m = quad.m_node.ID*6 + (a - 12)
-                else:
-                    # Find the corresponding index 'm' in the global fixed end reaction vector
-                    m = quad.n_node.ID*6 + (a - 18)
-                
-                # Now that 'm' is known, place the term in the global fixed end reaction vector
-                FER[m, 0] += quad_FER[a, 0]
+        # Scatter the stacked sub-member, plate and quad vectors into the global vector in one pass
+        fer, FER = _assemble_FER(self, combo_name)
 
         # Return the global fixed end reaction vector
         return FER
@@ -1934,39 +1590,14 @@ class FEModel3D():
         :rtype: array
         """
             
-        # Initialize a zero vector to hold all the terms
-        P = zeros((len(self.nodes)*6, 1))
-        
         # Get the load combination for the given 'combo_name'
         combo = self.load_combos[combo_name]
 
-        # Add terms for each node in the model
-        for node in self.nodes.values():
-            
-            # Get the node's ID
-            ID = node.ID
-
-            # Step through each load factor in the load combination
-            for case, factor in combo.factors.items():
-
-                # Add the node's loads to the global nodal load vector
-                for load in node.NodeLoads:
-
-                    if load[2] == case:
-
-                        if load[0] == 'FX':
-                            P[ID*6 + 0, 0] += factor*load[1]
-                        elif load[0] == 'FY':
-                            P[ID*6 + 1, 0] += factor*load[1]
-                        elif load[0] == 'FZ':
-                            P[ID*6 + 2, 0] += factor*load[1]
-                        elif load[0] == 'MX':
-                            P[ID*6 + 3, 0] += factor*load[1]
-                        elif load[0] == 'MY':
-                            P[ID*6 + 4, 0] += factor*load[1]
-                        elif load[0] == 'MZ':
-                            P[ID*6 + 5, 0] += factor*load[1]
-        
+        # Assemble the nodal force vector for each load case in the combination and apply the load
+        # factors
+        cases = list(combo.factors.keys())
+        P = _case_P(self, cases) @ array([combo.factors[case] for case in cases], dtype=float).reshape(-1, 1)
+
         # Return the global nodal force vector
         return P
 
@@ -1983,12 +1614,12 @@ class FEModel3D():
         # Return the global displacement vector
         return self._D[combo_name]
 
-    def analyze(self, log=False, check_stability=True, check_statics=False, max_iter=30, sparse=True, combo_tags=None, spring_tolerance=0, member_tolerance=0):
+    def analyze(self, log=False, check_stability=True, check_statics=False, max_iter=30, sparse=True, combo_tags=None, spring_tolerance=0, member_tolerance=0, max_update_rank=120, workers=None):
         """Performs first-order static analysis. Iterations are performed if tension-only members or compression-only members are present.
 
         :param log: Prints the analysis log to the console if set to True. Default is False.
         :type log: bool, optional
-        :param check_stability: When set to `True`, checks for nodal instabilities. This slows down analysis a little. Default is `True`.
+        :param check_stability: When set to `True`, checks for nodal instabilities. Default is `True`.
         :type check_stability: bool, optional
         :param check_statics: When set to `True`, causes a statics check to be performed
         :type check_statics: bool, optional
@@ -1996,6 +1627,10 @@ class FEModel3D():
         :type max_iter: int, optional
         :param sparse: Indicates whether the sparse matrix solver should be used. A matrix can be considered sparse or dense depening on how many zero terms there are. Structural stiffness matrices often contain many zero terms. The sparse solver can offer faster solutions for such matrices. Using the sparse solver on dense matrices may lead to slower solution times.
         :type sparse: bool, optional
+        :param max_update_rank: Tension/compression-only iterations reuse the first factorization of the stiffness matrix, applying members and springs that switch on or off as a low-rank update. The matrix is refactored once the accumulated update touches more than this many degrees of freedom. Set to 0 to refactor on every iteration. Defaults to 120.
+        :type max_update_rank: int, optional
+        :param workers: The number of processes used to solve the load combinations in parallel. Each worker solves its load combinations on its own copy of the model, and the displacements, member and spring states and reactions are merged back into this model. Defaults to None, which solves the load combinations one after another in this process.
+        :type workers: int, optional
         :raises Exception: _description_
         :raises Exception: _description_
         """
@@ -2005,10 +1640,6 @@ class FEModel3D():
             print('| Analyzing |')
             print('+-----------+')
 
-        # Import `scipy` features if the sparse solver is being used
-        if sparse == True:
-            from scipy.sparse.linalg import spsolve
-
         # Prepare the model for analysis
         _prepare_model(self)
 
@@ -2018,73 +1649,36 @@ class FEModel3D():
         # Identify which load combinations have the tags the user has given
         combo_list = _identify_combos(self, combo_tags)
 
-        # Step through each load combination
-        for combo in combo_list:
+        options = dict(log=log, sparse=sparse, check_stability=check_stability, max_iter=max_iter, spring_tolerance=spring_tolerance,
+                       member_tolerance=member_tolerance, max_update_rank=max_update_rank)
 
-            if log:
-                print('')
-                print('- Analyzing load combination ' + combo.name)
+        if workers is not None and workers > 1 and len(combo_list) > 1:
 
-            # Keep track of the number of iterations
-            iter_count = 1
-            convergence = False
-            divergence = False
+            # Solve the load combinations in parallel. The workers also calculate the reactions.
+            solve_combos(self, 'Linear TC', combo_list, workers, D1_indices, D2_indices, **options)
 
-            # Iterate until convergence or divergence occurs
-            while convergence == False and divergence == False:
-                
-                # Check for tension/compression-only divergence
-                if iter_count > max_iter:
-                    divergence = True
-                    raise Exception('Model diverged during tension/compression-only analysis')
-                
-                # Get the partitioned global stiffness matrix K11, K12, K21, K22
-                if sparse == True:
-                    K11, K12, K21, K22 = _partition(self, self.K(combo.name, log, check_stability, sparse).tolil(), D1_indices, D2_indices)
-                else:
-                    K11, K12, K21, K22 = _partition(self, self.K(combo.name, log, check_stability, sparse), D1_indices, D2_indices)
+        else:
 
-                # Get the partitioned global fixed end reaction vector
-                FER1, FER2 = _partition(self, self.FER(combo.name), D1_indices, D2_indices)
-
-                # Get the partitioned global nodal force vector       
-                P1, P2 = _partition(self, self.P(combo.name), D1_indices, D2_indices)          
-
-                # Calculate the global displacement vector
-                if log: print('- Calculating global displacement vector')
-                if K11.shape == (0, 0):
-                    # All displacements are known, so D1 is an empty vector
-                    D1 = []
-                else:
-                    try:
-                        # Calculate the unknown displacements D1
-                        if sparse == True:
-                            # The partitioned stiffness matrix is in `lil` format, which is great for memory, but slow for mathematical operations. The stiffness matrix will be converted to `csr` format for mathematical operations. The `@` operator performs matrix multiplication on sparse matrices.
-                            D1 = spsolve(K11.tocsr(), subtract(subtract(P1, FER1), K12.tocsr() @ D2))
-                            D1 = D1.reshape(len(D1), 1)
-                        else:
-                            D1 = solve(K11, subtract(subtract(P1, FER1), matmul(K12, D2)))
-                    except:
-                        # Return out of the method if 'K' is singular and provide an error message
-                        raise Exception('The stiffness matrix is singular, which implies rigid body motion. The structure is unstable. Aborting analysis.')
+            # Step through each load combination
+            for combo in combo_list:
 
-                # Store the calculated displacements to the model and the nodes in the model
-                _store_displacements(self, D1, D2, D1_indices, D2_indices, combo)
-                
-                # Check for tension/compression-only convergence
-                convergence = _check_TC_convergence(self, combo.name, log=log, spring_tolerance=spring_tolerance, member_tolerance=member_tolerance)
+                if log:
+                    print('')
+                    print('- Analyzing load combination ' + combo.name)
 
-                if convergence == False:
+                # Get the partitioned global fixed end reaction vector and nodal force vector. Loads
+                # don't change between tension/compression-only iterations.
+                FER1, FER2 = _partition_vector(self, self.FER(combo.name))
+                P1, P2 = _partition_vector(self, self.P(combo.name))
 
-                    if log: print('- Tension/compression-only analysis did not converge. Adjusting stiffness matrix and reanalyzing.')
-                else:
-                    if log: print('- Tension/compression-only analysis converged after ' + str(iter_count) + ' iteration(s)')
+                # Iterate until the tension/compression-only members and springs have converged
+                _TC_step(self, combo.name, P1, FER1, D1_indices, D2_indices, D2, **options)
 
-                # Keep track of the number of tension/compression only iterations
-                iter_count += 1
+            # Flag the model as solved. Reactions are recovered according to the solution type.
+            self.solution = 'Linear TC'
 
-        # Calculate reactions
-        _calc_reactions(self, log, combo_tags)
+            # Calculate reactions
+            _calc_reactions(self, log, combo_tags)
 
         if log:
             print('')     
@@ -2095,20 +1689,19 @@ class FEModel3D():
         if check_statics == True:
             _check_statics(self, combo_tags)
 
-        # Flag the model as solved
-        self.solution = 'Linear TC'
-
-    def analyze_linear(self, log=False, check_stability=True, check_statics=False, sparse=True, combo_tags=None):
+    def analyze_linear(self, log=False, check_stability=True, check_statics=False, sparse=True, combo_tags=None, max_update_rank=0):
         """Performs first-order static analysis. This analysis procedure is much faster since it only assembles the global stiffness matrix once, rather than once for each load combination. It is not appropriate when non-linear behavior such as tension/compression only analysis or P-Delta analysis are required.
 
         :param log: Prints the analysis log to the console if set to True. Default is False.
         :type log: bool, optional
-        :param check_stability: When set to True, checks the stiffness matrix for any unstable degrees of freedom and reports them back to the console. This does add to the solution time. Defaults to True.
+        :param check_stability: When set to True, checks the stiffness matrix for any unstable degrees of freedom and reports them back to the console. Defaults to True.
         :type check_stability: bool, optional
         :param check_statics: When set to True, causes a statics check to be performed. Defaults to False.
         :type check_statics: bool, optional
         :param sparse: Indicates whether the sparse matrix solver should be used. A matrix can be considered sparse or dense depening on how many zero terms there are. Structural stiffness matrices often contain many zero terms. The sparse solver can offer faster solutions for such matrices. Using the sparse solver on dense matrices may lead to slower solution times. Be sure ``scipy`` is installed to use the sparse solver. Default is True.
         :type sparse: bool, optional
+        :param max_update_rank: Reuses the factorization of the stiffness matrix from the last linear analysis of the model if set above 0. The factorization is reused as it is when only the loads have changed, and elements whose stiffness has changed are applied as a low-rank update as long as they touch no more than this many degrees of freedom. The matrix is refactored otherwise, or when nodes, elements or supports have been added or removed. Defaults to 0, which refactors on every analysis.
+        :type max_update_rank: int, optional
         :raises Exception: Occurs when a singular stiffness matrix is found. This indicates an unstable structure has been modeled.
         """
 
@@ -2117,12 +1710,8 @@ class FEModel3D():
             print('| Analyzing: Linear |')
             print('+-------------------+')
         
-        # Import `scipy` features if the sparse solver is being used
-        if sparse == True:
-            from scipy.sparse.linalg import spsolve
-
         # Prepare the model for analysis
-        _prepare_model(self)
+        _prepare_model(self, keep_factorization=max_update_rank > 0)
 
         # Get the auxiliary list used to determine how the matrices will be partitioned
         D1_indices, D2_indices, D2 = _partition_D(self)
@@ -2130,53 +1719,62 @@ class FEModel3D():
         # Get the partitioned global stiffness matrix K11, K12, K21, K22
         # Note that for linear analysis the stiffness matrix can be obtained for any load combination, as it's the same for all of them
         combo_name = list(self.load_combos.keys())[0]
-        if sparse == True:
-            K11, K12, K21, K22 = _partition(self, self.K(combo_name, log, check_stability, sparse).tolil(), D1_indices, D2_indices)
-        else:
-            K11, K12, K21, K22 = _partition(self, self.K(combo_name, log, check_stability, sparse), D1_indices, D2_indices)
+        pattern = _sparsity_pattern(self)
+        values = _element_values(self, combo_name)
+        K11, K12, K21, K22 = pattern.assemble(values, sparse)
+        if check_stability:
+            if log: print('- Checking nodal stability')
+            _check_stability(self, pattern.diagonal(values))
 
         # Identify which load combinations have the tags the user has given
-        combo_list = _identify_combos(self, combo_tags)
-
-        # Step through each load combination
-        for combo in combo_list:
-
-            if log:
-                print('')
-                print('- Analyzing load combination ' + combo.name)
-
-            # Get the partitioned global fixed end reaction vector
-            FER1, FER2 = _partition(self, self.FER(combo.name), D1_indices, D2_indices)
-
-            # Get the partitioned global nodal force vector       
-            P1, P2 = _partition(self, self.P(combo.name), D1_indices, D2_indices)          
-
-            # Calculate the global displacement vector
-            if log: print('- Calculating global displacement vector')
-            if K11.shape == (0, 0):
-                # All displacements are known, so D1 is an empty vector
-                D1 = []
+        combo_list = list(_identify_combos(self, combo_tags))
+
+        # Linear results can be superposed, so each load case only needs to be solved once. Results
+        # for each load combination are then the load case results weighted by the load factors.
+        cases, factors = _load_factors(combo_list)
+
+        # Build the load vectors for each load case
+        if log: print('- Building the load vectors for ' + str(len(cases)) + ' load cases')
+        P, FER, fer = _case_loads(self, cases)
+        P1, P2 = _partition_vector(self, P)
+        FER1, FER2 = _partition_vector(self, FER)
+
+        # Each column of the right-hand side holds P1 - FER1 for one load case. The last column holds
+        # the response to the enforced displacements D2, which is common to every load combination.
+        RHS = hstack((subtract(P1, FER1), -(K12 @ D2)))
+        combo_factors = vstack((factors, ones((1, len(combo_list)))))
+
+        # Calculate the global displacement vectors for all the load cases at once
+        if log: print('- Calculating global displacement vectors')
+        if K11.shape == (0, 0):
+            # All displacements are known, so D1 is an empty vector
+            D1_cases = zeros((0, len(cases) + 1))
+        else:
+            # Factor K11 once and use the factorization to solve for every load case
+            if max_update_rank > 0:
+                solve = _updated_solver(self, pattern, values, K11, sparse, max_update_rank)
             else:
-                try:
-                    # Calculate the unknown displacements D1
-                    if sparse == True:
-                        # The partitioned stiffness matrix is in `lil` format, which is great
-                        # for memory, but slow for mathematical operations. The stiffness
-                        # matrix will be converted to `csr` format for mathematical operations.
-                        # The `@` operator performs matrix multiplication on sparse matrices.
-                        D1 = spsolve(K11.tocsr(), subtract(subtract(P1, FER1), K12.tocsr() @ D2))
-                        D1 = D1.reshape(len(D1), 1)
-                    else:
-                        D1 = solve(K11, subtract(subtract(P1, FER1), matmul(K12, D2)))
-                except:
-                    # Return out of the method if 'K' is singular and provide an error message
-                    raise Exception('The stiffness matrix is singular, which implies rigid body motion. The structure is unstable. Aborting analysis.')
-
-            # Store the calculated displacements to the model and the nodes in the model
-            _store_displacements(self, D1, D2, D1_indices, D2_indices, combo)
-
-        # Calculate reactions
-        _calc_reactions(self, log, combo_tags)
+                solve = _factorize(self, K11, sparse)
+            D1_cases = solve(RHS).reshape(len(D1_indices), len(cases) + 1)
+
+        # Superpose the load case displacements and store them to the model and the nodes
+        D1 = D1_cases @ combo_factors
+        _store_displacements(self, D1, D2, D1_indices, D2_indices, combo_list)
+
+        # Sub-member fixed end reactions are superposed from their load case values too
+        self._combo_factors = {combo.name: factors[:, [j]] for j, combo in enumerate(combo_list)}
+        for i, member in enumerate(self._dof_tables['members'].elements):
+            member._fer_cases = fer[i]
+
+        # Calculate reactions by superposing the load case reactions R2 = K21*D1 + K22*D2 + FER2 - P2.
+        # Nodal spring supports are reported separately, so they're taken back out of K22.
+        if log: print('- Calculating reactions')
+        k_springs = _spring_support_stiffness(self)[0][D2_indices]
+        R2_cases = K21 @ D1_cases
+        R2_cases = R2_cases.reshape(len(D2_indices), len(cases) + 1)
+        R2_cases[:, :-1] += FER2 - P2
+        R2_cases[:, [-1]] += K22 @ D2 - k_springs.reshape(-1, 1)*D2
+        _store_reactions(self, R2_cases @ combo_factors, D2_indices, combo_list)
 
         if log:
             print('')     
@@ -2190,19 +1788,29 @@ class FEModel3D():
         # Flag the model as solved
         self.solution = 'Linear'
 
-    def analyze_PDelta(self, log=False, check_stability=True, max_iter=30, sparse=True, combo_tags=None):
+    def analyze_PDelta(self, log=False, check_stability=True, max_iter=30, sparse=True, combo_tags=None, tol=None, force_tol=None, method='newton', workers=None):
         """Performs second order (P-Delta) analysis. This type of analysis is appropriate for most models using beams, columns and braces. Second order analysis is usually required by material specific codes. The analysis is iterative and takes longer to solve. Models with slender members and/or members with combined bending and axial loads will generally have more significant P-Delta effects. P-Delta effects in plates/quads are not considered.
 
         :param log: Prints updates to the console if set to True. Default is False.
         :type log: bool, optional
-        :param check_stability: When set to True, checks the stiffness matrix for any unstable degrees of freedom and reports them back to the console. This does add to the solution time. Defaults to True.
+        :param check_stability: When set to True, checks the stiffness matrix for any unstable degrees of freedom and reports them back to the console. Defaults to True.
         :type check_stability: bool, optional
         :param max_iter: The maximum number of iterations permitted. If this value is exceeded the program will report divergence. Defaults to 30.
         :type max_iter: int, optional
         :param sparse: Indicates whether the sparse matrix solver should be used. A matrix can be considered sparse or dense depening on how many zero terms there are. Structural stiffness matrices often contain many zero terms. The sparse solver can offer faster solutions for such matrices. Using the sparse solver on dense matrices may lead to slower solution times. Be sure ``scipy`` is installed to use the sparse solver. Default is True.
         :type sparse: bool, optional
+        :param tol: The relative displacement tolerance. When a tolerance is given, each load combination is iterated until the change in its displacements and its out-of-balance forces are within tolerance. Defaults to None, which runs a first order solve followed by a single solve including the geometric stiffness.
+        :type tol: float, optional
+        :param force_tol: The relative force residual tolerance. Defaults to None, which uses `tol`.
+        :type force_tol: float, optional
+        :param method: The iteration scheme used when a tolerance is given. 'full' refactors the stiffness matrix on every iteration, 'newton' reuses one factorization per tension/compression-only iteration (modified Newton), and 'aitken' adds Aitken relaxation to the modified Newton scheme. Defaults to 'newton'.
+        :type method: str, optional
+        :param workers: The number of processes used to solve the load combinations in parallel. See `analyze`. Defaults to None, which solves the load combinations one after another in this process.
+        :type workers: int, optional
         :raises ValueError: Occurs when there is a singularity in the stiffness matrix, which indicates an unstable structure.
         :raises Exception: Occurs when a model fails to converge.
+        :return: The iteration report for each load combination, also stored in `pdelta_report`. Each report gives the number of iterations, tension/compression-only iterations, solves and factorizations, the final relative displacement and force norms, and whether the analysis converged.
+        :rtype: dict
         """
         
         if log:
@@ -2210,10 +1818,6 @@ class FEModel3D():
             print('| Analyzing: P-Delta |')
             print('+--------------------+')
 
-        # Import `scipy` features if the sparse solver is being used
-        if sparse == True:
-            from scipy.sparse.linalg import spsolve
-
         # Prepare the model for analysis
         _prepare_model(self)
         
@@ -2223,20 +1827,30 @@ class FEModel3D():
         # Identify which load combinations have the tags the user has given
         combo_list = _identify_combos(self, combo_tags)
 
-        # Step through each load combination
-        for combo in combo_list:
+        options = dict(log=log, sparse=sparse, check_stability=check_stability, max_iter=max_iter, first_step=True, tol=tol,
+                       force_tol=force_tol, method=method)
 
-            # Get the partitioned global fixed end reaction vector
-            FER1, FER2 = _partition(self, self.FER(combo.name), D1_indices, D2_indices)
+        if workers is not None and workers > 1 and len(combo_list) > 1:
 
-            # Get the partitioned global nodal force vector       
-            P1, P2 = _partition(self, self.P(combo.name), D1_indices, D2_indices)
+            # Solve the load combinations in parallel. The workers also calculate the reactions.
+            solve_combos(self, 'P-Delta', combo_list, workers, D1_indices, D2_indices, **options)
 
-            # Run the P-Delta analysis for this load combination
-            _PDelta_step(self, combo.name, P1, FER1, D1_indices, D2_indices, D2, log, sparse, check_stability, max_iter, True)
-        
-        # Calculate reactions
-        _calc_reactions(self, log, combo_tags)
+        else:
+
+            # Step through each load combination
+            for combo in combo_list:
+
+                # Get the partitioned global fixed end reaction vector
+                FER1, FER2 = _partition_vector(self, self.FER(combo.name))
+
+                # Get the partitioned global nodal force vector
+                P1, P2 = _partition_vector(self, self.P(combo.name))
+
+                # Run the P-Delta analysis for this load combination
+                _PDelta_step(self, combo.name, P1, FER1, D1_indices, D2_indices, D2, **options)
+
+            # Calculate reactions
+            _calc_reactions(self, log, combo_tags)
 
         if log:
             print('')
@@ -2245,7 +1859,223 @@ class FEModel3D():
         
         # Flag the model as solved
         self.solution = 'P-Delta'
+
+        return self.pdelta_report
     
+    def analyze_envelope(self, solution='Linear', log=False, check_stability=True, max_iter=30, sparse=True, combo_tags=None, block_size=50, tol=None, method='newton'):
+        """Analyzes the load combinations, keeping only the envelope of the results: the maximum, minimum and maximum absolute value of each result across the load combinations, and the load combination that governs each one. The load combinations are solved in blocks, and each block's results are dropped once the envelopes have been updated, so the memory needed depends on the size of the model and the block size rather than the number of load combinations.
+
+        Envelopes are kept for the nodal displacements, the nodal reactions and the local end forces of each sub-member. Results for individual load combinations are not available afterwards.
+
+        :param solution: The type of analysis: 'Linear' (see `analyze_linear`), 'Linear TC' (see `analyze`) or 'P-Delta' (see `analyze_PDelta`). Defaults to 'Linear'.
+        :type solution: str, optional
+        :param log: Prints the analysis log to the console if set to True. Default is False.
+        :type log: bool, optional
+        :param check_stability: When set to `True`, checks for nodal instabilities. Default is `True`.
+        :type check_stability: bool, optional
+        :param max_iter: The maximum number of iterations for nonlinear analysis. Defaults to 30.
+        :type max_iter: int, optional
+        :param sparse: Indicates whether the sparse matrix solver should be used. Default is True.
+        :type sparse: bool, optional
+        :param combo_tags: The tags of the load combinations to analyze. Defaults to None, which analyzes every load combination.
+        :type combo_tags: list, optional
+        :param block_size: The number of load combinations solved before the envelopes are updated. Defaults to 50.
+        :type block_size: int, optional
+        :param tol: The P-Delta convergence tolerance. See `analyze_PDelta`. Defaults to None.
+        :type tol: float, optional
+        :param method: The P-Delta iteration scheme. See `analyze_PDelta`. Defaults to 'newton'.
+        :type method: str, optional
+        :raises ValueError: Occurs when the solution type is not recognized.
+        :return: The envelopes, also stored in `envelopes`, under the keys 'displacements' (rows are node names), 'reactions' (rows are node names) and 'member_forces' (rows are sub-member names).
+        :rtype: dict
+        """
+
+        if solution not in ('Linear', 'Linear TC', 'P-Delta'):
+            raise ValueError(f"Unknown solution '{solution}'. Use 'Linear', 'Linear TC' or 'P-Delta'.")
+
+        if log:
+            print('+---------------------+')
+            print('| Analyzing: Envelope |')
+            print('+---------------------+')
+
+        # Prepare the model for analysis. Only one block of results is ever stored at a time.
+        _prepare_model(self, 0 if solution == 'Linear' else block_size)
+
+        # Get the auxiliary list used to determine how the matrices will be partitioned
+        D1_indices, D2_indices, D2 = _partition_D(self)
+
+        # Identify which load combinations have the tags the user has given
+        combo_list = list(_identify_combos(self, combo_tags))
+
+        # Loads are superposed from their load case values, so they only need to be built once
+        cases, factors = _load_factors(combo_list)
+        P, FER, fer = _case_loads(self, cases)
+
+        # Set up the envelopes. Nodal results are read from the global vectors in node ID order.
+        nodes = sorted(self.nodes.values(), key=lambda node: node.ID)
+        members = self._dof_tables['members'].elements
+        self.envelopes = {'displacements': Envelope([node.name for node in nodes], ('DX', 'DY', 'DZ', 'RX', 'RY', 'RZ')),
+                          'reactions': Envelope([node.name for node in nodes], ('FX', 'FY', 'FZ', 'MX', 'MY', 'MZ')),
+                          'member_forces': Envelope([member.name for member in members],
+                                                    [force + end for end in ('i', 'j') for force in ('Fx', 'Fy', 'Fz', 'Mx', 'My', 'Mz')])}
+
+        def update(D, R, f, names):
+            n = len(nodes)
+            self.envelopes['displacements'].update(D.reshape(n, 6, -1), names)
+            self.envelopes['reactions'].update(R.reshape(n, 6, -1), names)
+            self.envelopes['member_forces'].update(f, names)
+
+        blocks = [range(start, min(start + block_size, len(combo_list))) for start in range(0, len(combo_list), block_size)]
+
+        if solution == 'Linear':
+
+            # The stiffness matrix is the same for every load combination
+            pattern = _sparsity_pattern(self)
+            values = _element_values(self, list(self.load_combos.keys())[0])
+            K11, K12, K21, K22 = pattern.assemble(values, sparse)
+            if check_stability:
+                if log: print('- Checking nodal stability')
+                _check_stability(self, pattern.diagonal(values))
+
+            # Solve each load case once. The last column is the response to the enforced
+            # displacements, which is common to every load combination.
+            P1, P2 = _partition_vector(self, P)
+            FER1, FER2 = _partition_vector(self, FER)
+            RHS = hstack((subtract(P1, FER1), -(K12 @ D2)))
+            combo_factors = vstack((factors, ones((1, len(combo_list)))))
+            if log: print('- Calculating global displacement vectors for ' + str(len(cases)) + ' load cases')
+            if K11.shape == (0, 0):
+                D1_cases = zeros((0, len(cases) + 1))
+            else:
+                D1_cases = _factorize(self, K11, sparse)(RHS).reshape(len(D1_indices), len(cases) + 1)
+            D2_cases = hstack((zeros((len(D2_indices), len(cases))), D2))
+            D_cases = _unpartition_disp(self, D1_cases, D2_cases, D1_indices, D2_indices)
+
+            # Load case reactions and member end forces
+            k_springs = _spring_support_stiffness(self)[0][D2_indices]
+            R2_cases = (K21 @ D1_cases).reshape(len(D2_indices), len(cases) + 1)
+            R2_cases[:, :-1] += FER2 - P2
+            R2_cases[:, [-1]] += K22 @ D2 - k_springs.reshape(-1, 1)*D2
+            f_cases = _member_forces(self, D_cases, concatenate((fer, zeros((len(members), 12, 1))), axis=2))
+
+            # Superpose the load combinations a block at a time
+            for block in blocks:
+                if log: print('- Enveloping load combinations ' + str(block.start + 1) + ' to ' + str(block.stop))
+                block_factors = combo_factors[:, block]
+                D = D_cases @ block_factors
+                R = _reaction_vectors(self, R2_cases @ block_factors, D2_indices, D)
+                f = einsum('nic,cb->nib', f_cases, block_factors)
+                update(D, R, f, [combo_list[j].name for j in block])
+
+        else:
+
+            for block in blocks:
+
+                block_combos = [combo_list[j] for j in block]
+
+                for j, combo in zip(block, block_combos):
+
+                    if log:
+                        print('')
+                        print('- Analyzing load combination ' + combo.name)
+
+                    P1, P2 = _partition_vector(self, P @ factors[:, [j]])
+                    FER1, FER2 = _partition_vector(self, FER @ factors[:, [j]])
+                    if solution == 'P-Delta':
+                        _PDelta_step(self, combo.name, P1, FER1, D1_indices, D2_indices, D2, log, sparse, check_stability, max_iter, True, tol, None, method)
+                    else:
+                        _TC_step(self, combo.name, P1, FER1, D1_indices, D2_indices, D2, log, sparse, check_stability, max_iter)
+
+                # Recover the block's reactions and member end forces
+                self.solution = solution
+                D = hstack([self._D[combo.name] for combo in block_combos])
+                R = _calc_reactions(self, log, combo_list=block_combos)
+                active = array([[member.active[combo.name] for combo in block_combos] for member in members], dtype=bool).reshape(len(members), len(block_combos))
+                f = _member_forces(self, D, einsum('nic,cb->nib', fer, factors[:, block]), active, solution == 'P-Delta')
+                update(D, R, f, [combo.name for combo in block_combos])
+
+                # Drop the block's results
+                self._results.clear()
+                for item in [*self.members.values(), *members, *self.springs.values()]:
+                    for combo in block_combos:
+                        item.active.pop(combo.name, None)
+
+        if log:
+            print('')
+            print('- Analysis complete')
+            print('')
+
+        # Flag the model as solved. Only the envelopes are available.
+        self.solution = 'Envelope'
+
+        return self.envelopes
+
+    def member_results(self, member_names=None, combo_names=None, diagrams=('Fx', 'Fy', 'Fz', 'Mx', 'My', 'Mz', 'dy', 'dz'), n_points=20, extremes=True):
+        """Returns member diagrams and their extreme values for many members and load combinations in one call. Each member's segments are checked once per load combination and every diagram is evaluated from them, rather than once for every `*_array`, `max_*` and `min_*` call.
+
+        The diagrams are the same as those returned by the physical members' `*_array` methods, and the extreme values are the same as those returned by their `max_*` and `min_*` methods.
+
+        :param member_names: The physical member names. Defaults to None, which includes every member.
+        :type member_names: list, optional
+        :param combo_names: The load combination names. Defaults to None, which includes every solved load combination.
+        :type combo_names: list, optional
+        :param diagrams: The diagrams to evaluate: 'Fx' (axial force), 'Fy', 'Fz' (shear), 'Mx' (torque), 'My', 'Mz' (moment), 'dx', 'dy' and 'dz' (deflection). Defaults to every diagram except 'dx'.
+        :type diagrams: tuple, optional
+        :param n_points: The number of locations along each member, either one number for every diagram or a dictionary keyed by diagram name. Defaults to 20.
+        :type n_points: int or dict, optional
+        :param extremes: Also finds the minimum and maximum of each diagram if `True`. Defaults to True.
+        :type extremes: bool, optional
+        :raises ValueError: Occurs when a diagram name is not recognized.
+        :return: The results. Diagrams have shape `(n_members, n_combos, n_points)` and extreme values have shape `(n_members, n_combos)`.
+        :rtype: MemberResults
+        """
+
+        if member_names is None:
+            member_names = list(self.members)
+        if combo_names is None:
+            combo_names = [name for name in self.load_combos if name in self._D]
+
+        return extract(self, member_names, combo_names, diagrams, n_points, extremes)
+
+    def member_end_forces(self, combo_names=None):
+        """Returns the local end force vectors of every sub-member for many load combinations at once, matching `Member3D.f()`. Each sub-member's 12 displacements are gathered from the global displacement matrix and the stacked transformation and stiffness matrices are applied to every load combination together.
+
+        The end forces are cached for each load combination until the model is analyzed again or its displacements for that load combination change.
+
+        :param combo_names: The load combination names. Defaults to None, which includes every solved load combination.
+        :type combo_names: list, optional
+        :raises ValueError: Occurs after a pushover analysis, whose end forces depend on the push load step.
+        :return: The local end force vectors, shape `(n_members, 12, n_combos)`. Row `member.ID` holds the end forces for each sub-member.
+        :rtype: array
+        """
+
+        if self.solution == 'Pushover':
+            raise ValueError('Batched end forces are not available after a pushover analysis. Use `Member3D.f()` instead.')
+
+        if combo_names is None:
+            combo_names = list(self._D)
+
+        # Find the load combinations whose end forces haven't been calculated for their current displacements
+        stale = [name for name in combo_names
+                 if self._end_forces.get(name, (None,))[0] != (self._results.stamp(name), self.solution)]
+
+        if stale:
+            members = self._dof_tables['members'].elements
+            combo_list = [self.load_combos[name] for name in stale]
+
+            # Fixed end reactions are superposed from their load case values
+            cases, factors = _load_factors(combo_list)
+            fer = einsum('nic,cb->nib', _case_loads(self, cases)[2], factors)
+
+            D = hstack([self._D[name] for name in stale])
+            active = array([[member.active[name] for name in stale] for member in members], dtype=bool).reshape(len(members), len(stale))
+            f = _member_forces(self, D, fer, active, self.solution == 'P-Delta')
+
+            for j, name in enumerate(stale):
+                self._end_forces[name] = ((self._results.stamp(name), self.solution), f[:, :, j:j + 1])
+
+        return concatenate([self._end_forces[name][1] for name in combo_names], axis=2)
+
     def _not_ready_yet_analyze_pushover(self, log=False, check_stability=True, push_combo='Push', max_iter=30, tol=0.01, sparse=True, combo_tags=None):
 
         if log:
@@ -2253,10 +2083,6 @@ class FEModel3D():
             print('| Analyzing: Pushover |')
             print('+---------------------+')
         
-        # Import `scipy` features if the sparse solver is being used
-        if sparse == True:
-            from scipy.sparse.linalg import spsolve
-
         # Prepare the model for analysis
         _prepare_model(self)
         
@@ -2302,16 +2128,16 @@ class FEModel3D():
             step_num = 1
             
             # Get the partitioned global fixed end reaction vector
-            FER1, FER2 = _partition(self, self.FER(combo.name), D1_indices, D2_indices)
+            FER1, FER2 = _partition_vector(self, self.FER(combo.name))
 
             # Get the partitioned global nodal force vector       
-            P1, P2 = _partition(self, self.P(combo.name), D1_indices, D2_indices)
+            P1, P2 = _partition_vector(self, self.P(combo.name))
 
             # Get the partitioned global fixed end reaction vector for a pushover load increment
-            FER1_push, FER2_push = _partition(self, self.FER(push_combo), D1_indices, D2_indices)
+            FER1_push, FER2_push = _partition_vector(self, self.FER(push_combo))
 
             # Get the partitioned global nodal force vector for a pushover load increment
-            P1_push, P2_push = _partition(self, self.P(push_combo), D1_indices, D2_indices)
+            P1_push, P2_push = _partition_vector(self, self.P(push_combo))
 
             # Solve the current load combination without the pushover load applied
             _PDelta_step(self, combo.name, P1, FER1, D1_indices, D2_indices, D2, log, sparse, check_stability, max_iter, first_step=True)
@@ -1,9 +1,12 @@
 # %%
-from numpy import array, zeros, add, subtract, matmul, insert, cross, divide, linspace, vstack, hstack, allclose, where, radians, sin, cos
+from numpy import array, zeros, add, subtract, matmul, insert, cross, divide, linspace, vstack, hstack, allclose, radians, sin, cos, arange
 from numpy.linalg import inv, pinv
 from math import isclose
+from collections import OrderedDict
+from sys import getsizeof
 from .BeamSegZ import BeamSegZ
 from .BeamSegY import BeamSegY
+from .SegmentTable import SegmentTable
 from .FixedEndReactions import FER_PtLoad, FER_Moment, FER_LinLoad, FER_AxialPtLoad, FER_AxialLinLoad, FER_Torque
 import warnings
 
@@ -20,6 +23,11 @@ class Member3D():
     # '__plt' is used to store the 'pyplot' from matplotlib once it gets imported. Setting it to 'None' for now allows us to defer importing it until it's actually needed.
     __plt = None
 
+    # Limits on the segments each member keeps cached. When either limit is exceeded the segments
+    # for the least recently used load combinations are dropped first.
+    segment_cache_size = 16          # The most load combinations kept
+    segment_cache_memory = 1 << 20   # The most memory used, in bytes (estimated)
+
 #%%
     def __init__(self, model, name, i_node, j_node, material_name, section_name, rotation=0.0,
                  tension_only=False, comp_only=False):
@@ -66,8 +74,20 @@ class Member3D():
         # Members need to track whether they are active or not for any given load combination. They may become inactive for a load combination during a tension/compression-only analysis. This dictionary will be used when the model is solved.
         self.active = {} # Key = load combo name, Value = True or False
         
-        # The 'Member3D' object will store results for one load combination at a time. To reduce repetative calculations the '_solved_combo' variable will be used to track whether the member needs to be resegmented before running calculations for any given load combination.
-        self._solved_combo = None # The current solved load combination
+        # Segmenting the member is the expensive part of its result queries, so the segments for recently queried load combinations are kept in a least recently used cache. Each entry records what the segments were built from, so they're rebuilt if the loads, releases or solution change. 'SegmentsZ', 'SegmentsY' and 'SegmentsX' always hold the segments for the last load combination queried.
+        self._segment_cache = OrderedDict() # Key = load combo name, Value = (key, SegmentsZ, SegmentsY, SegmentsX, size, tables)
+        self._segment_cache_bytes = 0       # The estimated memory used by the cached segments
+        self._tables = None                 # The `SegmentTable` for 'SegmentsZ', 'SegmentsY' and 'SegmentsX', used to evaluate results
+
+        # Views into the stacked matrices of a `MemberBatch`. These are assigned when the member is
+        # numbered for analysis and let the methods below skip recomputing the same matrices.
+        self._T = None       # Transformation matrix
+        self._T_inv = None   # Inverse of the transformation matrix
+        self._k = None       # Condensed local stiffness matrix
+        self._K = None       # Global stiffness matrix
+        self._fer_op = None  # Fixed end reaction condensation operator (`None` if unreleased)
+        self._kg_unit = None # Local geometric stiffness matrix for a unit axial force
+        self._fer_cases = None  # Fixed end reaction vectors for each load case, used for superposition
 
         # Members need a link to the model they belong to
         self.model = model
@@ -110,6 +130,10 @@ class Member3D():
         Returns the condensed (and expanded) local stiffness matrix for the member.
         """
 
+        # Use the batched result if one is available
+        if self._k is not None:
+            return self._k
+
         # Partition the local stiffness matrix as 4 submatrices in
         # preparation for static condensation
         k11, k12, k21, k22 = self._partition(self._k_unc())
@@ -173,6 +197,10 @@ class Member3D():
             The axial force acting on the member (compression = +, tension = -)
         """
 
+        # Use the batched unit geometric stiffness matrix if one is available
+        if self._kg_unit is not None:
+            return self._kg_unit*P
+
         # Get the properties needed to form the local geometric stiffness matrix
         Ip = self.section.Iy + self.section.Iz
         A = self.section.A
@@ -322,6 +350,16 @@ class Member3D():
             The load combination to construct the fixed end reaction vector for.
         """
         
+        # Superpose the load case vectors from a linear analysis if they are available
+        if self._fer_cases is not None and combo_name in self.model._combo_factors:
+            return self._fer_cases @ self.model._combo_factors[combo_name]
+
+        # Use the batched condensation operator if one is available
+        if self._k is not None:
+            if self._fer_op is None:
+                return self._fer_unc(combo_name)
+            return self._fer_op @ self._fer_unc(combo_name)
+
         # Get the lists of unreleased and released degree of freedom indices
         R1_indices, R2_indices = self._partition_D()
 
@@ -486,6 +524,10 @@ class Member3D():
         Returns the transformation matrix for the member.
         """
 
+        # Use the batched result if one is available
+        if self._T is not None:
+            return self._T
+
         x1 = self.i_node.X
         x2 = self.j_node.X
         y1 = self.i_node.Y
@@ -573,6 +615,17 @@ class Member3D():
         
         return transMatrix
 
+    def _inv_T(self):
+        """
+        Returns the inverse of the transformation matrix for the member.
+        """
+
+        # Use the batched result if one is available
+        if self._T_inv is not None:
+            return self._T_inv
+
+        return inv(self.T())
+
 #%%
     # Member global stiffness matrix
     def K(self):
@@ -582,8 +635,12 @@ class Member3D():
         :rtype: array
         """
         
+        # Use the batched result if one is available
+        if self._K is not None:
+            return self._K
+
         # Calculate and return the stiffness matrix in global coordinates
-        return matmul(matmul(inv(self.T()), self.k()), self.T())
+        return matmul(matmul(self._inv_T(), self.k()), self.T())
 
     def Kg(self, P=0.0):
         """Returns the global geometric stiffness matrix for the member. Used for P-Delta analysis.
@@ -595,7 +652,7 @@ class Member3D():
         """
         
         # Calculate and return the geometric stiffness matrix in global coordinates
-        return matmul(matmul(inv(self.T()), self.kg(P)), self.T())
+        return matmul(matmul(self._inv_T(), self.kg(P)), self.T())
 
     def Km(self, combo_name, push_combo, step_num):
         """Returns the global plastic reduction matrix for the member. Used to modify member behavior for plastic hinges at the ends.
@@ -611,7 +668,7 @@ class Member3D():
         """
 
         # Calculate and return the plastic reduction matrix in global coordinates
-        return matmul(matmul(inv(self.T()), self.km(combo_name, push_combo, step_num)), self.T())
+        return matmul(matmul(self._inv_T(), self.km(combo_name, push_combo, step_num)), self.T())
     
     def F(self, combo_name='Combo 1'):
         """
@@ -619,7 +676,7 @@ class Member3D():
         """
         
         # Calculate and return the global force vector
-        return matmul(inv(self.T()), self.f(combo_name))
+        return matmul(self._inv_T(), self.f(combo_name))
     
     def FER(self, combo_name='Combo 1'):
         """
@@ -632,7 +689,7 @@ class Member3D():
         """
         
         # Calculate and return the fixed end reaction vector
-        return matmul(inv(self.T()), self.fer(combo_name))
+        return matmul(self._inv_T(), self.fer(combo_name))
 
 #%%
     def D(self, combo_name='Combo 1'):
@@ -687,44 +744,23 @@ class Member3D():
         combo_name : string
             The name of the load combination to get the results for (not the combination itself).
         """
-        
+
         # Only calculate results if the member is currently active
         if self.active[combo_name]:
 
             # Segment the member if necessary
-            if self._solved_combo is None or combo_name != self._solved_combo.name:
-                self._segment_member(combo_name)
-                self._solved_combo = self.model.load_combos[combo_name]
+            self._segments(combo_name)
 
             # Check which direction is of interest
             if Direction == 'Fy':
-                
-                # Check which segment 'x' falls on
-                for segment in self.SegmentsZ:
-                    if round(x, 10) >= round(segment.x1, 10) and round(x, 10) < round(segment.x2, 10):
-                        return segment.Shear(x - segment.x1)
-                    
-                if isclose(x, self.L()):  
-                    lastIndex = len(self.SegmentsZ) - 1
-                    return self.SegmentsZ[lastIndex].Shear(x - self.SegmentsZ[lastIndex].x1)
-                    
+                return self._point_result(self._tables[0], 'shear', x)
             elif Direction == 'Fz':
-                
-                for segment in self.SegmentsY:
-                    
-                    if round(x,10) >= round(segment.x1,10) and round(x,10) < round(segment.x2,10):
-                        
-                        return segment.Shear(x - segment.x1)
-                    
-                if isclose(x, self.L()):
-                    
-                    lastIndex = len(self.SegmentsY) - 1
-                    return self.SegmentsY[lastIndex].Shear(x - self.SegmentsY[lastIndex].x1)
-        
+                return self._point_result(self._tables[1], 'shear', x)
+
         else:
 
             return 0
-            
+
 #%%
     def max_shear(self, Direction, combo_name='Combo 1'):
         """
@@ -739,41 +775,25 @@ class Member3D():
         combo_name : string
             The name of the load combination to get the results for (not the combination itself).
         """
-        
+
         # Only calculate results if the member is currently active
         if self.active[combo_name]:
 
             # Segment the member if necessary
-            if self._solved_combo is None or combo_name != self._solved_combo.name:
-                self._segment_member(combo_name)
-                self._solved_combo = self.model.load_combos[combo_name]
-            
+            self._segments(combo_name)
+
             if Direction == 'Fy':
-                
-                Vmax = self.SegmentsZ[0].Shear(0)
+                Vmax = self._tables[0].extremes('shear')[1]
 
-                for segment in self.SegmentsZ:
-                    
-                    if segment.max_shear() > Vmax:
-                        
-                        Vmax = segment.max_shear()
-                        
             if Direction == 'Fz':
-                
-                Vmax = self.SegmentsY[0].Shear(0)
+                Vmax = self._tables[1].extremes('shear')[1]
 
-                for segment in self.SegmentsY:
-                    
-                    if segment.max_shear() > Vmax:
-                        
-                        Vmax = segment.max_shear()
-            
             return Vmax
-        
+
         else:
 
             return 0
-    
+
 #%%
     def min_shear(self, Direction, combo_name='Combo 1'):
         """
@@ -788,41 +808,25 @@ class Member3D():
         combo_name : string
             The name of the load combination to get the results for (not the load combination itself).
         """
-        
+
         # Only calculate results if the member is currently active
         if self.active[combo_name]:
 
             # Segment the member if necessary
-            if self._solved_combo is None or combo_name != self._solved_combo.name:
-                self._segment_member(combo_name)
-                self._solved_combo = self.model.load_combos[combo_name]   
-            
+            self._segments(combo_name)
+
             if Direction == 'Fy':
-                
-                Vmin = self.SegmentsZ[0].Shear(0)
+                Vmin = self._tables[0].extremes('shear')[0]
 
-                for segment in self.SegmentsZ:
-                    
-                    if segment.min_shear() < Vmin:
-                        
-                        Vmin = segment.min_shear()
-                        
             if Direction == 'Fz':
-                
-                Vmin = self.SegmentsY[0].Shear(0)
+                Vmin = self._tables[1].extremes('shear')[0]
 
-                for segment in self.SegmentsY:
-                    
-                    if segment.min_shear() < Vmin:
-                        
-                        Vmin = segment.min_shear()
-            
             return Vmin
-        
+
         else:
 
             return 0
-    
+
 #%%
     def plot_shear(self, Direction, combo_name='Combo 1', n_points=20):
         """
@@ -841,9 +845,7 @@ class Member3D():
         """
         
         # Segment the member if necessary
-        if self._solved_combo is None or combo_name != self._solved_combo.name:
-            self._segment_member(combo_name)
-            self._solved_combo = self.model.load_combos[combo_name]
+        self._segments(combo_name)
         
         # Import 'pyplot' if not already done
         if Member3D.__plt is None:
@@ -881,11 +883,9 @@ class Member3D():
             A custom array of x values that may be provided by the user, otherwise an array is generated.
             Values must be provided in local member coordinates (between 0 and L) and be in ascending order
         """
-        
+
         # Segment the member into segments with mathematically continuous loads if not already done
-        if self._solved_combo is None or combo_name != self._solved_combo.name:
-            self._segment_member(combo_name)
-            self._solved_combo = self.model.load_combos[combo_name]
+        self._segments(combo_name)
 
         L = self.L()
         if x_array is None:
@@ -896,10 +896,10 @@ class Member3D():
 
         # Check which axis is of interest
         if Direction == 'Fz':
-            return self._extract_vector_results(self.SegmentsY, x_array, 'shear')
+            return self._extract_vector_results(self._tables[1], x_array, 'shear')
                 
         elif Direction == 'Fy':
-            return self._extract_vector_results(self.SegmentsZ, x_array, 'shear')
+            return self._extract_vector_results(self._tables[0], x_array, 'shear')
         
         else:
             raise ValueError(f"Direction must be 'Fy' or 'Fz'. {Direction} was given.")
@@ -920,15 +920,13 @@ class Member3D():
         combo_name : string
             The name of the load combination to get the results for (not the load combination itself).
         """
-        
+
         # Only calculate results if the member is currently active
         if self.active[combo_name]:
 
             # Segment the member if necessary
-            if self._solved_combo is None or combo_name != self._solved_combo.name:
-                self._segment_member(combo_name)
-                self._solved_combo = self.model.load_combos[combo_name]
-            
+            self._segments(combo_name)
+
             # Determine if a P-Delta analysis has been run
             if self.model.solution == 'P-Delta' or self.model.solution == 'Pushover':
                 # Include P-little-delta effects in the moment results
@@ -939,37 +937,16 @@ class Member3D():
 
             # Check which axis is of interest
             if Direction == 'My':
-                
-                # Check which segment 'x' falls on
-                for segment in self.SegmentsY:
-
-                    if round(x,10) >= round(segment.x1,10) and round(x,10) < round(segment.x2,10):
-                        
-                        return segment.moment(x - segment.x1, P_delta)
-                    
-                if isclose(x, self.L()):
-                    
-                    return self.SegmentsY[-1].moment(x - self.SegmentsY[-1].x1, P_delta)
-                    
+                return self._point_result(self._tables[1], 'moment', x, P_delta)
             elif Direction == 'Mz':
-                
-                for segment in self.SegmentsZ:
-                    
-                    if round(x,10) >= round(segment.x1,10) and round(x,10) < round(segment.x2,10):
-                        
-                        return segment.moment(x - segment.x1, P_delta)
-                    
-                if isclose(x, self.L()):
-                    
-                    return self.SegmentsZ[-1].moment(x - self.SegmentsZ[-1].x1, P_delta)
-            
+                return self._point_result(self._tables[0], 'moment', x, P_delta)
             else:
                 raise ValueError(f"Direction must be 'My' or 'Mz'. {Direction} was given.")
-    
+
         else:
 
             return 0
-            
+
 #%%
     def max_moment(self, Direction, combo_name='Combo 1'):
         """
@@ -988,6 +965,9 @@ class Member3D():
         # Only calculate results if the member is currently active
         if self.active[combo_name]:
 
+            # Segment the member if necessary
+            self._segments(combo_name)
+
             # Determine if a P-Delta analysis has been run
             if self.model.solution == 'P-Delta' or self.model.solution == 'Pushover':
                 # Include P-little-delta effects in the moment results
@@ -995,34 +975,15 @@ class Member3D():
             else:
                 # Do not include P-little delta effects in the moment results
                 P_delta = False
-            
-            # Segment the member if necessary
-            if self._solved_combo is None or combo_name != self._solved_combo.name:
-                self._segment_member(combo_name)
-                self._solved_combo = self.model.load_combos[combo_name]
-            
+
             if Direction == 'Mz':
-                
-                Mmax = self.SegmentsZ[0].moment(0, P_delta)
+                Mmax = self._tables[0].extremes('moment', P_delta)[1]
 
-                for segment in self.SegmentsZ:
-                    
-                    if segment.max_moment() > Mmax:
-                        
-                        Mmax = segment.max_moment()
-                        
             if Direction == 'My':
-                
-                Mmax = self.SegmentsY[0].moment(0, P_delta)
+                Mmax = self._tables[1].extremes('moment', P_delta)[1]
 
-                for segment in self.SegmentsY:
-                    
-                    if segment.max_moment() > Mmax:
-                        
-                        Mmax = segment.max_moment()
-            
             return Mmax
-        
+
         else:
 
             return 0
@@ -1041,15 +1002,13 @@ class Member3D():
         combo_name : string
             The name of the load combination to get the results for (not the load combination itself).
         """
-        
+
         # Only calculate results if the member is currently active
         if self.active[combo_name]:
 
             # Segment the member if necessary
-            if self._solved_combo is None or combo_name != self._solved_combo.name:
-                self._segment_member(combo_name)   
-                self._solved_combo = self.model.load_combos[combo_name]
-            
+            self._segments(combo_name)
+
             # Determine if a P-Delta analysis has been run
             if self.model.solution == 'P-Delta' or self.model.solution == 'Pushover':
                 # Include P-little-delta effects in the moment results
@@ -1059,23 +1018,13 @@ class Member3D():
                 P_delta = False
 
             if Direction == 'Mz':
-                
-                Mmin = self.SegmentsZ[0].moment(0, P_delta)
+                Mmin = self._tables[0].extremes('moment', P_delta)[0]
 
-                for segment in self.SegmentsZ:
-                    
-                    if segment.min_moment(P_delta) < Mmin: Mmin = segment.min_moment(P_delta)
-                        
             if Direction == 'My':
-                
-                Mmin = self.SegmentsY[0].moment(0, P_delta)
+                Mmin = self._tables[1].extremes('moment', P_delta)[0]
 
-                for segment in self.SegmentsY:
-                    
-                    if segment.min_moment(P_delta) < Mmin: Mmin = segment.min_moment(P_delta)
-            
             return Mmin
-        
+
         else:
 
             return 0
@@ -1098,9 +1047,7 @@ class Member3D():
         """
         
         # Segment the member if necessary
-        if self._solved_combo is None or combo_name != self._solved_combo.name:
-            self._segment_member(combo_name)
-            self._solved_combo = self.model.load_combos[combo_name]
+        self._segments(combo_name)
                 
         # Import 'pyplot' if not already done
         if Member3D.__plt is None:
@@ -1139,9 +1086,7 @@ class Member3D():
             Values must be provided in local member coordinates (between 0 and L) and be in ascending order.
         """
         # Segment the member if necessary
-        if self._solved_combo is None or combo_name != self._solved_combo.name:
-            self._segment_member(combo_name)
-            self._solved_combo = self.model.load_combos[combo_name]
+        self._segments(combo_name)
 
         # Determine if a P-Delta analysis has been run
         if self.model.solution == 'P-Delta' or self.model.solution == 'Pushover':
@@ -1158,23 +1103,22 @@ class Member3D():
         else:
             if any(x_array<0) or any(x_array>L):
                 raise ValueError(f"All x values must be in the range 0 to {L}")
-                
-        if P_delta:
-            #P-delta analysis is not vectorised yet, do it element-wise
-            y_arr = array([self.moment(Direction, x, combo_name) for x in x_array])
-            return array([x_array, y_arr])
 
+        # P-Delta results have always been evaluated like point queries, which place locations on
+        # a segment boundary on the second segment and read zero on inactive members
+        if P_delta and not self.active[combo_name]:
+            return vstack((x_array, zeros(len(x_array))))
+
+        # Check which axis is of interest
+        if Direction == 'My':
+            return self._extract_vector_results(self._tables[1], x_array, 'moment', P_delta, point=P_delta)
+                
+        elif Direction == 'Mz':
+            return self._extract_vector_results(self._tables[0], x_array, 'moment', P_delta, point=P_delta)
+        
         else:
-            # Check which axis is of interest
-            if Direction == 'My':
-                return self._extract_vector_results(self.SegmentsY, x_array, 'moment', P_delta)
-                    
-            elif Direction == 'Mz':
-                return self._extract_vector_results(self.SegmentsZ, x_array, 'moment', P_delta)
-            
-            else:
-                raise ValueError(f"Direction must be 'My' or 'Mz'. {Direction} was given.")
-       
+            raise ValueError(f"Direction must be 'My' or 'Mz'. {Direction} was given.")
+
 #%%
     def torque(self, x, combo_name='Combo 1'):
         """
@@ -1187,24 +1131,15 @@ class Member3D():
         combo_name : string
             The name of the load combination to get the results for (not the load combination itself).
         """
-        
+
         # Only calculate results if the member is currently active
         if self.active[combo_name]:
 
             # Segment the member if necessary
-            if self._solved_combo is None or combo_name != self._solved_combo.name:
-                self._segment_member(combo_name)
-                self._solved_combo = self.model.load_combos[combo_name]
-                
-            # Check which segment 'x' falls on
-            for segment in self.SegmentsX:
-                if round(x, 10) >= round(segment.x1, 10) and round(x, 10) < round(segment.x2, 10):
-                    return segment.Torsion()
-                    
-                if isclose(x, self.L()):  
-                    lastIndex = len(self.SegmentsX) - 1
-                    return self.SegmentsX[lastIndex].Torsion()
-        
+            self._segments(combo_name)
+
+            return self._point_result(self._tables[2], 'torque', x)
+
         else:
 
             return 0
@@ -1219,29 +1154,21 @@ class Member3D():
         combo_name : string
             The name of the load combination to get the results for (not the load combination itself).
         """
-        
+
         # Only calculate results if the member is currently active
         if self.active[combo_name]:
 
             # Segment the member if necessary
-            if self._solved_combo is None or combo_name != self._solved_combo.name:
-                self._segment_member(combo_name)
-                self._solved_combo = self.model.load_combos[combo_name]       
-            
-            Tmax = self.SegmentsX[0].Torsion()   
-            
-            for segment in self.SegmentsX:
+            self._segments(combo_name)
+
+            Tmax = self._tables[2].extremes('torque')[1]
 
-                if segment.MaxTorsion() > Tmax:
-                        
-                    Tmax = segment.MaxTorsion()
-            
             return Tmax
-        
+
         else:
 
             return 0
-    
+
 #%%
     def min_torque(self, combo_name='Combo 1'):
         """
@@ -1252,25 +1179,17 @@ class Member3D():
         combo_name : string
             The name of the load combination to get the results for (not the load combination itself).
         """
-        
+
         # Only calculate results if the member is currently active
         if self.active[combo_name]:
 
             # Segment the member if necessary
-            if self._solved_combo is None or combo_name != self._solved_combo.name:
-                self._segment_member(combo_name)
-                self._solved_combo = self.model.load_combos[combo_name]
-            
-            Tmin = self.SegmentsX[0].Torsion()
-                
-            for segment in self.SegmentsX:
-                    
-                if segment.MinTorsion() < Tmin:
-                        
-                    Tmin = segment.MinTorsion()
-            
+            self._segments(combo_name)
+
+            Tmin = self._tables[2].extremes('torque')[0]
+
             return Tmin
-        
+
         else:
 
             return 0
@@ -1289,9 +1208,7 @@ class Member3D():
         """
         
         # Segment the member if necessary
-        if self._solved_combo is None or combo_name != self._solved_combo.name:
-            self._segment_member(combo_name)
-            self._solved_combo = self.model.load_combos[combo_name]
+        self._segments(combo_name)
         
         # Import 'pyplot' if not already done
         if Member3D.__plt is None:
@@ -1325,9 +1242,7 @@ class Member3D():
             Values must be provided in local member coordinates (between 0 and L) and be in ascending order.
         """
         # Segment the member if necessary
-        if self._solved_combo is None or combo_name != self._solved_combo.name:
-            self._segment_member(combo_name)
-            self._solved_combo = self.model.load_combos[combo_name]
+        self._segments(combo_name)
 
         L = self.L()
 
@@ -1337,9 +1252,8 @@ class Member3D():
             if any(x_array<0) or any(x_array>L):
                 raise ValueError(f"All x values must be in the range 0 to {L}")
             
-        return self._extract_vector_results(self.SegmentsX, x_array, 'torque')
+        return self._extract_vector_results(self._tables[2], x_array, 'torque')
 
-        
     def axial(self, x, combo_name='Combo 1'):
         """
         Returns the axial force at a point along the member's length.
@@ -1351,24 +1265,15 @@ class Member3D():
         combo_name : string
             The name of the load combination to get the results for (not the load combination itself).
         """
-        
+
         # Only calculate results if the member is currently active
         if self.active[combo_name]:
 
             # Segment the member if necessary
-            if self._solved_combo is None or combo_name != self._solved_combo.name:
-                self._segment_member(combo_name)
-                self._solved_combo = self.model.load_combos[combo_name]
-                
-            # Check which segment 'x' falls on
-            for segment in self.SegmentsZ:
-                if round(x, 10) >= round(segment.x1, 10) and round(x, 10) < round(segment.x2, 10):
-                    return segment.axial(x - segment.x1)
-                    
-                if isclose(x, self.L()):  
-                    lastIndex = len(self.SegmentsZ) - 1
-                    return self.SegmentsZ[lastIndex].axial(x - self.SegmentsZ[lastIndex].x1)
-                
+            self._segments(combo_name)
+
+            return self._point_result(self._tables[0], 'axial', x)
+
         else:
 
             return 0
@@ -1382,29 +1287,21 @@ class Member3D():
         combo_name : string
             The name of the load combination to get the results for (not the load combination itself).
         """
-        
+
         # Only calculate results if the member is currently active
         if self.active[combo_name]:
 
             # Segment the member if necessary
-            if self._solved_combo is None or combo_name != self._solved_combo.name:
-                self._segment_member(combo_name)
-                self._solved_combo = self.model.load_combos[combo_name]
-            
-            Pmax = self.SegmentsZ[0].axial(0)   
-            
-            for segment in self.SegmentsZ:
+            self._segments(combo_name)
+
+            Pmax = self._tables[0].extremes('axial')[1]
 
-                if segment.max_axial() > Pmax:
-                        
-                    Pmax = segment.max_axial()
-            
             return Pmax
-        
+
         else:
 
             return 0
-    
+
     def min_axial(self, combo_name='Combo 1'):
         """
         Returns the minimum axial force in the member.
@@ -1414,29 +1311,21 @@ class Member3D():
         combo_name : string
             The name of the load combination to get the results for (not the load combination itself).
         """
-        
+
         # Only calculate results if the member is currently active
         if self.active[combo_name]:
 
             # Segment the member if necessary
-            if self._solved_combo is None or combo_name != self._solved_combo.name:
-                self._segment_member(combo_name)
-                self._solved_combo = self.model.load_combos[combo_name]
-            
-            Pmin = self.SegmentsZ[0].axial(0)
-                
-            for segment in self.SegmentsZ:
-                    
-                if segment.min_axial() < Pmin:
-                        
-                    Pmin = segment.min_axial()
-            
+            self._segments(combo_name)
+
+            Pmin = self._tables[0].extremes('axial')[0]
+
             return Pmin
-        
+
         else:
 
             return 0
-    
+
     def plot_axial(self, combo_name='Combo 1', n_points=20):
         """
         Plots the axial force diagram for the member.
@@ -1450,9 +1339,7 @@ class Member3D():
         """
 
         # Segment the member if necessary
-        if self._solved_combo is None or combo_name != self._solved_combo.name:
-            self._segment_member(combo_name)
-            self._solved_combo = self.model.load_combos[combo_name]
+        self._segments(combo_name)
         
         # Import 'pyplot' if not already done
         if Member3D.__plt is None:
@@ -1487,9 +1374,7 @@ class Member3D():
         """
 
         # Segment the member if necessary
-        if self._solved_combo is None or combo_name != self._solved_combo.name:
-            self._segment_member(combo_name)
-            self._solved_combo = self.model.load_combos[combo_name]
+        self._segments(combo_name)
 
         L = self.L()
         if x_array is None:
@@ -1498,9 +1383,8 @@ class Member3D():
             if any(x_array<0) or any(x_array>L):
                 raise ValueError(f"All x values must be in the range 0 to {L}")
             
-        return self._extract_vector_results(self.SegmentsZ, x_array, 'axial')
+        return self._extract_vector_results(self._tables[0], x_array, 'axial')
 
-                        
     def deflection(self, Direction, x, combo_name='Combo 1'):
         """
         Returns the deflection at a point along the member's length.
@@ -1517,61 +1401,23 @@ class Member3D():
         combo_name : string
             The name of the load combination to get the results for (not the load combination itself).
         """
-        
+
         # Only calculate results if the member is currently active
         if self.active[combo_name]:
 
             # Segment the member if necessary
-            if self._solved_combo is None or combo_name != self._solved_combo.name:
-                self._segment_member(combo_name)
-                self._solved_combo = self.model.load_combos[combo_name]
-            
-            if self.model.solution == 'P-Delta' or self.model.solution == 'Pushover':
-                P_delta = True
-            else:
-                P_delta = False
+            self._segments(combo_name)
 
-            # Check which axis is of interest
-            if Direction == 'dx':
-                
-                # Check which segment 'x' falls on
-                for segment in self.SegmentsZ:
-                    
-                    if round(x, 10) >= round(segment.x1, 10) and round(x, 10) < round(segment.x2, 10):
-                        return segment.AxialDeflection(x - segment.x1)
-                    
-                if isclose(x, self.L()):
-                    
-                    lastIndex = len(self.SegmentsZ) - 1
-                    return self.SegmentsZ[lastIndex].AxialDeflection(x - self.SegmentsZ[lastIndex].x1)
+            P_delta = self.model.solution == 'P-Delta' or self.model.solution == 'Pushover'
 
+            # Only deflections in the local y direction include P-little-delta effects
+            if Direction == 'dx':
+                return self._point_result(self._tables[0], 'axial_deflection', x)
             elif Direction == 'dy':
-                
-                # Check which segment 'x' falls on
-                for segment in self.SegmentsZ:
-                    
-                    if round(x,10) >= round(segment.x1,10) and round(x,10) < round(segment.x2,10):
-                        
-                        return segment.deflection(x - segment.x1, P_delta)
-                    
-                if isclose(x, self.L()):
-                    
-                    lastIndex = len(self.SegmentsZ) - 1
-                    return self.SegmentsZ[lastIndex].deflection(x - self.SegmentsZ[lastIndex].x1, P_delta)
-                    
+                return self._point_result(self._tables[0], 'deflection', x, P_delta)
             elif Direction == 'dz':
-                
-                for segment in self.SegmentsY:
-                    
-                    if round(x,10) >= round(segment.x1,10) and round(x,10) < round(segment.x2,10):
-                        
-                        return segment.deflection(x - segment.x1)
-                    
-                if isclose(x, self.L()):
-                    
-                    lastIndex = len(self.SegmentsY) - 1
-                    return self.SegmentsY[lastIndex].deflection(x - self.SegmentsY[lastIndex].x1) 
-        
+                return self._point_result(self._tables[1], 'deflection', x)
+
         else:
 
             return 0
@@ -1587,31 +1433,23 @@ class Member3D():
         combo_name : string
             The name of the load combination to get the results for (not the load combination itself).
         """
-        
+
         # Only calculate results if the member is currently active
         if self.active[combo_name]:
 
             # Segment the member if necessary
-            if self._solved_combo is None or combo_name != self._solved_combo.name:
-                self._segment_member(combo_name)
-                self._solved_combo = self.model.load_combos[combo_name]
-            
-            # Initialize the maximum deflection
-            dmax = self.deflection(Direction, 0, combo_name)
-            
+            self._segments(combo_name)
+
             # Check the deflection at 100 locations along the member and find the largest value
-            for i in range(100):
-                d = self.deflection(Direction, self.L()*i/99, combo_name)
-                if d > dmax:
-                    dmax = d
-            
+            dmax = self._deflections(Direction, self.L()*arange(100)/99).max()
+
             # Return the largest value
             return dmax
-        
+
         else:
 
             return 0
-    
+
     def min_deflection(self, Direction, combo_name='Combo 1'):
         """
         Returns the minimum deflection in the member.
@@ -1623,31 +1461,23 @@ class Member3D():
         combo_name : string
             The name of the load combination to get the results for (not the load combination itself).
         """
-        
+
         # Only calculate results if the member is currently active
         if self.active[combo_name]:
 
             # Segment the member if necessary
-            if self._solved_combo is None or combo_name != self._solved_combo.name:
-                self._segment_member(combo_name)
-                self._solved_combo = self.model.load_combos[combo_name]
-            
-            # Initialize the minimum deflection
-            dmin = self.deflection(Direction, 0, combo_name)
-            
+            self._segments(combo_name)
+
             # Check the deflection at 100 locations along the member and find the smallest value
-            for i in range(100):
-                d = self.deflection(Direction, self.L()*i/99, combo_name)
-                if d < dmin:
-                    dmin = d
-            
+            dmin = self._deflections(Direction, self.L()*arange(100)/99).min()
+
             # Return the smallest value
             return dmin
-        
+
         else:
 
             return 0
-              
+
     def plot_deflection(self, Direction, combo_name='Combo 1', n_points=20):
         """
         Plots the deflection diagram for the member
@@ -1663,9 +1493,7 @@ class Member3D():
         """
         
         # Segment the member if necessary
-        if self._solved_combo is None or combo_name != self._solved_combo.name:
-            self._segment_member(combo_name)
-            self._solved_combo = self.model.load_combos[combo_name]
+        self._segments(combo_name)
                 
         # Import 'pyplot' if not already done
         if Member3D.__plt is None:
@@ -1704,17 +1532,7 @@ class Member3D():
             Values must be provided in local member coordinates (between 0 and L) and be in ascending order.
         """
         # Segment the member if necessary
-        if self._solved_combo is None or combo_name != self._solved_combo.name:
-            self._segment_member(combo_name)
-            self._solved_combo = self.model.load_combos[combo_name]
-
-        # Determine if a P-Delta analysis has been run
-        if self.model.solution == 'P-Delta' or self.model.solution == 'Pushover':
-            # Include P-little-delta effects in the moment results
-            P_delta = True
-        else:
-            # Do not include P-little delta effects in the moment results
-            P_delta = False
+        self._segments(combo_name)
 
         L = self.L()
 
@@ -1723,25 +1541,18 @@ class Member3D():
         else:
             if any(x_array<0) or any(x_array>L):
                 raise ValueError(f"All x values must be in the range 0 to {L}")
-                
-        if P_delta:
-            #P-delta analysis is not vectorised yet, do it element-wise
-            y_arr = array([self.deflection(Direction, x, combo_name) for x in x_array])
-            return array([x_array, y_arr])
 
-        else:
-            # Check which axis is of interest
-            if Direction == 'dz':
-                return self._extract_vector_results(self.SegmentsY, x_array, 'deflection', P_delta)
+        # P-Delta results have always been evaluated like point queries, which place locations on
+        # a segment boundary on the second segment and read zero on inactive members
+        P_delta = self.model.solution == 'P-Delta' or self.model.solution == 'Pushover'
+        if P_delta and not self.active[combo_name]:
+            return vstack((x_array, zeros(len(x_array))))
 
-            elif Direction == 'dy':
-                return self._extract_vector_results(self.SegmentsZ, x_array, 'deflection', P_delta)
-                                
-            elif Direction == 'dx':
-                return self._extract_vector_results(self.SegmentsZ, x_array, 'axial_deflection', P_delta)
-            
-            else:
-                raise ValueError(f"Direction must be 'My' or 'Mz'. {Direction} was given.")
+        deflections = self._deflections(Direction, x_array, point=P_delta)
+        if deflections is None:
+            raise ValueError(f"Direction must be 'dx', 'dy' or 'dz'. {Direction} was given.")
+
+        return vstack((x_array, deflections))
 
     def rel_deflection(self, Direction, x, combo_name='Combo 1'):
         """
@@ -1763,10 +1574,8 @@ class Member3D():
         if self.active[combo_name]:
 
             # Segment the member if necessary
-            if self._solved_combo is None or combo_name != self._solved_combo.name:
-                self._segment_member(combo_name)
-                self._solved_combo = self.model.load_combos[combo_name]
-            
+            self._segments(combo_name)
+
             d = self.d(combo_name)
             dyi = d[1,0]
             dyj = d[7,0]
@@ -1776,32 +1585,15 @@ class Member3D():
         
             # Check which axis is of interest
             if Direction == 'dy':
-                
-                # Check which segment 'x' falls on
-                for segment in self.SegmentsZ:
-                    
-                    if round(x,10) >= round(segment.x1,10) and round(x,10) < round(segment.x2,10):
-                        
-                        return (segment.deflection(x - segment.x1)) - (dyi + (dyj-dyi)/L*x)
-                    
-                if isclose(x, self.L()):
-                    
-                    lastIndex = len(self.SegmentsZ) - 1
-                    return (self.SegmentsZ[lastIndex].deflection(x - self.SegmentsZ[lastIndex].x1))-dyj
+                deflection = self._point_result(self._tables[0], 'deflection', x)
+                if deflection is not None:
+                    return deflection - (dyi + (dyj-dyi)/L*x)
                     
             elif Direction == 'dz':
-                
-                for segment in self.SegmentsY:
-                    
-                    if round(x,10) >= round(segment.x1,10) and round(x,10) < round(segment.x2,10):
-                        
-                        return (segment.deflection(x - segment.x1)) - (dzi + (dzj-dzi)/L*x)
-                    
-                if isclose(x, self.L()):
-                    
-                    lastIndex = len(self.SegmentsY) - 1
-                    return (self.SegmentsY[lastIndex].deflection(x - self.SegmentsY[lastIndex].x1)) - dzj
-        
+                deflection = self._point_result(self._tables[1], 'deflection', x)
+                if deflection is not None:
+                    return deflection - (dzi + (dzj-dzi)/L*x)
+
         else:
 
             return 0
@@ -1819,9 +1611,7 @@ class Member3D():
         """
         
         # Segment the member if necessary
-        if self._solved_combo is None or combo_name != self._solved_combo.name:
-            self._segment_member(combo_name)
-            self._solved_combo = self.model.load_combos[combo_name]
+        self._segments(combo_name)
                 
         # Import 'pyplot' if not already done
         if Member3D.__plt is None:
@@ -1859,9 +1649,7 @@ class Member3D():
             Values must be provided in local member coordinates (between 0 and L) and be in ascending order.
         """
         # Segment the member if necessary
-        if self._solved_combo is None or combo_name != self._solved_combo.name:
-            self._segment_member(combo_name)
-            self._solved_combo = self.model.load_combos[combo_name]
+        self._segments(combo_name)
 
         d = self.d(combo_name)
         dyi = d[1,0]
@@ -1878,13 +1666,81 @@ class Member3D():
 
         # Check which axis is of interest
         if Direction == 'dy':
-            deflections = self._extract_vector_results(self.SegmentsZ, x_array, 'deflection')[1]
+            deflections = self._extract_vector_results(self._tables[0], x_array, 'deflection')[1]
             return vstack((x_array, deflections - (dyi + (dyj-dyi)/L*x_array)))
         
         elif Direction == 'dz':
-            deflections = self._extract_vector_results(self.SegmentsY, x_array, 'deflection')[1]
+            deflections = self._extract_vector_results(self._tables[1], x_array, 'deflection')[1]
             return vstack((x_array, deflections - (dzi + (dzj-dzi)/L*x_array)))        
         
+    def _segments(self, combo_name='Combo 1'):
+        """
+        Makes `SegmentsZ`, `SegmentsY` and `SegmentsX` (and their tables in `_tables`) the segments
+        for a load combination. Cached
+        segments are reused unless the member's loads, releases, active state or displacements have
+        changed since they were built.
+        """
+
+        key = self._segment_key(combo_name)
+        cache = self._segment_cache
+        entry = cache.get(combo_name)
+
+        if entry is not None and entry[0] == key:
+            cache.move_to_end(combo_name)
+        else:
+
+            # `_segment_member` fills the segment lists in place, so give it new lists to keep the
+            # cached ones intact
+            if entry is not None:
+                self._segment_cache_bytes -= cache.pop(combo_name)[4]
+            self.SegmentsZ, self.SegmentsY, self.SegmentsX = [], [], []
+            self._segment_member(combo_name)
+
+            # Pack the segments into tables so results can be evaluated in one pass
+            tables = (SegmentTable(self.SegmentsZ, 'Z'), SegmentTable(self.SegmentsY, 'Y'),
+                      SegmentTable(self.SegmentsX, 'Z'))
+
+            # Estimate the memory used by the segments from the first one
+            segment = self.SegmentsZ[0]
+            size = 3*len(self.SegmentsZ)*(getsizeof(segment) + getsizeof(segment.__dict__))
+            size += sum(table.nbytes for table in tables)
+
+            entry = (key, self.SegmentsZ, self.SegmentsY, self.SegmentsX, size, tables)
+            cache[combo_name] = entry
+            self._segment_cache_bytes += size
+
+            # Drop the least recently used segments until the cache is within its limits. The
+            # newest entry is always kept.
+            while len(cache) > 1 and (len(cache) > self.segment_cache_size
+                                      or self._segment_cache_bytes > self.segment_cache_memory):
+                self._segment_cache_bytes -= cache.popitem(last=False)[1][4]
+
+        self.SegmentsZ, self.SegmentsY, self.SegmentsX = entry[1:4]
+        self._tables = entry[5]
+
+    def _segment_key(self, combo_name):
+        """
+        Returns what the member's segments for a load combination are built from.
+        """
+
+        results = self.model._results
+        return (results.stamp(combo_name) if results is not None else None,
+                self.active.get(combo_name),
+                tuple(self.model.load_combos[combo_name].factors.items()),
+                tuple(self.PtLoads), tuple(self.DistLoads), tuple(self.Releases))
+
+    def _clear_segments(self, combo_name=None):
+        """
+        Drops cached segments for a load combination, or for every load combination if
+        `combo_name` is `None`.
+        """
+
+        if combo_name is None:
+            self._segment_cache.clear()
+            self._segment_cache_bytes = 0
+        elif combo_name in self._segment_cache:
+            self._segment_cache_bytes -= self._segment_cache.pop(combo_name)[4]
+
     def _segment_member(self, combo_name='Combo 1'):
         """
         Divides the element up into mathematically continuous segments along each axis
@@ -2164,44 +2020,25 @@ class Member3D():
                                 SegmentsY[i].V1 += (f1[2] + f2[2])/2*(x2 - x1)
                                 SegmentsY[i].M1 += (x1 - x2)*(2*f1[2]*x1 - 3*f1[2]*x + f1[2]*x2 + f2[2]*x1 - 3*f2[2]*x + 2*f2[2]*x2)/6
                             
-    def _extract_vector_results(self, segments, x_array, result_name, P_delta=False):
-        """Extract results from the given segments using vectorised numpy functions"""
+    def _extract_vector_results(self, table, x_array, result_name, P_delta=False, point=False):
+        """Extract results from a segment table for an array of locations in one vectorised pass"""
 
-        # Initialize variables
-        segment_results = []
-        last_index = 0
-        
-        # Step through each segment in the member
-        for i, segment in enumerate(segments):
+        return vstack((x_array, table.evaluate(result_name, x_array, point=point, P_delta=P_delta)))
 
-            # Determine if the current index `i` is at the end of the member
-            if i == len(segments) - 1:
-                index2 = len(x_array)
-            else:
-                try:
-                    index2 = where(x_array > segment.x2)[0][0]
-                except IndexError:
-                    index2 = len(x_array)
-            
-            if last_index == index2: continue
+    def _point_result(self, table, result_name, x, P_delta=False):
+        """Returns a result at a single location, or `None` if the location is not on the member"""
 
-            thisseg_x_array = x_array[last_index:index2]
-            
-            if result_name == "moment":
-                thisseg_y_array = segment.moment(thisseg_x_array - segment.x1, P_delta)
-            elif result_name == "shear":
-                thisseg_y_array = segment.Shear(thisseg_x_array - segment.x1)
-            elif result_name == "axial":
-                thisseg_y_array = segment.axial(thisseg_x_array - segment.x1)
-            elif result_name == "torque":
-                thisseg_y_array = segment.Torsion(thisseg_x_array - segment.x1)
-            elif result_name == "deflection":
-                thisseg_y_array = segment.deflection(thisseg_x_array - segment.x1, P_delta)
-            elif result_name == "axial_deflection":
-                thisseg_y_array = segment.AxialDeflection(thisseg_x_array - segment.x1)
-
-            segment_results.append(thisseg_y_array)
-
-            last_index = index2
-
-        return vstack((x_array, hstack(segment_results)))
\ No newline at end of file
+        return table.value(result_name, x, P_delta)
+
+    def _deflections(self, Direction, x_array, point=True):
+        """Returns the deflections in a direction at an array of locations, or `None` if the direction
+        is not recognized. Only deflections in the local y direction include P-little-delta effects."""
+
+        P_delta = self.model.solution == 'P-Delta' or self.model.solution == 'Pushover'
+
+        if Direction == 'dx':
+            return self._tables[0].evaluate('axial_deflection', x_array, point)
+        elif Direction == 'dy':
+            return self._tables[0].evaluate('deflection', x_array, point, P_delta)
+        elif Direction == 'dz':
+            return self._tables[1].evaluate('deflection', x_array, point)
\ No newline at end of file
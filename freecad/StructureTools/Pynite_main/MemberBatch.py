@@ -0,0 +1,330 @@
+"""
+Batched stiffness kernel for frame members.
+
+Computes the local stiffness matrices, static condensation of end releases and transformation
+matrices for a whole set of members at once as stacked `(n_members, 12, 12)` arrays.
+"""
+
+import numpy as np
+
+
+class MemberBatch():
+    """
+    Stacked local stiffness, condensation and transformation matrices for a set of members.
+
+    The batch is built once per analysis from the sub-members created by `PhysMember.descritize()`.
+    Each member is handed views into the stacked arrays, so `Member3D.k()`, `Member3D.kg()`,
+    `Member3D.T()`, `Member3D.K()` and `Member3D.fer()` reuse the batched results rather than recomputing them.
+    """
+
+    def __init__(self, members):
+        """Builds the batched matrices for a list of members.
+
+        :param members: The members to include, in ID order.
+        :type members: list
+        """
+
+        self.members = members
+        n = len(members)
+
+        # Gather the member properties into arrays
+        self.E = np.array([member.material.E for member in members], dtype=float)
+        self.G = np.array([member.material.G for member in members], dtype=float)
+        self.A = np.array([member.section.A for member in members], dtype=float)
+        self.Iy = np.array([member.section.Iy for member in members], dtype=float)
+        self.Iz = np.array([member.section.Iz for member in members], dtype=float)
+        self.J = np.array([member.section.J for member in members], dtype=float)
+        self.rotation = np.array([member.rotation for member in members], dtype=float)
+        XYZi = np.array([[member.i_node.X, member.i_node.Y, member.i_node.Z] for member in members],
+                        dtype=float).reshape(n, 3)
+        XYZj = np.array([[member.j_node.X, member.j_node.Y, member.j_node.Z] for member in members],
+                        dtype=float).reshape(n, 3)
+        self.L = np.sqrt(((XYZj - XYZi)**2).sum(axis=1))
+        self.releases = np.array([member.Releases for member in members], dtype=bool).reshape(n, 12)
+
+        # Transformation matrices
+        self.T = transformation_matrices(XYZi, XYZj, self.rotation)
+
+        # Uncondensed and condensed local stiffness matrices. `fer_op` maps each member's
+        # uncondensed local fixed end reaction vector to its condensed (and expanded) vector.
+        self.k_unc = local_stiffness(self.E, self.G, self.A, self.Iy, self.Iz, self.J, self.L)
+        self.k, self.fer_op = condense(self.k_unc, self.releases)
+
+        # Global stiffness matrices
+        self.T_inv = inverse_transformation_matrices(self.T, self.rotation)
+        self.K = np.einsum('nij,njk,nkl->nil', self.T_inv, self.k, self.T)
+
+        # Hand each member views into the stacked arrays
+        has_releases = self.releases.any(axis=1)
+        for i, member in enumerate(members):
+            member._T = self.T[i]
+            member._T_inv = self.T_inv[i]
+            member._k = self.k[i]
+            member._K = self.K[i]
+            member._fer_op = self.fer_op[i] if has_releases[i] else None
+
+        # The unit geometric stiffness matrices are only needed for P-Delta and pushover analysis,
+        # so they are built on first use
+        self.kg_unit = None
+        self.Kg_unit = None
+
+    def unit_geometric_stiffness(self):
+        """Returns the global geometric stiffness matrices for a unit axial force. The geometric
+        stiffness (including its static condensation) is linear in the axial force `P`, so each
+        member's global geometric stiffness is `P` times its unit matrix. The matrices are computed
+        on the first call and cached.
+
+        :return: The unit global geometric stiffness matrices, shape `(n, 12, 12)`.
+        :rtype: ndarray
+        """
+
+        if self.Kg_unit is None:
+
+            kg_unc = local_geometric_stiffness(self.A, self.Iy + self.Iz, self.L)
+            self.kg_unit = condense(kg_unc, self.releases)[0]
+            self.Kg_unit = np.einsum('nij,njk,nkl->nil', self.T_inv, self.kg_unit, self.T)
+
+            for i, member in enumerate(self.members):
+                member._kg_unit = self.kg_unit[i]
+
+        return self.Kg_unit
+
+    def axial_forces(self, D, dofs, active=None):
+        """Returns the axial force in each member due to axial strain (tension = +).
+
+        :param D: The global displacement vector.
+        :type D: ndarray
+        :param dofs: The global DOF indices of each member, shape `(n, 12)`.
+        :type dofs: ndarray
+        :param active: Flags for the members that are active. The axial displacements of inactive
+                       members are ignored, as they are by `Member3D.D()`. Defaults to None, which
+                       treats every member as active.
+        :type active: ndarray, optional
+        :return: The member axial forces, shape `(n,)`.
+        :rtype: ndarray
+        """
+
+        D = np.asarray(D, dtype=float).reshape(-1)[dofs]
+        if active is not None:
+            D[~active, 0] = D[~active, 6] = 0.0
+
+        # Only local DOFs 0 and 6 contribute to the axial strain
+        strain = np.einsum('nj,nj->n', self.T[:, 6, :] - self.T[:, 0, :], D)
+
+        return self.E*self.A/self.L*strain
+
+
+def _isclose(a, b):
+    """Elementwise equivalent of `math.isclose` with its default tolerances.
+    """
+    return np.abs(a - b) <= 1e-9*np.maximum(np.abs(a), np.abs(b))
+
+
+def _unit(v):
+    """Normalizes each row of an `(n, 3)` array.
+    """
+    return v/np.sqrt((v**2).sum(axis=1))[:, None]
+
+
+def transformation_matrices(XYZi, XYZj, rotation):
+    """Returns the transformation matrices for a set of members. Uses the same local axis
+    conventions as `Member3D.T()`.
+
+    :param XYZi: The i-node coordinates, shape `(n, 3)`.
+    :type XYZi: ndarray
+    :param XYZj: The j-node coordinates, shape `(n, 3)`.
+    :type XYZj: ndarray
+    :param rotation: The member rotations about their local x-axes (degrees), shape `(n,)`.
+    :type rotation: ndarray
+    :return: The transformation matrices, shape `(n, 12, 12)`.
+    :rtype: ndarray
+    """
+
+    n = XYZi.shape[0]
+    delta = XYZj - XYZi
+    L = np.sqrt((delta**2).sum(axis=1))
+    x = delta/L[:, None]
+    upward = XYZj[:, 1] > XYZi[:, 1]
+
+    vertical = _isclose(XYZi[:, 0], XYZj[:, 0]) & _isclose(XYZi[:, 2], XYZj[:, 2])
+    horizontal = ~vertical & _isclose(XYZi[:, 1], XYZj[:, 1])
+    other = ~vertical & ~horizontal
+
+    y = np.zeros((n, 3))
+    z = np.zeros((n, 3))
+
+    # Vertical members keep the local y-axis in the XY plane
+    y[vertical, 0] = np.where(upward[vertical], -1.0, 1.0)
+    z[vertical, 2] = 1.0
+
+    # Horizontal members have their local y-axis parallel to the global Y-axis
+    if horizontal.any():
+        y[horizontal, 1] = 1.0
+        z[horizontal] = _unit(np.cross(x[horizontal], y[horizontal]))
+
+    # Inclined members have their local z-axis parallel to the global XZ plane
+    if other.any():
+        proj = delta[other]*np.array([1.0, 0.0, 1.0])
+        xo = x[other]
+        zo = np.where(upward[other][:, None], np.cross(proj, xo), np.cross(xo, proj))
+        z[other] = _unit(zo)
+        y[other] = _unit(np.cross(z[other], xo))
+
+    # Apply any member rotations
+    rotated = rotation != 0.0
+    if rotated.any():
+        theta = np.radians(rotation[rotated])
+        c, s = np.cos(theta), np.sin(theta)
+        R = np.zeros((len(theta), 3, 3))
+        R[:, 0, 0] = 1.0
+        R[:, 1, 1], R[:, 1, 2] = c, -s
+        R[:, 2, 1], R[:, 2, 2] = s, c
+        y[rotated] = np.einsum('nij,nj->ni', R, y[rotated])
+        z[rotated] = np.einsum('nij,nj->ni', R, z[rotated])
+
+    # Build the block diagonal transformation matrices from the direction cosines
+    dirCos = np.stack((x, y, z), axis=1)
+    T = np.zeros((n, 12, 12))
+    for i in range(4):
+        T[:, 3*i:3*i + 3, 3*i:3*i + 3] = dirCos
+
+    return T
+
+
+def inverse_transformation_matrices(T, rotation):
+    """Returns the inverses of a set of transformation matrices.
+
+    Unrotated members have orthogonal direction cosines, so their inverse is the transpose. The
+    rotation applied by `Member3D.T()` does not keep the local y and z axes perpendicular to the
+    local x-axis, so rotated members have their 3x3 direction cosine blocks inverted explicitly.
+
+    :param T: The transformation matrices, shape `(n, 12, 12)`.
+    :type T: ndarray
+    :param rotation: The member rotations about their local x-axes (degrees), shape `(n,)`.
+    :type rotation: ndarray
+    :return: The inverse transformation matrices, shape `(n, 12, 12)`.
+    :rtype: ndarray
+    """
+
+    T_inv = np.transpose(T, (0, 2, 1)).copy()
+
+    rotated = rotation != 0.0
+    if rotated.any():
+        dirCos_inv = np.linalg.inv(T[rotated, 0:3, 0:3])
+        blocks = np.zeros((len(dirCos_inv), 12, 12))
+        for i in range(4):
+            blocks[:, 3*i:3*i + 3, 3*i:3*i + 3] = dirCos_inv
+        T_inv[rotated] = blocks
+
+    return T_inv
+
+
+def local_stiffness(E, G, A, Iy, Iz, J, L):
+    """Returns the uncondensed local stiffness matrices for a set of members. Uses the same terms as
+    `Member3D._k_unc()`.
+
+    :return: The local stiffness matrices, shape `(n, 12, 12)`.
+    :rtype: ndarray
+    """
+
+    k = np.zeros((len(L), 12, 12))
+
+    # Axial and torsion terms
+    for a, b, stiffness in ((0, 6, A*E/L), (3, 9, G*J/L)):
+        k[:, a, a] = k[:, b, b] = stiffness
+        k[:, a, b] = k[:, b, a] = -stiffness
+
+    # Bending about the local z-axis (DOFs 1, 5, 7, 11) and the local y-axis (DOFs 2, 4, 8, 10).
+    # The y-axis terms have the opposite sign on the coupling between shear and rotation.
+    for (v1, r1, v2, r2), inertia, sign in (((1, 5, 7, 11), Iz, 1.0), ((2, 4, 8, 10), Iy, -1.0)):
+        k[:, v1, v1] = k[:, v2, v2] = 12*E*inertia/L**3
+        k[:, v1, v2] = k[:, v2, v1] = -12*E*inertia/L**3
+        k[:, r1, r1] = k[:, r2, r2] = 4*E*inertia/L
+        k[:, r1, r2] = k[:, r2, r1] = 2*E*inertia/L
+        for v, r in ((v1, r1), (v1, r2), (v2, r1), (v2, r2)):
+            value = sign*6*E*inertia/L**2*(1.0 if v == v1 else -1.0)
+            k[:, v, r] = k[:, r, v] = value
+
+    return k
+
+
+def local_geometric_stiffness(A, Ip, L):
+    """Returns the uncondensed local geometric stiffness matrices for a set of members under a unit
+    axial force. Uses the same terms as `Member3D.kg()`.
+
+    :return: The local geometric stiffness matrices, shape `(n, 12, 12)`.
+    :rtype: ndarray
+    """
+
+    kg = np.zeros((len(L), 12, 12))
+
+    # Torsion terms
+    kg[:, 3, 3] = kg[:, 9, 9] = Ip/A
+    kg[:, 3, 9] = kg[:, 9, 3] = -Ip/A
+
+    # Bending about the local z-axis (DOFs 1, 5, 7, 11) and the local y-axis (DOFs 2, 4, 8, 10).
+    # The y-axis terms have the opposite sign on the coupling between shear and rotation.
+    for (v1, r1, v2, r2), sign in (((1, 5, 7, 11), 1.0), ((2, 4, 8, 10), -1.0)):
+        kg[:, v1, v1] = kg[:, v2, v2] = 6/5
+        kg[:, v1, v2] = kg[:, v2, v1] = -6/5
+        kg[:, r1, r1] = kg[:, r2, r2] = 2*L**2/15
+        kg[:, r1, r2] = kg[:, r2, r1] = -L**2/30
+        for v, r in ((v1, r1), (v1, r2), (v2, r1), (v2, r2)):
+            value = sign*L/10*(1.0 if v == v1 else -1.0)
+            kg[:, v, r] = kg[:, r, v] = value
+
+    return kg/L[:, None, None]
+
+
+def condense(k_unc, releases):
+    """Statically condenses released DOFs out of a set of local stiffness matrices. Members are
+    grouped by release pattern so each distinct pattern is condensed with a single batched solve.
+
+    :param k_unc: The uncondensed local stiffness matrices, shape `(n, 12, 12)`.
+    :type k_unc: ndarray
+    :param releases: The end releases for each member, shape `(n, 12)`.
+    :type releases: ndarray
+    :return: The condensed (and expanded) local stiffness matrices, and the operators that condense
+             uncondensed fixed end reaction vectors, both of shape `(n, 12, 12)`.
+    :rtype: tuple
+    """
+
+    n = k_unc.shape[0]
+    k = k_unc.copy()
+    fer_op = np.broadcast_to(np.eye(12), (n, 12, 12)).copy()
+
+    if n == 0 or not releases.any():
+        return k, fer_op
+
+    patterns, inverse = np.unique(releases, axis=0, return_inverse=True)
+    inverse = np.ravel(inverse)
+    for p, pattern in enumerate(patterns):
+
+        if not pattern.any():
+            continue
+
+        group = np.flatnonzero(inverse == p)
+        R1 = np.flatnonzero(~pattern)
+        R2 = np.flatnonzero(pattern)
+        kg = k_unc[group]
+        k11 = kg[:, R1][:, :, R1]
+        k12 = kg[:, R1][:, :, R2]
+        k21 = kg[:, R2][:, :, R1]
+        k22 = kg[:, R2][:, :, R2]
+
+        # k22^-1 k21 and k22^-1 for every member in the group
+        k22_inv = np.linalg.inv(k22)
+        k12_k22_inv = k12 @ k22_inv
+
+        # Condensed stiffness, expanded with zeros at the released DOFs
+        kc = np.zeros((len(group), 12, 12))
+        kc[np.ix_(np.arange(len(group)), R1, R1)] = k11 - k12_k22_inv @ k21
+        k[group] = kc
+
+        # fer_condensed = fer1 - k12 k22^-1 fer2, expanded with zeros at the released DOFs
+        op = np.zeros((len(group), 12, 12))
+        op[:, R1, R1] = 1.0
+        op[np.ix_(np.arange(len(group)), R1, R2)] = -k12_k22_inv
+        fer_op[group] = op
+
+    return k, fer_op
@@ -0,0 +1,172 @@
+"""
+Batch extraction of member results.
+
+Reading diagrams and extreme values one member method at a time checks each member's segments
+again on every call. `extract()` instead visits each member and load combination once, evaluates
+every requested diagram from the same segment tables, and fills dense arrays indexed by member,
+load combination and location. The values are the same as those returned by the member methods:
+diagrams match `Member3D.shear_array()`, `moment_array()` and so on for the physical member, and
+extreme values match `PhysMember.max_shear()`, `min_moment()` and so on, which take the extremes
+of the sub-members.
+"""
+
+import numpy as np
+
+# How each diagram is read: the segment table (Z, Y or X) and the result evaluated from it
+DIAGRAMS = {'Fx': (0, 'axial'), 'Fy': (0, 'shear'), 'Fz': (1, 'shear'), 'Mx': (2, 'torque'),
+            'My': (1, 'moment'), 'Mz': (0, 'moment'), 'dx': (0, 'axial_deflection'),
+            'dy': (0, 'deflection'), 'dz': (1, 'deflection')}
+
+
+class MemberResults():
+    """
+    Member diagrams and extreme values for a set of members and load combinations.
+
+    Diagrams are stored in `diagrams`, keyed by diagram name, each with shape
+    `(n_members, n_combos, n_points)`. The locations they were evaluated at are in `x`, with shape
+    `(n_members, n_points)`. Extreme values are in `min` and `max`, with shape
+    `(n_members, n_combos)`.
+    """
+
+    def __init__(self, members, combos):
+        """
+        :param members: The physical member names, one for each row.
+        :type members: list
+        :param combos: The load combination names, one for each column.
+        :type combos: list
+        """
+
+        self.members = list(members)
+        self.combos = list(combos)
+        self.member_index = {name: i for i, name in enumerate(self.members)}
+        self.combo_index = {name: i for i, name in enumerate(self.combos)}
+
+        self.x = {}
+        self.diagrams = {}
+        self.min = {}
+        self.max = {}
+
+    def diagram(self, diagram, member_name, combo_name):
+        """Returns one member's diagram for one load combination.
+
+        :param diagram: The diagram name, such as 'Mz' or 'dy'.
+        :type diagram: str
+        :param member_name: The physical member name.
+        :type member_name: str
+        :param combo_name: The load combination name.
+        :type combo_name: str
+        :return: The locations and the values, stacked like the member `*_array` methods.
+        :rtype: array
+        """
+
+        i, j = self.member_index[member_name], self.combo_index[combo_name]
+        return np.vstack((self.x[diagram][i], self.diagrams[diagram][i, j]))
+
+
+def extract(model, member_names, combo_names, diagrams, n_points, extremes=True):
+    """Evaluates member diagrams and extreme values for every member and load combination given.
+
+    :param model: The solved model.
+    :type model: FEModel3D
+    :param member_names: The physical member names.
+    :type member_names: list
+    :param combo_names: The load combination names.
+    :type combo_names: list
+    :param diagrams: The diagrams to evaluate. Any of 'Fx' (axial force), 'Fy', 'Fz' (shear), 'Mx'
+                     (torque), 'My', 'Mz' (moment), 'dx', 'dy' and 'dz' (deflection).
+    :type diagrams: tuple
+    :param n_points: The number of locations along each member, either one number for every
+                     diagram or a dictionary keyed by diagram name.
+    :type n_points: int or dict
+    :param extremes: Also finds the minimum and maximum of each diagram if `True`.
+    :type extremes: bool, optional
+    :raises ValueError: Occurs when a diagram name is not recognized, or when `n_points` is a
+                        dictionary without a count for one of the diagrams.
+    :rtype: MemberResults
+    """
+
+    for diagram in diagrams:
+        if diagram not in DIAGRAMS:
+            raise ValueError(f"Unknown diagram '{diagram}'. Use one of {', '.join(DIAGRAMS)}.")
+
+    if not isinstance(n_points, dict):
+        n_points = {diagram: n_points for diagram in diagrams}
+    for diagram in diagrams:
+        if diagram not in n_points:
+            raise ValueError(f"No number of points given for diagram '{diagram}'.")
+
+    results = MemberResults(member_names, combo_names)
+    n_members, n_combos = len(results.members), len(results.combos)
+
+    # Moments and deflections include P-little-delta effects after a P-Delta analysis
+    P_delta = model.solution == 'P-Delta' or model.solution == 'Pushover'
+
+    members = [model.members[name] for name in results.members]
+    for diagram in diagrams:
+        results.x[diagram] = np.array([np.linspace(0, member.L(), n_points[diagram]) for member in members]).reshape(n_members, n_points[diagram])
+        results.diagrams[diagram] = np.zeros((n_members, n_combos, n_points[diagram]))
+        if extremes:
+            results.min[diagram] = np.zeros((n_members, n_combos))
+            results.max[diagram] = np.zeros((n_members, n_combos))
+
+    for i, member in enumerate(members):
+        for j, combo_name in enumerate(results.combos):
+
+            # The diagrams are read from the physical member's own segments
+            member._segments(combo_name)
+            active = member.active[combo_name]
+            for diagram in diagrams:
+                table, result_name = DIAGRAMS[diagram]
+
+                # P-Delta results are evaluated like point queries, which read zero on inactive
+                # members and place locations on a segment boundary on the second segment
+                if P_delta and not active and result_name in ('moment', 'deflection', 'axial_deflection'):
+                    continue
+
+                x = results.x[diagram][i]
+                if diagram[0] == 'd':
+                    values = member._deflections(diagram, x, point=P_delta)
+                elif result_name == 'moment':
+                    values = member._tables[table].evaluate(result_name, x, point=P_delta, P_delta=P_delta)
+                else:
+                    values = member._tables[table].evaluate(result_name, x, point=False)
+                results.diagrams[diagram][i, j] = values
+
+            if extremes:
+                _sub_member_extremes(results, i, j, member, combo_name, diagrams, P_delta)
+
+    return results
+
+
+def _sub_member_extremes(results, i, j, member, combo_name, diagrams, P_delta):
+    """Stores the extreme values of each diagram for one physical member and load combination,
+    taken across its sub-members.
+    """
+
+    minima = {diagram: [] for diagram in diagrams}
+    maxima = {diagram: [] for diagram in diagrams}
+
+    for sub_member in member.sub_members.values():
+
+        # Inactive sub-members read zero
+        if not sub_member.active[combo_name]:
+            for diagram in diagrams:
+                minima[diagram].append(0)
+                maxima[diagram].append(0)
+            continue
+
+        sub_member._segments(combo_name)
+        for diagram in diagrams:
+            table, result_name = DIAGRAMS[diagram]
+            if diagram[0] == 'd':
+                # Deflections are checked at 100 locations along the sub-member
+                d = sub_member._deflections(diagram, sub_member.L()*np.arange(100)/99)
+                d_min, d_max = d.min(), d.max()
+            else:
+                d_min, d_max = sub_member._tables[table].extremes(result_name, P_delta and result_name == 'moment')
+            minima[diagram].append(d_min)
+            maxima[diagram].append(d_max)
+
+    for diagram in diagrams:
+        results.min[diagram][i, j] = min(minima[diagram])
+        results.max[diagram][i, j] = max(maxima[diagram])
@@ -0,0 +1,185 @@
+"""
+Parallel analysis of load combinations.
+
+The nonlinear iterations for each load combination are independent of each other, so they can be
+solved in separate processes. The prepared model is pickled once and unpickled once in each worker.
+Each worker then solves its share of the load combinations on its own copy of the model and sends
+back only the results for each combination: the displacement vector, the final active states of
+the members and springs, and the reactions.
+"""
+
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
+from .Analysis import _partition_D, _partition_vector, _TC_step, _PDelta_step, _calc_reactions, \
+                      _store_displacements, _set_reactions
+
+# The direction names used for nodal spring supports
+_DIRECTIONS = ('DX', 'DY', 'DZ', 'RX', 'RY', 'RZ')
+
+# The worker's copy of the model, with its partitioned displacement indices
+_model = None
+_partition = None
+_node_springs = None
+
+
+def snapshot(model):
+    """Returns a pickled copy of a prepared model to send to the worker processes. Solver state
+    left over from an earlier analysis can't be pickled and isn't needed, so it is left out.
+
+    :param model: The model, prepared for analysis by `_prepare_model`.
+    :type model: FEModel3D
+    :rtype: bytes
+    """
+
+    solver_state = model._solver, model._low_rank, model._low_rank_base
+    model._solver = model._low_rank = model._low_rank_base = None
+    try:
+        return pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL)
+    finally:
+        model._solver, model._low_rank, model._low_rank_base = solver_state
+
+
+def _init_worker(model_snapshot):
+    """Unpickles the model snapshot in a worker process.
+    """
+
+    global _model, _partition, _node_springs
+    _model = pickle.loads(model_snapshot)
+    _partition = _partition_D(_model)
+    _node_springs = _spring_states(_model)
+
+
+def _spring_states(model):
+    """Returns the active state of every nodal spring support, in node and direction order.
+    """
+
+    return [getattr(node, 'spring_' + direction)[2] for node in model.nodes.values()
+            for direction in _DIRECTIONS]
+
+
+def _set_spring_states(model, states):
+    """Sets the active state of every nodal spring support from `_spring_states`.
+    """
+
+    states = iter(states)
+    for node in model.nodes.values():
+        for direction in _DIRECTIONS:
+            getattr(node, 'spring_' + direction)[2] = next(states)
+
+
+def _solve_combo(task):
+    """Solves one load combination in a worker process.
+
+    :param task: The solution type ('Linear TC' or 'P-Delta'), the load combination name and the
+                 keyword arguments for the analysis step.
+    :type task: tuple
+    :return: The results to merge back into the parent model.
+    :rtype: dict
+    """
+
+    solution, combo_name, options = task
+    model = _model
+    combo = model.load_combos[combo_name]
+    D1_indices, D2_indices, D2 = _partition
+
+    # Nodal spring support states aren't stored by load combination, so each combination starts
+    # from the states in the snapshot, whichever combinations this worker solved before it
+    _set_spring_states(model, _node_springs)
+
+    FER1, FER2 = _partition_vector(model, model.FER(combo_name))
+    P1, P2 = _partition_vector(model, model.P(combo_name))
+
+    if solution == 'P-Delta':
+        _PDelta_step(model, combo_name, P1, FER1, D1_indices, D2_indices, D2, **options)
+    else:
+        _TC_step(model, combo_name, P1, FER1, D1_indices, D2_indices, D2, **options)
+
+    model.solution = solution
+    R = _calc_reactions(model, combo_list=[combo])
+
+    return {'D': model._D[combo_name],
+            'R': R,
+            'members': {name: member.active[combo_name] for name, member in model.members.items()},
+            'springs': {name: spring.active[combo_name] for name, spring in model.springs.items()},
+            'node_springs': _spring_states(model),
+            'report': model.pdelta_report.get(combo_name),
+            'stats': (os.getpid(), dict(model.solver_stats) if model.solver_stats else None)}
+
+
+def _merge_combo(model, combo, result, D1_indices, D2_indices):
+    """Merges the results for one load combination from a worker back into the model.
+    """
+
+    D1, D2 = _partition_vector(model, result['D'])
+    _store_displacements(model, D1, D2, D1_indices, D2_indices, combo)
+
+    for name, active in result['members'].items():
+        phys_member = model.members[name]
+        phys_member.active[combo.name] = active
+        for sub_member in phys_member.sub_members.values():
+            sub_member.active[combo.name] = active
+    for name, active in result['springs'].items():
+        model.springs[name].active[combo.name] = active
+
+    _set_reactions(model, result['R'], [combo])
+
+    if result['report'] is not None:
+        model.pdelta_report[combo.name] = result['report']
+
+
+def _merge_stats(stats):
+    """Combines the solver statistics reported by each worker process.
+    """
+
+    stats = [worker_stats for worker_stats in stats.values() if worker_stats is not None]
+    if not stats:
+        return None
+
+    merged = dict(stats[0])
+    for key in ('factorizations', 'factor_time', 'solves', 'solve_time'):
+        merged[key] = sum(worker_stats[key] for worker_stats in stats)
+    merged['memory'] = max(worker_stats['memory'] for worker_stats in stats)
+    merged['workers'] = len(stats)
+
+    return merged
+
+
+def solve_combos(model, solution, combo_list, workers, D1_indices, D2_indices, **options):
+    """Solves load combinations in parallel and merges the results back into the model. Reactions
+    are calculated by the workers, so the model doesn't need `_calc_reactions` afterwards.
+
+    :param model: The model, prepared for analysis by `_prepare_model`.
+    :type model: FEModel3D
+    :param solution: 'Linear TC' to solve with `_TC_step` or 'P-Delta' to solve with
+                     `_PDelta_step`.
+    :type solution: str
+    :param combo_list: The load combinations to solve.
+    :type combo_list: list
+    :param workers: The number of worker processes.
+    :type workers: int
+    :param options: Keyword arguments passed to the analysis step for each load combination.
+    """
+
+    combo_list = list(combo_list)
+    tasks = [(solution, combo.name, options) for combo in combo_list]
+    workers = min(workers, len(tasks))
+
+    stats = {}
+    node_springs = None
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(snapshot(model),)) as pool:
+        for combo, result in zip(combo_list, pool.map(_solve_combo, tasks)):
+            _merge_combo(model, combo, result, D1_indices, D2_indices)
+            pid, worker_stats = result['stats']
+            stats[pid] = worker_stats
+            node_springs = result['node_springs']
+
+    # Leave the nodal spring supports as a sequential analysis would, in their final state for the
+    # last load combination
+    if node_springs is not None:
+        _set_spring_states(model, node_springs)
+
+    model.solver_stats = _merge_stats(stats)
+    model.solution = solution
@@ -0,0 +1,101 @@
+"""
+Node reordering to reduce the bandwidth and fill-in of the global stiffness matrix.
+
+Nodes are numbered in the order they were added to the model by default, which for generated
+models is often arbitrary. The orderings here work on the node adjacency graph, so each node's 6
+degrees of freedom stay together and the permutation applies to every global matrix and vector.
+"""
+
+from heapq import heapify, heappop, heappush
+
+import numpy as np
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import reverse_cuthill_mckee
+
+# The supported reordering methods
+METHODS = ('rcm', 'min_degree')
+
+
+def node_graph(tables, n_nodes):
+    """Returns the node adjacency graph of a model. Two nodes are adjacent if any element connects
+    them.
+
+    :param tables: The DOF index tables built by `dof_tables`.
+    :type tables: dict
+    :param n_nodes: The number of nodes in the model.
+    :type n_nodes: int
+    :return: The symmetric adjacency matrix, with a nonzero diagonal.
+    :rtype: csr_matrix
+    """
+
+    rows, cols = [np.arange(n_nodes)], [np.arange(n_nodes)]
+    for group in ('springs', 'members', 'quads', 'plates'):
+        nodes = tables[group].dofs[:, ::6]//6
+        n = nodes.shape[1]
+        rows.append(np.broadcast_to(nodes[:, :, None], (nodes.shape[0], n, n)).ravel())
+        cols.append(np.broadcast_to(nodes[:, None, :], (nodes.shape[0], n, n)).ravel())
+
+    rows, cols = np.concatenate(rows), np.concatenate(cols)
+    graph = coo_matrix((np.ones(len(rows)), (rows, cols)), shape=(n_nodes, n_nodes)).tocsr()
+    graph.data[:] = 1.0
+
+    return graph
+
+
+def minimum_degree(graph):
+    """Returns a minimum degree ordering of a graph. Nodes are eliminated one at a time, always
+    choosing the node with the fewest remaining neighbours, and the neighbours of each eliminated
+    node are connected to each other to account for the fill-in its elimination creates.
+
+    :param graph: The symmetric adjacency matrix.
+    :type graph: csr_matrix
+    :return: The node indices in elimination order.
+    :rtype: ndarray
+    """
+
+    n = graph.shape[0]
+    adjacent = [set(graph.indices[graph.indptr[i]:graph.indptr[i + 1]]) - {i} for i in range(n)]
+
+    heap = [(len(neighbours), i) for i, neighbours in enumerate(adjacent)]
+    heapify(heap)
+    eliminated = np.zeros(n, dtype=bool)
+    order = []
+
+    while heap:
+
+        degree, i = heappop(heap)
+
+        # Skip stale heap entries left behind when a node's degree changed
+        if eliminated[i] or degree != len(adjacent[i]):
+            continue
+
+        eliminated[i] = True
+        order.append(i)
+
+        neighbours = adjacent[i]
+        for j in neighbours:
+            adjacent[j].discard(i)
+            adjacent[j] |= neighbours - {j}
+            heappush(heap, (len(adjacent[j]), j))
+
+    return np.array(order, dtype=np.int64)
+
+
+def node_ordering(graph, method):
+    """Returns a node ordering for a node adjacency graph.
+
+    :param graph: The symmetric adjacency matrix built by `node_graph`.
+    :type graph: csr_matrix
+    :param method: 'rcm' for reverse Cuthill-McKee or 'min_degree' for minimum degree.
+    :type method: str
+    :raises ValueError: Occurs when the method is not recognized.
+    :return: The current node IDs in their new order. The node at position `k` is renumbered `k`.
+    :rtype: ndarray
+    """
+
+    if method == 'rcm':
+        return np.asarray(reverse_cuthill_mckee(graph, symmetric_mode=True), dtype=np.int64)
+    elif method == 'min_degree':
+        return minimum_degree(graph)
+    else:
+        raise ValueError(f"Unknown reordering method '{method}'. Use one of {METHODS} or None.")
@@ -0,0 +1,275 @@
+"""
+Columnar storage for nodal analysis results.
+
+Displacements are stored in a single `(n_dofs, n_combos)` matrix and reactions in a single
+`(n_reaction_dofs, n_combos)` matrix, where the reaction rows are only the supported and spring
+supported degrees of freedom. Load combination names map to columns through a dictionary, so
+looking up a combination is O(1) however many combinations have been solved.
+
+The result dictionaries that used to be kept on each node (`DX`, `DY`, ..., `RxnMZ`) are replaced
+with lightweight views into the store. They support the same `node.DX[combo_name]` style access,
+including assignment, but hold no data of their own.
+"""
+
+from collections.abc import Mapping
+from itertools import count
+
+import numpy as np
+
+# The result views kept on each node, with the local DOF each one reads
+DISPLACEMENTS = ('DX', 'DY', 'DZ', 'RX', 'RY', 'RZ')
+REACTIONS = ('RxnFX', 'RxnFY', 'RxnFZ', 'RxnMX', 'RxnMY', 'RxnMZ')
+
+# Stamps recording when a displacement vector was written. They are unique across every store, so
+# a stamp taken from one analysis never matches a result from another.
+_stamps = count(1)
+
+
+class ResultStore():
+    """
+    Nodal displacements and reactions for every solved load combination.
+    """
+
+    def __init__(self, n_dofs, reaction_dofs, capacity=0):
+        """
+        :param n_dofs: The number of global degrees of freedom.
+        :type n_dofs: int
+        :param reaction_dofs: The global degrees of freedom that can carry a reaction.
+        :type reaction_dofs: array
+        :param capacity: The number of load combinations to allocate space for. The store grows
+                         as needed if more are added. Defaults to 0.
+        :type capacity: int, optional
+        """
+
+        self.n_dofs = n_dofs
+        self.reaction_dofs = np.asarray(reaction_dofs, dtype=np.int64)
+
+        # The reaction row for each global DOF, or -1 if it can't carry a reaction
+        self.reaction_rows = np.full(n_dofs, -1, dtype=np.int64)
+        self.reaction_rows[self.reaction_dofs] = np.arange(len(self.reaction_dofs))
+
+        self.columns = {}  # The column for each load combination name
+        self.D = np.zeros((n_dofs, capacity))
+        self.R = np.zeros((len(self.reaction_dofs), capacity))
+        self.has_reactions = np.zeros(capacity, dtype=bool)
+        self.stamps = np.zeros(capacity, dtype=np.int64)  # When each displacement vector was written
+
+    def __getstate__(self):
+        # Only pickle the columns in use
+        state = self.__dict__.copy()
+        n = len(self.columns)
+        state['D'], state['R'] = self.D[:, :n].copy(), self.R[:, :n].copy()
+        state['has_reactions'] = self.has_reactions[:n].copy()
+        state['stamps'] = self.stamps[:n].copy()
+        return state
+
+    def _column(self, combo_name):
+        """Returns the column for a load combination, adding one if it doesn't have one yet.
+        """
+
+        column = self.columns.get(combo_name)
+        if column is not None:
+            return column
+
+        column = len(self.columns)
+        if column >= self.D.shape[1]:
+            capacity = max(2*self.D.shape[1], 4)
+            D, R = np.zeros((self.n_dofs, capacity)), np.zeros((len(self.reaction_dofs), capacity))
+            D[:, :column], R[:, :column] = self.D[:, :column], self.R[:, :column]
+            has_reactions = np.zeros(capacity, dtype=bool)
+            has_reactions[:column] = self.has_reactions[:column]
+            stamps = np.zeros(capacity, dtype=np.int64)
+            stamps[:column] = self.stamps[:column]
+            self.D, self.R, self.has_reactions, self.stamps = D, R, has_reactions, stamps
+
+        self.columns[combo_name] = column
+        return column
+
+    def clear(self):
+        """Drops the results for every load combination. The allocated space is kept for reuse.
+        """
+        self.columns.clear()
+        self.has_reactions[:] = False
+
+    def set_displacements(self, combo_names, D):
+        """Stores global displacement vectors.
+
+        :param combo_names: The load combination names, one for each column of `D`.
+        :type combo_names: list
+        :param D: The global displacement vectors, shape `(n_dofs, len(combo_names))`.
+        :type D: array
+        """
+
+        columns = [self._column(combo_name) for combo_name in combo_names]
+        self.D[:, columns] = np.asarray(D, dtype=float).reshape(self.n_dofs, len(columns))
+        self.stamps[columns] = next(_stamps)
+
+    def stamp(self, combo_name):
+        """Returns a number that changes whenever the displacement vector for a load combination is
+        written, or `None` if the load combination hasn't been solved. Used to tell when results
+        derived from the displacements are out of date.
+        """
+        column = self.columns.get(combo_name)
+        return None if column is None else int(self.stamps[column])
+
+    def displacements(self, combo_name):
+        """Returns the global displacement vector for a load combination as an `(n_dofs, 1)` view
+        into the store. The view is only valid until the store next grows.
+
+        :raises KeyError: Occurs when the load combination hasn't been solved.
+        """
+        column = self.columns[combo_name]
+        return self.D[:, column:column + 1]
+
+    def set_reactions(self, combo_names, R):
+        """Stores global reaction vectors. Only the terms at the reaction DOFs are kept.
+
+        :param combo_names: The load combination names, one for each column of `R`.
+        :type combo_names: list
+        :param R: The global reaction vectors, shape `(n_dofs, len(combo_names))`.
+        :type R: array
+        """
+
+        columns = [self._column(combo_name) for combo_name in combo_names]
+        R = np.asarray(R, dtype=float).reshape(self.n_dofs, len(columns))
+        self.R[:, columns] = R[self.reaction_dofs, :]
+        self.has_reactions[columns] = True
+
+    def reactions(self, combo_name):
+        """Returns the global reaction vector for a load combination, shape `(n_dofs, 1)`.
+
+        :raises KeyError: Occurs when no reactions have been stored for the load combination.
+        """
+
+        column = self.columns[combo_name]
+        if not self.has_reactions[column]:
+            raise KeyError(combo_name)
+
+        R = np.zeros((self.n_dofs, 1))
+        R[self.reaction_dofs, 0] = self.R[:, column]
+        return R
+
+
+class DisplacementVectors(Mapping):
+    """
+    A dictionary style view of the displacement vectors in a `ResultStore`, keyed by load
+    combination name. Used for `FEModel3D._D`.
+    """
+
+    def __init__(self, store):
+        self.store = store
+
+    def __getitem__(self, combo_name):
+        return self.store.displacements(combo_name)
+
+    def __setitem__(self, combo_name, D):
+        self.store.set_displacements([combo_name], D)
+
+    def __iter__(self):
+        return iter(self.store.columns)
+
+    def __len__(self):
+        return len(self.store.columns)
+
+
+class NodeResults(Mapping):
+    """
+    A dictionary style view of one nodal displacement or reaction for every load combination,
+    keyed by load combination name. Reactions read as zero at degrees of freedom that can't carry
+    one.
+    """
+
+    __slots__ = ('store', 'node', 'dof', 'reaction')
+
+    def __init__(self, store, node, dof, reaction=False):
+        """
+        :param store: The store holding the results.
+        :type store: ResultStore
+        :param node: The node the results belong to.
+        :type node: Node3D
+        :param dof: The local degree of freedom (0 to 5).
+        :type dof: int
+        :param reaction: Reads reactions if `True`, or displacements if `False`. Defaults to False.
+        :type reaction: bool, optional
+        """
+
+        self.store = store
+        self.node = node
+        self.dof = dof
+        self.reaction = reaction
+
+    def __getitem__(self, combo_name):
+
+        store = self.store
+        column = store.columns[combo_name]
+        i = self.node.ID*6 + self.dof
+
+        if not self.reaction:
+            return store.D[i, column]
+
+        if not store.has_reactions[column]:
+            raise KeyError(combo_name)
+        row = store.reaction_rows[i]
+        return store.R[row, column] if row >= 0 else np.float64(0.0)
+
+    def __setitem__(self, combo_name, value):
+
+        store = self.store
+        column = store._column(combo_name)
+        i = self.node.ID*6 + self.dof
+
+        if not self.reaction:
+            store.D[i, column] = value
+            store.stamps[column] = next(_stamps)
+            return
+
+        row = store.reaction_rows[i]
+        if row >= 0:
+            store.R[row, column] = value
+        elif value != 0:
+            raise ValueError(f'Node {self.node.name} can\'t carry a reaction in that direction.')
+        store.has_reactions[column] = True
+
+    def __iter__(self):
+        if self.reaction:
+            return (name for name, column in self.store.columns.items()
+                    if self.store.has_reactions[column])
+        return iter(self.store.columns)
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+def attach(model, capacity=None):
+    """Creates a new result store for a model and replaces each node's result dictionaries with
+    views into it. Called once the nodes have been numbered.
+
+    :param model: The model being prepared for analysis.
+    :type model: FEModel3D
+    :param capacity: The number of load combinations to allocate space for. Defaults to None,
+                     which allocates space for every load combination in the model.
+    :type capacity: int, optional
+    :return: The new result store.
+    :rtype: ResultStore
+    """
+
+    n_dofs = len(model.nodes)*6
+    reaction_dofs = []
+    for node in model.nodes.values():
+        for i, direction in enumerate(DISPLACEMENTS):
+            if getattr(node, 'support_' + direction) or getattr(node, 'spring_' + direction)[0] is not None:
+                reaction_dofs.append(node.ID*6 + i)
+
+    if capacity is None:
+        capacity = len(model.load_combos)
+    store = ResultStore(n_dofs, np.sort(np.array(reaction_dofs, dtype=np.int64)), capacity)
+
+    for node in model.nodes.values():
+        for i, (displacement, reaction) in enumerate(zip(DISPLACEMENTS, REACTIONS)):
+            setattr(node, displacement, NodeResults(store, node, i))
+            setattr(node, reaction, NodeResults(store, node, i, reaction=True))
+
+    return store
@@ -0,0 +1,310 @@
+"""
+Array-backed tables of beam segments.
+
+A member is divided into mathematically continuous segments along each local axis by
+`Member3D._segment_member()`. A `SegmentTable` packs the parameters of one axis's segments (`x1`,
+`x2` and the closed-form polynomial coefficients `w1`, `w2`, `p1`, `p2`, `V1`, `M1`, `P1`, `T1`,
+`theta1`, `delta1` and `delta_x1`) into a single `(n_segments, 13)` array. Results at any number of
+locations, and the extreme values from the closed-form roots of each segment, are then evaluated
+in one NumPy pass rather than one segment object at a time. The polynomials are the same as in
+`BeamSegZ` and `BeamSegY`, evaluated in nested (Horner) form.
+"""
+
+from bisect import bisect_right
+from math import isclose
+
+import numpy as np
+
+# The columns of the table
+FIELDS = ('x1', 'x2', 'w1', 'w2', 'p1', 'p2', 'V1', 'M1', 'P1', 'T1', 'theta1', 'delta1', 'delta_x1')
+
+
+class SegmentTable():
+    """
+    The segments of a member along one local axis.
+    """
+
+    def __init__(self, segments, axis='Z'):
+        """
+        :param segments: The segments, in order along the member.
+        :type segments: list of BeamSegZ or BeamSegY
+        :param axis: 'Z' for bending about the local z-axis (or torsion), 'Y' for bending about the
+                     local y-axis. Defaults to 'Z'.
+        :type axis: str, optional
+        """
+
+        self.axis = axis
+        self.data = np.array([[np.nan if getattr(segment, field) is None else getattr(segment, field)
+                               for field in FIELDS] for segment in segments], dtype=float).reshape(-1, len(FIELDS))
+        for i, field in enumerate(FIELDS):
+            setattr(self, field, self.data[:, i])
+
+        self.EI = segments[0].EI if segments[0].EI is not None else np.nan
+        self.EA = segments[0].EA if segments[0].EA is not None else np.nan
+
+        # Bending about the local y-axis uses the opposite sign convention for the slope and moment
+        self.sign = 1.0 if axis == 'Z' else -1.0
+
+        self.L = self.x2[-1]
+        self._x2_rounded = np.round(self.x2, 10)
+
+        # Rounded segment ends for locating single points without NumPy overhead
+        self._x1_list = [round(x, 10) for x in self.x1.tolist()]
+        self._x2_list = [round(x, 10) for x in self.x2.tolist()]
+
+        # The extremes are fixed once the table is built, so they're only found once
+        self._extremes = {}
+
+    @property
+    def nbytes(self):
+        """The memory used by the table, in bytes.
+        """
+        return self.data.nbytes + self._x2_rounded.nbytes
+
+    def locate(self, x, point=True):
+        """Returns the segment each location falls on and the location relative to the start of
+        that segment.
+
+        :param x: Locations relative to the start of the member.
+        :type x: ndarray
+        :param point: Follows the point queries (`Member3D.moment()` etc.) if `True`, where a
+                      location on the boundary between two segments belongs to the second one and
+                      a location off the member belongs to no segment (-1). Follows the array
+                      queries (`Member3D.moment_array()` etc.) if `False`, where a boundary
+                      belongs to the first segment and every location is assigned to a segment.
+                      Defaults to True.
+        :type point: bool, optional
+        :return: The segment indices and the relative locations.
+        :rtype: tuple
+        """
+
+        x = np.asarray(x, dtype=float)
+        n = len(self.x1)
+
+        if point:
+            x_rounded = np.round(x, 10)
+            index = np.searchsorted(self._x2_rounded, x_rounded, side='right')
+            on_member = (index < n)
+            on_member[on_member] = x_rounded[on_member] >= np.round(self.x1[index[on_member]], 10)
+            at_end = ~on_member & np.isclose(x, self.L, rtol=1e-09, atol=0.0)
+            index = np.where(on_member, index, np.where(at_end, n - 1, -1))
+        else:
+            index = np.minimum(np.searchsorted(self.x2, x, side='left'), n - 1)
+
+        return index, x - self.x1[index]
+
+    def shear(self, index, x):
+        """Returns the shear force at locations `x` relative to the start of the segments `index`.
+        """
+        V1, w1, w2 = self.V1[index], self.w1[index], self.w2[index]
+        L = self.x2[index] - self.x1[index]
+        return V1 + x*(w1 + x*(w2 - w1)/(2*L))
+
+    def moment(self, index, x, P_delta=False):
+        """Returns the moment at locations `x` relative to the start of the segments `index`,
+        including the P-little-delta moment if `P_delta` is `True`.
+        """
+        V1, M1, w1, w2 = self.V1[index], self.M1[index], self.w1[index], self.w2[index]
+        L = self.x2[index] - self.x1[index]
+        M = self.sign*M1 - x*(V1 + x*(w1/2 + x*(w2 - w1)/(6*L)))
+        if P_delta:
+            M = M + self.P1[index]*(self.deflection(index, x) - self.delta1[index])
+        return M
+
+    def axial(self, index, x):
+        """Returns the axial force at locations `x` relative to the start of the segments `index`.
+        """
+        P1, p1, p2 = self.P1[index], self.p1[index], self.p2[index]
+        L = self.x2[index] - self.x1[index]
+        return P1 + x*(p1 + x*(p2 - p1)/(2*L))
+
+    def torque(self, index, x=None):
+        """Returns the torsional moment on the segments `index`, which is constant along each one.
+        """
+        return self.T1[index]
+
+    def deflection(self, index, x, P_delta=False):
+        """Returns the transverse deflection at locations `x` relative to the start of the segments
+        `index`. P-little-delta effects are included if `P_delta` is `True`, iterating each location
+        until its deflection changes by less than 1%.
+        """
+
+        s = self.sign
+        V1, M1, P1 = self.V1[index], self.M1[index], self.P1[index]
+        w1, w2 = self.w1[index], self.w2[index]
+        theta_1, delta_1 = self.theta1[index], self.delta1[index]
+        L = self.x2[index] - self.x1[index]
+        EI = self.EI
+
+        # The deflection without P-little-delta effects
+        delta_0 = delta_1 + x*(s*theta_1 + x*(-s*M1/(2*EI) + x*(V1/(6*EI) + x*(w1/(24*EI) + x*(w2 - w1)/(120*EI*L)))))
+
+        if not P_delta:
+            return delta_0
+
+        # Iterate every location at once, fixing each one as soon as it converges
+        delta_x = np.array(delta_1, dtype=float)
+        iterating = np.ones(np.shape(delta_x), dtype=bool)
+        while iterating.any():
+            delta_last = delta_x[iterating]
+            delta_new = (delta_0 + x**2*(P1*delta_1 - P1*delta_x)/(2*EI))[iterating]
+            delta_x[iterating] = delta_new
+            with np.errstate(divide='ignore', invalid='ignore'):
+                converged = np.where(delta_last != 0, np.abs(delta_new/delta_last - 1) <= 0.01,
+                                     delta_1[iterating] - delta_new == 0)
+            iterating[iterating] = ~converged
+
+        return delta_x
+
+    def axial_deflection(self, index, x):
+        """Returns the axial deflection at locations `x` relative to the start of the segments
+        `index`.
+        """
+        delta_x1, P1, p1, p2 = self.delta_x1[index], self.P1[index], self.p1[index], self.p2[index]
+        L = self.x2[index] - self.x1[index]
+        return delta_x1 - x*(P1 + x*(p1/2 + x*(p2 - p1)/(6*L)))/self.EA
+
+    def evaluate(self, result_name, x, point=True, P_delta=False):
+        """Returns a result at locations along the member.
+
+        :param result_name: 'shear', 'moment', 'axial', 'torque', 'deflection' or
+                            'axial_deflection'.
+        :type result_name: str
+        :param x: Locations relative to the start of the member.
+        :type x: ndarray
+        :param point: How locations on segment boundaries are assigned. See `locate()`.
+        :type point: bool, optional
+        :param P_delta: Includes P-little-delta effects in moments and deflections if `True`.
+        :type P_delta: bool, optional
+        :return: The results. Locations off the member are `nan`.
+        :rtype: ndarray
+        """
+
+        index, x_local = self.locate(x, point)
+        valid = index >= 0
+        y = np.full(np.shape(x_local), np.nan)
+        index, x_local = index[valid], x_local[valid]
+
+        if result_name == 'shear':
+            y[valid] = self.shear(index, x_local)
+        elif result_name == 'moment':
+            y[valid] = self.moment(index, x_local, P_delta)
+        elif result_name == 'axial':
+            y[valid] = self.axial(index, x_local)
+        elif result_name == 'torque':
+            y[valid] = self.torque(index)
+        elif result_name == 'deflection':
+            y[valid] = self.deflection(index, x_local, P_delta)
+        elif result_name == 'axial_deflection':
+            y[valid] = self.axial_deflection(index, x_local)
+        else:
+            raise ValueError(f"Unknown result '{result_name}'.")
+
+        return y
+
+    def value(self, result_name, x, P_delta=False):
+        """Returns a result at a single location, or `None` if the location is not on the member.
+        Equivalent to `evaluate()` with `point=True`, for one location.
+        """
+
+        x_rounded = round(x, 10)
+        i = bisect_right(self._x2_list, x_rounded)
+        if i == len(self._x2_list) or x_rounded < self._x1_list[i]:
+            if not isclose(x, self.L):
+                return None
+            i = len(self._x2_list) - 1
+        x = x - self.x1[i]
+
+        if result_name == 'shear':
+            return self.shear(i, x)
+        elif result_name == 'moment':
+            return self.moment(i, x, P_delta)
+        elif result_name == 'axial':
+            return self.axial(i, x)
+        elif result_name == 'torque':
+            return self.torque(i)
+        elif result_name == 'deflection':
+            if P_delta:
+                return self.deflection(np.array([i]), np.array([x]), P_delta)[0]
+            return self.deflection(i, x)
+        elif result_name == 'axial_deflection':
+            return self.axial_deflection(i, x)
+        else:
+            raise ValueError(f"Unknown result '{result_name}'.")
+
+    def _in_segment(self, x, L):
+        """Moves candidate locations that fall off their segments to the start of the segment.
+        """
+        x = np.where(np.isfinite(x), x, 0.0)
+        x_rounded = np.round(x, 10)
+        return np.where((x_rounded < 0) | (x_rounded > np.round(L, 10)), 0.0, x)
+
+    def _linear_roots(self, a, b):
+        """Returns the root of `a*x + b` for each segment, or 0 where `a` is zero.
+        """
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(a != 0, -b/np.where(a != 0, a, 1.0), 0.0)
+
+    def extremes(self, result_name, P_delta=False):
+        """Returns the minimum and maximum of a result along the member, found by evaluating each
+        segment at its ends and at the closed-form roots of the result's derivative.
+
+        :param result_name: 'shear', 'moment', 'axial' or 'torque'.
+        :type result_name: str
+        :param P_delta: Includes P-little-delta effects in moments if `True`. As with the segment
+                        objects, only the minimum moment and the moment at the start of the member
+                        include them.
+        :type P_delta: bool, optional
+        :return: The minimum and maximum.
+        :rtype: tuple
+        """
+
+        key = (result_name, P_delta)
+        if key not in self._extremes:
+            self._extremes[key] = self._find_extremes(result_name, P_delta)
+        return self._extremes[key]
+
+    def _find_extremes(self, result_name, P_delta):
+        """Finds the minimum and maximum of a result for `extremes()`.
+        """
+
+        n = len(self.x1)
+        index = np.arange(n)
+        L = self.x2 - self.x1
+        zero = np.zeros(n)
+
+        if result_name == 'torque':
+            return self.T1.min(), self.T1.max()
+
+        elif result_name == 'shear':
+            x_root = self._in_segment(self._linear_roots(self.w1 - self.w2, -self.w1*L), L)
+            values = np.concatenate([self.shear(index, x) for x in (x_root, zero, L)])
+            return values.min(), values.max()
+
+        elif result_name == 'axial':
+            x_root = self._in_segment(self._linear_roots(self.p1 - self.p2, -L*self.p1), L)
+            values = np.concatenate([self.axial(index, x) for x in (x_root, zero, L)])
+            return values.min(), values.max()
+
+        elif result_name == 'moment':
+
+            # The moment is extreme where the shear is zero. The shear is a quadratic in `x`.
+            a = -(self.w2 - self.w1)/(2*L)
+            b = -self.w1
+            c = -self.V1
+            discriminant = b**2 - 4*a*c
+            quadratic = (a != 0) & (discriminant >= 0)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                root = np.sqrt(np.where(quadratic, discriminant, 0.0))
+                a_safe = np.where(quadratic, a, 1.0)
+                x_1 = np.where(quadratic, (-b + root)/(2*a_safe), np.where(a == 0, self._linear_roots(b, c), 0.0))
+                x_2 = np.where(quadratic, (-b - root)/(2*a_safe), 0.0)
+            candidates = [self._in_segment(x_1, L), self._in_segment(x_2, L), zero, L]
+
+            start = self.moment(np.array([0]), np.zeros(1), P_delta)
+            maximum = np.concatenate([start] + [self.moment(index, x) for x in candidates])
+            minimum = np.concatenate([start] + [self.moment(index, x, P_delta) for x in candidates])
+            return minimum.min(), maximum.max()
+
+        else:
+            raise ValueError(f"Unknown result '{result_name}'.")
@@ -0,0 +1,358 @@
+"""
+Linear solver backends for the partitioned stiffness matrix `K11`.
+
+Each backend factors (or preconditions) `K11` once in `factor()` and then solves for any number of
+right-hand sides in `solve()`. Backends record how long factoring and solving took and roughly how
+much memory the factorization uses in `stats`.
+"""
+
+from inspect import signature
+from time import perf_counter
+
+import numpy as np
+from scipy.sparse import csc_matrix, issparse
+
+# The message reported when `K11` can't be factored
+SINGULAR = 'The stiffness matrix is singular, which implies rigid body motion. The structure is unstable. Aborting analysis.'
+
+
+class Solver():
+    """
+    Base class for the linear solver backends.
+    """
+
+    # The name used to select the backend
+    name = None
+
+    def __init__(self):
+        """Creates a new solver backend with empty statistics.
+        """
+
+        self.stats = {'backend': self.name, 'factorizations': 0, 'factor_time': 0.0,
+                      'solves': 0, 'solve_time': 0.0, 'memory': 0}
+
+    def factor(self, K11):
+        """Factors `K11` so it can be used to solve for any number of right-hand sides.
+
+        :param K11: The partitioned stiffness matrix for the unknown displacements.
+        :type K11: sparse matrix or ndarray
+        :raises Exception: Occurs when the stiffness matrix is singular.
+        :return: The backend itself, so `factor()` and `solve()` can be chained.
+        :rtype: Solver
+        """
+
+        start = perf_counter()
+        try:
+            memory = self._factor(K11)
+        except (RuntimeError, ValueError, ArithmeticError):
+            raise Exception(SINGULAR)
+
+        self.stats['factorizations'] += 1
+        self.stats['factor_time'] += perf_counter() - start
+        self.stats['memory'] = max(self.stats['memory'], int(memory))
+        return self
+
+    def solve(self, b):
+        """Solves for a right-hand side vector or matrix using the last factorization.
+
+        :param b: The right-hand side, shape `(n,)` or `(n, m)`.
+        :type b: ndarray
+        :return: The solution, in the same shape as `b`.
+        :rtype: ndarray
+        """
+
+        start = perf_counter()
+        x = self._solve(np.array(b, dtype=float))
+        self.stats['solves'] += 1
+        self.stats['solve_time'] += perf_counter() - start
+        return x
+
+    def __call__(self, b):
+        return self.solve(b)
+
+
+class SparseLU(Solver):
+    """
+    Direct sparse LU factorization using SuperLU.
+    """
+
+    name = 'lu'
+
+    # SuperLU options passed to `splu`
+    options = {}
+
+    def _factor(self, K11):
+        from scipy.sparse.linalg import splu
+        self._lu = splu(csc_matrix(K11), **self.options)
+        return (self._lu.L.nnz + self._lu.U.nnz)*(8 + 4) + 2*self._lu.shape[0]*4
+
+    def _solve(self, b):
+        return self._lu.solve(b)
+
+
+class SparseSymmetric(SparseLU):
+    """
+    Sparse symmetric factorization. Uses a CHOLMOD Cholesky factorization if `scikit-sparse` is
+    installed and `K11` is symmetric. Otherwise SuperLU is run in symmetric mode, with a minimum
+    degree ordering on the structure of `K11 + K11^T` and diagonal pivoting preferred.
+    """
+
+    name = 'symmetric'
+
+    options = {'permc_spec': 'MMD_AT_PLUS_A', 'diag_pivot_thresh': 0.0,
+               'options': {'SymmetricMode': True}}
+
+    def _factor(self, K11):
+
+        K11 = csc_matrix(K11)
+        self._cholesky = None
+
+        try:
+            from sksparse.cholmod import cholesky, CholmodError
+        except ImportError:
+            return SparseLU._factor(self, K11)
+
+        # Members with rotated local axes can make `K11` unsymmetric
+        if not is_symmetric(K11):
+            return SparseLU._factor(self, K11)
+
+        try:
+            self._cholesky = cholesky(K11)
+        except CholmodError:
+            raise ValueError('K11 is not positive definite')
+
+        return self._cholesky.L().nnz*(8 + 4)
+
+    def _solve(self, b):
+        if self._cholesky is not None:
+            return self._cholesky(b)
+        return SparseLU._solve(self, b)
+
+
+class ConjugateGradient(Solver):
+    """
+    Preconditioned conjugate gradient iterative solver. Nothing is factored. `factor()` only builds
+    the preconditioner, so this backend uses the least memory on very large models. Members with
+    rotated local axes can make `K11` unsymmetric, in which case BiCGSTAB is used instead.
+    """
+
+    name = 'cg'
+
+    def __init__(self, preconditioner='ilu', tol=1e-10, max_iter=None):
+        """
+        :param preconditioner: 'jacobi' for diagonal scaling or 'ilu' for an incomplete LU
+                               factorization. Defaults to 'ilu'.
+        :type preconditioner: str, optional
+        :param tol: The relative residual tolerance. Defaults to 1e-10.
+        :type tol: float, optional
+        :param max_iter: The maximum number of iterations per right-hand side. Defaults to None,
+                         which lets `scipy` choose.
+        :type max_iter: int, optional
+        """
+
+        super().__init__()
+        if preconditioner not in ('jacobi', 'ilu'):
+            raise ValueError(f"Unknown preconditioner '{preconditioner}'. Use 'jacobi' or 'ilu'.")
+        self.preconditioner = preconditioner
+        self.tol = tol
+        self.max_iter = max_iter
+
+    def _factor(self, K11):
+
+        from scipy.sparse.linalg import LinearOperator, spilu
+
+        self._K11 = csc_matrix(K11)
+        self._symmetric = is_symmetric(self._K11)
+        n = self._K11.shape[0]
+
+        if self.preconditioner == 'jacobi':
+            diagonal = self._K11.diagonal()
+            if not (abs(diagonal) > 0).all():
+                raise ValueError('K11 has a zero on its diagonal')
+            self._M = LinearOperator((n, n), matvec=lambda x: x.ravel()/diagonal)
+            return n*8
+        else:
+            ilu = spilu(self._K11, drop_tol=1e-5, fill_factor=10)
+            self._M = LinearOperator((n, n), matvec=ilu.solve)
+            return (ilu.L.nnz + ilu.U.nnz)*(8 + 4)
+
+    def _solve(self, b):
+
+        from scipy.sparse.linalg import cg, bicgstab
+
+        method = cg if self._symmetric else bicgstab
+        tolerance = {_tolerance_keyword(method): self.tol}
+        x = np.zeros(b.shape)
+        for j, column in enumerate(b.reshape(len(b), -1).T):
+            result, info = method(self._K11, column, atol=0.0, maxiter=self.max_iter, M=self._M,
+                                  **tolerance)
+            if info != 0:
+                raise Exception('The conjugate gradient solver did not converge. Try a direct solver backend.')
+            x.reshape(len(b), -1)[:, j] = result
+
+        return x
+
+
+class DenseLU(Solver):
+    """
+    Dense LU factorization using LAPACK. Best suited to small models.
+    """
+
+    name = 'dense'
+
+    def _factor(self, K11):
+        from scipy.linalg import lu_factor
+        K11 = K11.toarray() if issparse(K11) else np.array(K11, dtype=float)
+        self._lu = lu_factor(K11, check_finite=False)
+        if not (abs(np.diag(self._lu[0])) > 0).all():
+            raise ValueError('K11 is singular')
+        return self._lu[0].nbytes + self._lu[1].nbytes
+
+    def _solve(self, b):
+        from scipy.linalg import lu_solve
+        return lu_solve(self._lu, b, check_finite=False)
+
+
+class LowRankUpdate():
+    """
+    Solves with a factored matrix `A` plus a low-rank correction, using the Woodbury identity
+
+        (A + E S E^T)^-1 = A^-1 - A^-1 E S (I + E^T A^-1 E S)^-1 E^T A^-1
+
+    where `E` selects the rows and columns the correction touches and `S` is the dense correction.
+    This form doesn't need `S` to be invertible, so it works for element stiffness matrices, which
+    are singular on their own. The columns of `A^-1 E` are cached by row, so as the correction
+    grows only the newly touched rows need a solve with the factored backend.
+    """
+
+    def __init__(self, backend, n):
+        """
+        :param backend: A solver backend that has already factored `A`.
+        :type backend: Solver
+        :param n: The number of rows in `A`.
+        :type n: int
+        """
+
+        self.backend = backend
+        self.n = n
+        self._columns = {}
+        self.update(np.zeros(0, dtype=np.int64), np.zeros((0, 0)))
+
+    @property
+    def rank(self):
+        """The number of rows touched by the current correction.
+        """
+        return len(self.idx)
+
+    def update(self, idx, S):
+        """Sets the correction relative to the factored matrix.
+
+        :param idx: The rows (and columns) the correction touches.
+        :type idx: ndarray
+        :param S: The correction to those rows and columns, shape `(len(idx), len(idx))`.
+        :type S: ndarray
+        :raises Exception: Occurs when the corrected matrix is singular.
+        """
+
+        from scipy.linalg import lu_factor
+
+        self.idx, self.S = np.asarray(idx, dtype=np.int64), np.asarray(S, dtype=float)
+        r = len(self.idx)
+
+        # Solve for the columns of A^-1 E that haven't been needed before
+        new = [i for i in self.idx if i not in self._columns]
+        if new:
+            E = np.zeros((self.n, len(new)))
+            E[new, np.arange(len(new))] = 1.0
+            for i, column in zip(new, self.backend.solve(E).reshape(self.n, -1).T):
+                self._columns[i] = column
+        self.W = np.array([self._columns[i] for i in self.idx]).reshape(r, self.n).T
+
+        # Factor the small capacitance matrix I + E^T A^-1 E S
+        if r:
+            self._lu = lu_factor(np.eye(r) + self.W[self.idx, :] @ self.S, check_finite=False)
+            if not (abs(np.diag(self._lu[0])) > 1e-12*max(1.0, abs(self._lu[0]).max())).all():
+                raise Exception(SINGULAR)
+
+    def solve(self, b):
+        """Solves the corrected system for a right-hand side vector or matrix.
+        """
+
+        from scipy.linalg import lu_solve
+
+        y = self.backend.solve(b)
+        if len(self.idx) == 0:
+            return y
+        correction = self.W @ (self.S @ lu_solve(self._lu, y[self.idx], check_finite=False))
+        return y - correction.reshape(y.shape)
+
+    def __call__(self, b):
+        return self.solve(b)
+
+
+def is_symmetric(K, tol=1e-10):
+    """Returns `True` if a sparse matrix is symmetric to within a tolerance relative to its largest
+    term.
+    """
+
+    if K.nnz == 0:
+        return True
+    return abs(K - K.T).max() <= tol*abs(K).max()
+
+
+def _tolerance_keyword(method):
+    """Returns the name of the relative tolerance argument of a SciPy iterative solver. SciPy 1.12
+    renamed it from `tol` to `rtol`, and older releases are still bundled with some FreeCAD builds.
+    """
+    return 'rtol' if 'rtol' in signature(method).parameters else 'tol'
+
+
+# The backends available by name
+BACKENDS = {backend.name: backend for backend in (SparseLU, SparseSymmetric, ConjugateGradient,
+                                                   DenseLU)}
+
+
+def auto_backend(K11):
+    """Picks a backend for `K11` based on its size and density. Small or dense matrices are solved
+    with a dense factorization, very large ones with preconditioned conjugate gradients, and
+    everything else with a sparse direct factorization.
+
+    :param K11: The partitioned stiffness matrix for the unknown displacements.
+    :type K11: sparse matrix or ndarray
+    :return: The name of the selected backend.
+    :rtype: str
+    """
+
+    n = K11.shape[0]
+    nnz = K11.nnz if issparse(K11) else np.count_nonzero(K11)
+    density = nnz/max(n*n, 1)
+
+    if n <= 600 or density > 0.1:
+        return 'dense'
+    elif n > 500000:
+        return 'cg'
+    else:
+        return 'symmetric'
+
+
+def make_solver(solver, K11):
+    """Returns a solver backend.
+
+    :param solver: A backend name ('lu', 'symmetric', 'cg', 'dense' or 'auto'), or a `Solver`
+                   instance, which is returned unchanged.
+    :type solver: str or Solver
+    :param K11: The matrix the backend will factor. Used to pick a backend in 'auto' mode.
+    :type K11: sparse matrix or ndarray
+    :raises ValueError: Occurs when the backend name is not recognized.
+    :rtype: Solver
+    """
+
+    if isinstance(solver, Solver):
+        return solver
+    if solver == 'auto':
+        solver = auto_backend(K11)
+    if solver not in BACKENDS:
+        raise ValueError(f"Unknown solver backend '{solver}'. Use one of {tuple(BACKENDS)} or 'auto'.")
+
+    return BACKENDS[solver]()
+
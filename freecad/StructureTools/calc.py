@@ -1,10 +1,12 @@
-import FreeCAD, App, FreeCADGui, Part, os, math
+import FreeCAD, App, FreeCADGui, Part, os, math, tempfile
+import numpy
 from PySide import QtWidgets
 import subprocess
 
-ICONPATH = os.path.join(os.path.dirname(__file__), "resources")
-
 from .Pynite_main.FEModel3D import FEModel3D
+from .combination_analysis import combination_analysis_manager
+
+ICONPATH = os.path.join(os.path.dirname(__file__), "resources")
 
 # try:
 # 	from Pynite import FEModel3D
@@ -30,78 +32,92 @@ class Calc:
 
 		obj.addProperty("App::PropertyStringList", "NameMembers", "Calc", "name of structure members")
 		obj.addProperty("App::PropertyVectorList", "Nodes", "Calc", "nós")
+		obj.addProperty("App::PropertyFileIncluded", "ResultsFile", "Calc", "diagramas de todas as barras e combinações, em float64")
 		obj.addProperty("App::PropertyBool", "selfWeight", "Calc", "Considerar peso proprio.").selfWeight = False
+		obj.addProperty("App::PropertyEnumeration", "LoadCombination", "Calc", "combinação de carregamento exibida nos resultados")
 
-		obj.addProperty("App::PropertyStringList", "MomentY", "ResultMoment", "momento em Y local")
-		obj.addProperty("App::PropertyStringList", "MomentZ", "ResultMoment", "momento em Z local")
 		obj.addProperty("App::PropertyFloatList", "MinMomentY", "ResultMoment", "momento minimo em Y")
 		obj.addProperty("App::PropertyFloatList", "MinMomentZ", "ResultMoment", "momento minimo em Z")
 		obj.addProperty("App::PropertyFloatList", "MaxMomentY", "ResultMoment", "momento maximo em Y")
 		obj.addProperty("App::PropertyFloatList", "MaxMomentZ", "ResultMoment", "momento maximo em Z")
 		obj.addProperty("App::PropertyInteger", "NumPointsMoment", "NumPoints", "Presizão dos gráficos").NumPointsMoment = 5
 
-		obj.addProperty("App::PropertyStringList", "AxialForce", "ResultAxial", "força axial")
 		obj.addProperty("App::PropertyInteger", "NumPointsAxial", "NumPoints", "Presizão dos gráficos").NumPointsAxial = 3
 		
-		obj.addProperty("App::PropertyStringList", "Torque", "ResultTorque", "torque no elemento")
 		obj.addProperty("App::PropertyFloatList", "MinTorque", "ResultTorque", "torque minimo")
 		obj.addProperty("App::PropertyFloatList", "MaxTorque", "ResultTorque", "torque maximo")
 		obj.addProperty("App::PropertyInteger", "NumPointsTorque", "NumPoints", "Presizão dos gráficos").NumPointsTorque = 3
 		
-		obj.addProperty("App::PropertyStringList", "ShearY", "ResultShear", "cortante")
 		obj.addProperty("App::PropertyFloatList", "MinShearY", "ResultShear", "cortante minimo")
 		obj.addProperty("App::PropertyFloatList", "MaxShearY", "ResultShear", "cortante maximo")
-		obj.addProperty("App::PropertyStringList", "ShearZ", "ResultShear", "cortante")
 		obj.addProperty("App::PropertyFloatList", "MinShearZ", "ResultShear", "cortante minimo")
 		obj.addProperty("App::PropertyFloatList", "MaxShearZ", "ResultShear", "cortante maximo")
 		obj.addProperty("App::PropertyInteger", "NumPointsShear", "NumPoints", "Presizão dos gráficos").NumPointsShear = 4
 
-		obj.addProperty("App::PropertyStringList", "DeflectionY", "ResultDeflection", "Deslocamento em y")
 		obj.addProperty("App::PropertyFloatList", "MinDeflectionY", "ResultDeflection", "Deslocamento minimo em y")
 		obj.addProperty("App::PropertyFloatList", "MaxDeflectionY", "ResultDeflection", "Deslocamento máximo em Y")
-		obj.addProperty("App::PropertyStringList", "DeflectionZ", "ResultDeflection", "Deslocamento em Z")
 		obj.addProperty("App::PropertyFloatList", "MinDeflectionZ", "ResultDeflection", "Deslocamento minimo em Z")
 		obj.addProperty("App::PropertyFloatList", "MaxDeflectionZ", "ResultDeflection", "Deslocamento máximo em Z")
 		obj.addProperty("App::PropertyInteger", "NumPointsDeflection", "NumPoints", "Presizão dos gráficos").NumPointsDeflection = 4
 
 
+	#  Converte os pontos do FreeCAD (mm) para a unidade de cálculo, inverte o eixo y e z para adequação as coordenadas do solver e arredonda para a precisão usada na identificação dos nós
+	def nodeCoordinates(self, points, unitLength):
+		lengthFactor = float(FreeCAD.Units.Quantity(1, unitLength).getValueAs('mm'))
+		return numpy.round(numpy.asarray(points, dtype=float).reshape(-1, 3)[:, [0, 2, 1]] / lengthFactor, 2)
+
+	# Chave do hash espacial de cada nó: a célula da grade de 0.01 (na unidade de cálculo) em que ele cai. Pontos que arredondam para as mesmas coordenadas caem na mesma célula
+	def nodeKeys(self, coordinates):
+		return [tuple(key) for key in numpy.rint(coordinates * 100).astype(numpy.int64).tolist()]
+
 	#  Mapeia os nós da estrutura, (inverte o eixo y e z para adequação as coordenadas do sover)
-	def mapNodes(self, elements, unitLength):	
-		# Varre todos os elementos de linha e adiciona seus vertices à tabela de nodes
-		listNodes = []
+	def mapNodes(self, elements, unitLength):
+		# Extrai de uma vez os vertices de todas as arestas dos elementos de linha
+		points = []
+		edges = []
 		for element in elements:
-			for edge in element.Shape.Edges:
-				for vertex in edge.Vertexes:
-					node = [round(float(FreeCAD.Units.Quantity(vertex.Point.x,'mm').getValueAs(unitLength)), 2), round(float(FreeCAD.Units.Quantity(vertex.Point.z,'mm').getValueAs(unitLength)),2), round(float(FreeCAD.Units.Quantity(vertex.Point.y,'mm').getValueAs(unitLength)),2)]
-					if not node in listNodes:
-						listNodes.append(node)
+			for i, edge in enumerate(element.Shape.Edges):
+				vertexes = edge.Vertexes
+				edges.append((element, i, len(points), len(vertexes)))
+				points.extend((vertex.Point.x, vertex.Point.y, vertex.Point.z) for vertex in vertexes)
+
+		# Remove os vertices repetidos pelo hash espacial, mantendo a ordem em que os nós aparecem
+		coordinates = self.nodeCoordinates(points, unitLength)
+		nodeIndex = {}
+		vertexNodes = []
+		listNodes = []
+		nodePoints = [] # Coordenadas de cada nó no FreeCAD (mm), tomadas do primeiro vertice que cai nele
+		for key, node, point in zip(self.nodeKeys(coordinates), coordinates.tolist(), points):
+			index = nodeIndex.get(key)
+			if index is None:
+				index = nodeIndex[key] = len(listNodes)
+				listNodes.append(node)
+				nodePoints.append(point)
+			vertexNodes.append(index)
 
-		return listNodes
+		return listNodes, nodeIndex, [(element, i, vertexNodes[start:start + count]) for element, i, start, count in edges], nodePoints
+
+	# Retorna o índice do nó que coincide com um vertice do FreeCAD, ou None se não houver
+	def findNode(self, nodeIndex, point, unitLength):
+		return nodeIndex.get(self.nodeKeys(self.nodeCoordinates([point.x, point.y, point.z], unitLength))[0])
 
 	# Mapeia os membros da estrutura 
-	def mapMembers(self, elements, listNodes, unitLength):
+	def mapMembers(self, edges, listNodes):
 		listMembers = {}
-		for element in elements:
-			for i, edge in enumerate(element.Shape.Edges):
-				listIndexVertex = []
-				for vertex in edge.Vertexes:
-					node = [round(float(FreeCAD.Units.Quantity(vertex.Point.x,'mm').getValueAs(unitLength)), 2), round(float(FreeCAD.Units.Quantity(vertex.Point.z,'mm').getValueAs(unitLength)),2), round(float(FreeCAD.Units.Quantity(vertex.Point.y,'mm').getValueAs(unitLength)),2)]
-					index = listNodes.index(node)
-					listIndexVertex.append(index)
-
-				# valida se o primeiro nó é mais auto do que o segundo nó, se sim inverte os nós do membro (necessário para manter os diagramas voltados para a posição correta)
-				n1 = listIndexVertex[0]
-				n2 = listIndexVertex[1]
-				if listNodes[n1][1] > listNodes[n2][1]:
-					aux = n1
-					n1 = n2
-					n2 = aux
-				listMembers[element.Name + '_' + str(i)] = {
-					'nodes': [str(n1), str(n2)],
-					'material': element.MaterialMember.Name,
-					'section': element.SectionMember.Name,
-					'trussMember': element.TrussMember
-					}
+		for element, i, listIndexVertex in edges:
+			# valida se o primeiro nó é mais auto do que o segundo nó, se sim inverte os nós do membro (necessário para manter os diagramas voltados para a posição correta)
+			n1 = listIndexVertex[0]
+			n2 = listIndexVertex[1]
+			if listNodes[n1][1] > listNodes[n2][1]:
+				aux = n1
+				n1 = n2
+				n2 = aux
+			listMembers[element.Name + '_' + str(i)] = {
+				'nodes': [str(n1), str(n2)],
+				'material': element.MaterialMember.Name,
+				'section': element.SectionMember.Name,
+				'trussMember': element.TrussMember
+				}
 		
 		return listMembers
 
@@ -113,22 +129,23 @@ class Calc:
 		return model
 
 	# Cria os membros no modelo do solver
-	def setMembers(self, model, members_map,selfWeight):
+	def setMembers(self, model, members_map):
 		for memberName in list(members_map):			
 			model.add_member(memberName, members_map[memberName]['nodes'][0] , members_map[memberName]['nodes'][1], members_map[memberName]['material'], members_map[memberName]['section'])
-			
-			#Considera o peso proprio nos elementos de barra
-			if selfWeight : model.add_member_self_weight('FY', -1) 
-
-			#libera as rotações na extremidades do elemento a fim de emular ocomportamento de barras de treliça
-			if members_map[memberName]['trussMember']: model.def_releases(memberName, Dxi=False, Dyi=False, Dzi=False, Rxi=False, Ryi=True, Rzi=True, Dxj=False, Dyj=False, Dzj=False, Rxj=False, Ryj=True, Rzj=True)
+			self.setReleases(model, memberName, members_map[memberName]['trussMember'])
 		
 		return model
 
-	# Cria os carregamentos
-	def setLoads(self, model, loads, nodes_map, unitForce, unitLength):
-		pass
+	#libera as rotações na extremidades do elemento a fim de emular ocomportamento de barras de treliça
+	def setReleases(self, model, memberName, trussMember):
+		model.def_releases(memberName, Dxi=False, Dyi=False, Dzi=False, Rxi=False, Ryi=trussMember, Rzi=trussMember, Dxj=False, Dyj=False, Dzj=False, Rxj=False, Ryj=trussMember, Rzj=trussMember)
+
+	# Mapeia os carregamentos
+	def mapLoads(self, loads, nodeIndex, unitForce, unitLength):
+		listLoads = []
 		for load in loads:
+			# Caso de carregamento (DL, LL, WL...) usado pelas combinações. Carregamentos criados antes da propriedade existir são tratados como carga permanente
+			case = getattr(load, 'LoadCase', 'DL')
 
 			match load.GlobalDirection:
 				case '+X':
@@ -162,39 +179,87 @@ class Calc:
 
 				subname = int(load.ObjectBase[0][1][0].split('Edge')[1]) - 1
 				name = load.ObjectBase[0][0].Name + '_' + str(subname)
-				model.add_member_dist_load(name, axis, initial * direction, final * direction)
+				listLoads.append(('member', name, axis, initial * direction, final * direction, case))
 
 			# Valida se o carregamento é nodal
 			elif 'Vertex' in load.ObjectBase[0][1][0]:
 				numVertex = int(load.ObjectBase[0][1][0].split('Vertex')[1]) - 1
 				vertex = load.ObjectBase[0][0].Shape.Vertexes[numVertex]
-				
-				node = list(filter(lambda element: element == [round(float(FreeCAD.Units.Quantity(vertex.Point.x,'mm').getValueAs(unitLength)), 2), round(float(FreeCAD.Units.Quantity(vertex.Point.z,'mm').getValueAs(unitLength)),2), round(float(FreeCAD.Units.Quantity(vertex.Point.y,'mm').getValueAs(unitLength)),2)], nodes_map))[0]
-				indexNode = nodes_map.index(node)
+				indexNode = self.findNode(nodeIndex, vertex.Point, unitLength)
 
 				# subname = int(load.ObjectBase[0][1][0].split('Vertex')[1]) - 1
 				name = str(indexNode)
-				model.add_node_load(name, axis, float(load.NodalLoading.getValueAs(unitForce)) * direction)
-			
+				listLoads.append(('node', name, axis, float(load.NodalLoading.getValueAs(unitForce)) * direction, case))
 
+		return listLoads
+
+	# Cria os carregamentos
+	def setLoads(self, model, loads_map, selfWeight):
+		for load in loads_map:
+			if load[0] == 'member':
+				model.add_member_dist_load(load[1], load[2], load[3], load[4], case=load[5])
+			else:
+				model.add_node_load(load[1], load[2], load[3], case=load[4])
+
+		#Considera o peso proprio nos elementos de barra (aplicado uma única vez, a todos os membros) como carga permanente
+		if selfWeight : model.add_member_self_weight('FY', -1, case='DL') 
 					
 		return model
 
-	# Cria os suportes
-	def setSuports(self, model, suports, nodes_map, unitLength):
+	# Mapeia as combinações de carregamento do documento que entram na análise, no formato {nome: {caso: fator}}. Sem nenhuma combinação, cria a 'Combo 1' somando todos os casos usados
+	def mapCombinations(self, objects, loads_map, selfWeight):
+		listCombinations = {}
+		for combination in objects:
+			if not hasattr(combination, 'CombinationFormula') or not getattr(combination, 'IncludeInAnalysis', True):
+				continue
+			try:
+				factors = combination_analysis_manager.parse_combination_formula(combination.CombinationFormula)
+			except ValueError as e:
+				FreeCAD.Console.PrintWarning(f"Combinação {combination.Label} ignorada, fórmula inválida: {e}\n")
+				continue
+			if factors:
+				listCombinations[combination.Name] = factors
+			else:
+				FreeCAD.Console.PrintWarning(f"Combinação {combination.Label} ignorada, a fórmula '{combination.CombinationFormula}' não tem fatores de carregamento\n")
+
+		if not listCombinations:
+			cases = {load[-1] for load in loads_map}
+			if selfWeight or not cases:
+				cases.add('DL')
+			listCombinations['Combo 1'] = {case: 1.0 for case in sorted(cases)}
+
+		return listCombinations
+
+	# Cria as combinações de carregamento, substituindo as que já existem no modelo
+	def setCombinations(self, model, combinations_map):
+		model.load_combos = {}
+		for name, factors in combinations_map.items():
+			model.add_load_combo(name, factors)
+
+		return model
+
+	# Mapeia os suportes (restrições de cada nó, já no sistema de eixos do solver)
+	def mapSuports(self, suports, nodeIndex, unitLength):
+		listSuports = {}
 		for suport in suports:
-			suportvertex = list(suport.ObjectBase[0][0].Shape.Vertexes[int(suport.ObjectBase[0][1][0].split('Vertex')[1])-1].Point)
-			for i, node in enumerate(nodes_map):
-				if round(float(FreeCAD.Units.Quantity(suportvertex[0],'mm').getValueAs(unitLength)),2) == round(node[0],2) and round(float(FreeCAD.Units.Quantity(suportvertex[1],'mm').getValueAs(unitLength)),2) == round(node[2],2) and round(float(FreeCAD.Units.Quantity(suportvertex[2],'mm').getValueAs(unitLength)),2) == round(node[1],2):					
-					name = str(i)
-					model.def_support(name, suport.FixTranslationX, suport.FixTranslationZ, suport.FixTranslationY, suport.FixRotationX, suport.FixRotationZ, suport.FixRotationY)
-					break
+			suportvertex = suport.ObjectBase[0][0].Shape.Vertexes[int(suport.ObjectBase[0][1][0].split('Vertex')[1])-1].Point
+			index = self.findNode(nodeIndex, suportvertex, unitLength)
+			if index is not None:
+				listSuports[str(index)] = (suport.FixTranslationX, suport.FixTranslationZ, suport.FixTranslationY, suport.FixRotationX, suport.FixRotationZ, suport.FixRotationY)
+		
+		return listSuports
+
+	# Cria os suportes
+	def setSuports(self, model, suports_map):
+		for name, fixity in suports_map.items():
+			model.def_support(name, *fixity)
 		
 		return model
 
-	def setMaterialAndSections(self, model, lines, unitLength, unitForce):
-		materiais = []
-		sections = []
+	# Mapeia os materiais e seções usados pelos elementos de linha
+	def mapMaterialAndSections(self, lines, unitLength, unitForce):
+		materiais = {}
+		sections = {}
 		for line in lines:
 			material = line.MaterialMember
 			section = line.SectionMember
@@ -205,8 +270,7 @@ class Calc:
 				modulusElasticity = float(material.ModulusElasticity.getValueAs(unitForce+"/"+unitLength+"^2"))
 				poissonRatio = float(material.PoissonRatio)
 				G = modulusElasticity / (2 * (1 + poissonRatio))
-				model.add_material(material.Name, modulusElasticity, G, poissonRatio, density)
-				materiais.append(material.Name)
+				materiais[material.Name] = (modulusElasticity, G, poissonRatio, density)
 				
 
 			if not section.Name in sections:
@@ -223,108 +287,268 @@ class Calc:
 				RIy = ((Iz + Iy) / 2 ) - ((Iz - Iy) / 2 )*math.cos(2 * ang) + Iyz * math.sin(2 * ang)
 				RIz = ((Iz + Iy) / 2 ) + ((Iz - Iy) / 2 )*math.cos(2 * ang) - Iyz * math.sin(2 * ang)
 				
-				model.add_section(section.Name, A, RIy, RIz, J)
-				sections.append(section.Name)
+				sections[section.Name] = (A, RIy, RIz, J)
+		
+		return materiais, sections
+
+	# Cria os materiais e seções, ou atualiza as propriedades dos que já existem no modelo
+	def setMaterialAndSections(self, model, materials_map, sections_map):
+		for name, (E, G, nu, rho) in materials_map.items():
+			if name in model.materials:
+				material = model.materials[name]
+				material.E, material.G, material.nu, material.rho = E, G, nu, rho
+			else:
+				model.add_material(name, E, G, nu, rho)
+
+		for name, (A, Iy, Iz, J) in sections_map.items():
+			if name in model.sections:
+				section = model.sections[name]
+				section.A, section.Iy, section.Iz, section.J = A, Iy, Iz, J
+			else:
+				model.add_section(name, A, Iy, Iz, J)
 		
 		return model
 
-	
-	def execute(self, obj):
+	# Monta o modelo do solver do zero
+	def buildModel(self, state):
 		model = FEModel3D()
+		model = self.setMaterialAndSections(model, state['materials'], state['sections'])
+		model = self.setNodes(model, state['nodes'])
+		model = self.setMembers(model, state['members'])
+		model = self.setLoads(model, *state['loads'])
+		model = self.setCombinations(model, state['combinations'])
+		model = self.setSuports(model, state['suports'])
+		return model
+
+	# Chave da topologia do modelo: unidades, nós e conectividade dos membros. Se ela muda o modelo precisa ser reconstruído
+	def topologyKey(self, state):
+		return (state['units'], state['nodes'], {name: member['nodes'] for name, member in state['members'].items()})
+
+	# Atualiza o modelo mantido entre recálculos, aplicando apenas o que mudou desde a última análise. O modelo é reconstruído se os nós ou a conectividade dos membros mudaram.
+	# Retorna o modelo e se ele precisa ser analisado de novo
+	def updateModel(self, state):
+		model = getattr(self, 'model', None)
+		previous = getattr(self, 'state', None)
+
+		if model is None or previous is None or self.topologyKey(state) != self.topologyKey(previous):
+			return self.buildModel(state), True
+
+		changed = False
+
+		# Materiais e seções: atualiza as propriedades no próprio modelo
+		if state['materials'] != previous['materials'] or state['sections'] != previous['sections']:
+			self.setMaterialAndSections(model, state['materials'], state['sections'])
+			changed = True
+
+		# Membros: troca de material, seção ou comportamento de treliça
+		for name, member in state['members'].items():
+			if member != previous['members'][name]:
+				model.members[name].material = model.materials[member['material']]
+				model.members[name].section = model.sections[member['section']]
+				self.setReleases(model, name, member['trussMember'])
+				changed = True
+
+		# Suportes: libera os nós que deixaram de ser apoiados e aplica os novos
+		if state['suports'] != previous['suports']:
+			for name in previous['suports']:
+				if name not in state['suports']:
+					model.def_support(name)
+			self.setSuports(model, state['suports'])
+			changed = True
+
+		# Carregamentos: o peso próprio depende da densidade dos materiais, então também é refeito quando eles mudam
+		if state['loads'] != previous['loads'] or (state['loads'][1] and state['materials'] != previous['materials']):
+			model.delete_loads()
+			self.setLoads(model, *state['loads'])
+			changed = True
+
+		# Combinações: só os fatores mudam, então a fatoração da matriz de rigidez continua valendo
+		if state['combinations'] != previous['combinations']:
+			self.setCombinations(model, state['combinations'])
+			changed = True
+
+		return model, changed
+
+	# Grava os diagramas, mínimos e máximos de todas as barras e combinações em um arquivo .npz incluído no documento. Cada diagrama é um array float64 (barra, combinação, ponto)
+	def packResults(self, obj, results, nodePoints):
+		arrays = {'members': numpy.array(results.members), 'combinations': numpy.array(results.combos)}
+
+		# Topologia usada pelos pós-processadores: coordenadas dos nós no FreeCAD (mm, arredondadas para que barras alinhadas aos eixos tenham componentes exatamente nulas) e os nós inicial e final de cada barra, na ordem de NameMembers
+		members = self.state['members']
+		arrays['nodes'] = numpy.round(numpy.array(nodePoints, dtype=float).reshape(-1, 3), 2)
+		arrays['connectivity'] = numpy.array([[int(node) for node in members[name]['nodes']] for name in results.members], dtype=numpy.int64).reshape(-1, 2)
+		for diagram in results.diagrams:
+			arrays[diagram] = results.diagrams[diagram]
+			arrays['x_' + diagram] = results.x[diagram]
+			arrays['min_' + diagram] = results.min[diagram]
+			arrays['max_' + diagram] = results.max[diagram]
+
+		# O FreeCAD copia o arquivo para dentro do documento, então o temporário pode ser apagado
+		path = os.path.join(tempfile.gettempdir(), obj.Name + '_results.npz')
+		numpy.savez(path, **arrays)
+		obj.ResultsFile = path
+		if os.path.exists(path):
+			os.remove(path)
+
+		self.arrays = arrays
+		self.arraysFile = obj.ResultsFile
+
+	# Indica se o calc já gravou resultados no ResultsFile. Documentos antigos e objetos ainda não calculados não têm o arquivo
+	def hasResults(self, obj):
+		path = getattr(obj, 'ResultsFile', '')
+		return bool(path) and os.path.exists(path)
+
+	# Retorna os arrays de resultados, lendo o arquivo do documento só quando ele mudou (ou depois de reabrir o documento)
+	def resultArrays(self, obj):
+		if not self.hasResults(obj):
+			raise ValueError(f'{obj.Label} não tem resultados. Recalcule o objeto calc primeiro.')
+
+		if getattr(self, 'arraysFile', None) != obj.ResultsFile:
+			with numpy.load(obj.ResultsFile) as data:
+				self.arrays = {name: data[name] for name in data.files}
+			self.arraysFile = obj.ResultsFile
+
+		return self.arrays
+
+	# Retorna a topologia da última análise para os pós-processadores (Diagram...), sem percorrer a geometria: 'nodes' (coordenadas no FreeCAD, mm), 'connectivity' (nós de cada barra), 'directions' (vetor unitário do nó inicial ao final), 'lengths' (mm), 'members' (nomes) e 'memberIndex' (nome -> linha)
+	def getTopology(self, obj):
+		arrays = self.resultArrays(obj)
+		if getattr(self, 'topologyArrays', None) is not arrays:
+			nodes = arrays['nodes']
+			connectivity = arrays['connectivity']
+			vectors = nodes[connectivity[:, 1]] - nodes[connectivity[:, 0]]
+			lengths = numpy.linalg.norm(vectors, axis=1)
+			members = arrays['members'].tolist()
+			self.topology = {
+				'nodes': nodes,
+				'connectivity': connectivity,
+				'directions': vectors / numpy.where(lengths > 0, lengths, 1)[:, None],
+				'lengths': lengths,
+				'members': members,
+				'memberIndex': {name: i for i, name in enumerate(members)}
+				}
+			self.topologyArrays = arrays
+
+		return self.topology
+
+	# Retorna os valores de um diagrama ('Mz', 'Fy', 'dy'...) de todas as barras, uma linha por barra na ordem de NameMembers. Usa a combinação selecionada se nenhuma for indicada
+	def diagramValues(self, obj, diagram, combination=None):
+		arrays = self.resultArrays(obj)
+		if combination is None:
+			combination = obj.LoadCombination
+		j = list(arrays['combinations']).index(combination)
+		return arrays[diagram][:, j]
+
+	# Adiciona as propriedades que objetos criados por versões anteriores não têm
+	def addMissingProperties(self, obj):
+		if not hasattr(obj, 'LoadCombination'):
+			obj.addProperty("App::PropertyEnumeration", "LoadCombination", "Calc", "combinação de carregamento exibida nos resultados")
+		if not hasattr(obj, 'ResultsFile'):
+			obj.addProperty("App::PropertyFileIncluded", "ResultsFile", "Calc", "diagramas de todas as barras e combinações, em float64")
+
+	# Ao abrir o documento, atualiza objetos antigos. Os resultados guardados como texto por versões anteriores não têm a topologia usada pelos diagramas, então o calc é marcado para ser recalculado
+	def onDocumentRestored(self, obj):
+		self.addMissingProperties(obj)
+		if not self.hasResults(obj):
+			obj.touch()
+
+	# O modelo mantido entre recálculos não é salvo no documento
+	def dumps(self):
+		return None
+
+	def loads(self, state):
+		return None
+
+	def __getstate__(self):
+		return None
+
+	def __setstate__(self, state):
+		return None
+
+	def execute(self, obj):
 		# Filtra os diferentes tipos de elementos
 		lines = list(filter(lambda element: 'Line' in element.Name or 'Wire' in element.Name, obj.ListElements))
 		loads = list(filter(lambda element: 'Load' in element.Name, obj.ListElements))
 		suports = list(filter(lambda element: 'Suport' in element.Name, obj.ListElements))
 
-		nodes_map = self.mapNodes(lines, obj.LengthUnit)
-		members_map = self.mapMembers(lines, nodes_map, obj.LengthUnit)
-
-		model = self.setMaterialAndSections(model, lines, obj.LengthUnit, obj.ForceUnit)
-		model = self.setNodes(model, nodes_map)
-		model = self.setMembers(model, members_map, obj.selfWeight)
-		model = self.setLoads(model, loads, nodes_map, obj.ForceUnit, obj.LengthUnit)
-		model = self.setSuports(model, suports, nodes_map, obj.LengthUnit)
-
-		model.analyze()
-
-		# Gera os resultados
-		momentz = []
-		momenty = []
-		mimMomenty = []
-		mimMomentz = []
-		maxMomenty = []
-		maxMomentz = []
-		axial = []
-		torque = []
-		minTorque = []
-		maxTorque = []
-		sheary = []
-		shearz = []
-		minSheary = []
-		maxSheary = []
-		minShearz = []
-		maxShearz = []
-		deflectiony = []
-		minDeflectiony = []
-		maxDeflectiony = []
-		deflectionz = []
-		minDeflectionz = []
-		maxDeflectionz = []
-
-		for name in model.members.keys():			
-			momenty.append(','.join( str(value) for value in model.members[name].moment_array('My', obj.NumPointsMoment)[1]))
-			momentz.append(','.join( str(value) for value in model.members[name].moment_array('Mz', obj.NumPointsMoment)[1]))
-
-			sheary.append(','.join( str(value) for value in model.members[name].shear_array('Fy', obj.NumPointsShear)[1]))
-			shearz.append(','.join( str(value) for value in model.members[name].shear_array('Fz', obj.NumPointsShear)[1]))
-
-			axial.append(','.join( str(value) for value in model.members[name].axial_array(obj.NumPointsAxial)[1]))
-			
-			torque.append(','.join( str(value) for value in model.members[name].torque_array(obj.NumPointsTorque)[1]))
-
-			deflectiony.append(','.join( str(value) for value in model.members[name].deflection_array('dy', obj.NumPointsDeflection)[1]))
-			deflectionz.append(','.join( str(value) for value in model.members[name].deflection_array('dz', obj.NumPointsDeflection)[1]))
-
-			mimMomenty.append(model.members[name].min_moment('My'))
-			mimMomentz.append(model.members[name].min_moment('Mz'))
-			maxMomenty.append(model.members[name].max_moment('My'))
-			maxMomentz.append(model.members[name].max_moment('Mz'))
-
-			minSheary.append(model.members[name].min_shear('Fy'))
-			minShearz.append(model.members[name].min_shear('Fz'))
-			maxSheary.append(model.members[name].max_shear('Fy'))
-			maxShearz.append(model.members[name].max_shear('Fz'))
-
-			minTorque.append(model.members[name].min_torque())
-			maxTorque.append(model.members[name].max_torque())
-
-			minDeflectiony.append(model.members[name].min_deflection('dy'))
-			minDeflectionz.append(model.members[name].min_deflection('dz'))
-			maxDeflectiony.append(model.members[name].max_deflection('dy'))
-			maxDeflectionz.append(model.members[name].max_deflection('dz'))
-			
-			
+		nodes_map, nodeIndex, edges, nodePoints = self.mapNodes(lines, obj.LengthUnit)
+		materials_map, sections_map = self.mapMaterialAndSections(lines, obj.LengthUnit, obj.ForceUnit)
+		loads_map = self.mapLoads(loads, nodeIndex, obj.ForceUnit, obj.LengthUnit)
+		state = {
+			'units': (obj.LengthUnit, obj.ForceUnit),
+			'nodes': nodes_map,
+			'members': self.mapMembers(edges, nodes_map),
+			'materials': materials_map,
+			'sections': sections_map,
+			'loads': (loads_map, obj.selfWeight),
+			'combinations': self.mapCombinations(obj.Document.Objects, loads_map, obj.selfWeight),
+			'suports': self.mapSuports(suports, nodeIndex, obj.LengthUnit)
+			}
+
+		# Reaproveita o modelo e a fatoração da matriz de rigidez do último recálculo sempre que possível: mudanças só nos carregamentos reutilizam a fatoração, e poucos membros editados entram como uma atualização de baixo posto
+		model, changed = self.updateModel(state)
+		self.model = None
+		if changed:
+			model.analyze_linear(max_update_rank=120)
+		self.model = model
+		self.state = state
+
+		# Gera os resultados de todas as barras e de todas as combinações de uma vez. Os resultados completos ficam em self.results, e as propriedades do objeto mostram a combinação selecionada
+		combinations = list(state['combinations'])
+		results = model.member_results(combo_names=combinations, n_points={
+			'My': obj.NumPointsMoment, 'Mz': obj.NumPointsMoment,
+			'Fy': obj.NumPointsShear, 'Fz': obj.NumPointsShear,
+			'Fx': obj.NumPointsAxial, 'Mx': obj.NumPointsTorque,
+			'dy': obj.NumPointsDeflection, 'dz': obj.NumPointsDeflection})
+		self.results = results
+
+		# A seleção atual é mantida enquanto a combinação existir
+		self.addMissingProperties(obj)
+		selected = obj.LoadCombination
+		if list(obj.getEnumerationsOfProperty('LoadCombination')) != combinations:
+			obj.LoadCombination = combinations
+		obj.LoadCombination = selected if selected in combinations else combinations[0]
+		j = results.combo_index[obj.LoadCombination]
+
+		# Documentos antigos guardavam os diagramas como texto separado por vírgulas, que passam a ficar no ResultsFile
+		for name in ('MomentY', 'MomentZ', 'AxialForce', 'Torque', 'ShearY', 'ShearZ', 'DeflectionY', 'DeflectionZ'):
+			if name in obj.PropertiesList and obj.getTypeIdOfProperty(name) == 'App::PropertyStringList':
+				obj.removeProperty(name)
+		self.packResults(obj, results, nodePoints)
+
+		def minimums(diagram):
+			return results.min[diagram][:, j].tolist()
+
+		def maximums(diagram):
+			return results.max[diagram][:, j].tolist()
+
+		mimMomenty = minimums('My')
+		mimMomentz = minimums('Mz')
+		maxMomenty = maximums('My')
+		maxMomentz = maximums('Mz')
+		minTorque = minimums('Mx')
+		maxTorque = maximums('Mx')
+		minSheary = minimums('Fy')
+		maxSheary = maximums('Fy')
+		minShearz = minimums('Fz')
+		maxShearz = maximums('Fz')
+		minDeflectiony = minimums('dy')
+		maxDeflectiony = maximums('dy')
+		minDeflectionz = minimums('dz')
+		maxDeflectionz = maximums('dz')
 
 		obj.NameMembers = model.members.keys()
 		obj.Nodes = [FreeCAD.Vector(node[0], node[2], node[1]) for node in nodes_map]
-		obj.MomentZ = momentz
-		obj.MomentY = momenty
 		obj.MinMomentY = mimMomenty
 		obj.MinMomentZ = mimMomentz
 		obj.MaxMomentY = maxMomenty
 		obj.MaxMomentZ = maxMomentz
-		obj.AxialForce = axial
-		obj.Torque = torque
 		obj.MinTorque = minTorque
 		obj.MaxTorque = maxTorque
 		obj.MinShearY = minSheary
 		obj.MinShearZ = minShearz
 		obj.MaxShearY = maxSheary
 		obj.MaxShearZ = maxShearz
-		obj.ShearY = sheary
-		obj.ShearZ = shearz
-		obj.DeflectionY = deflectiony
-		obj.DeflectionZ = deflectionz
 		obj.MinDeflectionY = minDeflectiony
 		obj.MinDeflectionZ = minDeflectionz
 		obj.MaxDeflectionY = maxDeflectiony
@@ -1,8 +1,8 @@
 # Load Combination Integration with calc.py
 # This file provides integration between load combinations and the calculation system
 
-import FreeCAD
 import json
+import numpy as np
 import os
 from datetime import datetime
 
@@ -18,20 +18,31 @@ class CombinationAnalysisManager:
         return self.analysis_results
     
     def run_combination_analysis(self, combination_obj, calc_obj):
-        """Run analysis for a specific load combination"""
+        """Run analysis for a specific load combination
+        
+        The calc object solves every load combination in the document in one analysis, with each
+        load combination added to the model from its formula. The results for this combination
+        are then read from the calc object.
+        """
         try:
-            # Apply load factors from combination
-            success = self.apply_combination_factors(combination_obj, calc_obj)
-            if not success:
-                return False, "Failed to apply load factors"
+            # Check the formula before running the analysis
+            self.parse_combination_formula(combination_obj.CombinationFormula)
             
             # Run the analysis
             success = self.execute_analysis(calc_obj)
             if not success:
                 return False, "Analysis execution failed"
             
+            # Combinations excluded from the analysis, or whose formula has no load factors, are
+            # not part of the Calc results
+            calc_results = getattr(calc_obj.Proxy, 'results', None)
+            if calc_results is None or combination_obj.Name not in calc_results.combo_index:
+                return False, f"{combination_obj.Name} is not included in the Calc analysis"
+            
             # Extract and store results
-            results = self.extract_results(calc_obj)
+            results = self.extract_results(calc_obj, combination_obj)
+            if not results:
+                return False, "Failed to extract results"
             self.store_results(combination_obj, results)
             
             return True, "Analysis completed successfully"
@@ -39,24 +50,6 @@ class CombinationAnalysisManager:
         except Exception as e:
             return False, f"Analysis error: {str(e)}"
     
-    def apply_combination_factors(self, combination_obj, calc_obj):
-        """Apply load combination factors to the analysis model"""
-        try:
-            formula = combination_obj.CombinationFormula
-            
-            # Parse the formula and extract factors
-            factors = self.parse_combination_formula(formula)
-            
-            # Apply factors to different load types
-            for load_type, factor in factors.items():
-                self.apply_load_factor(calc_obj, load_type, factor)
-            
-            return True
-            
-        except Exception as e:
-            print(f"Error applying factors: {str(e)}")
-            return False
-    
     def parse_combination_formula(self, formula):
         """Parse combination formula to extract load factors"""
         import re
@@ -78,69 +71,6 @@ class CombinationAnalysisManager:
         
         return factors
     
-    def apply_load_factor(self, calc_obj, load_type, factor):
-        """Apply a specific load factor to the analysis model"""
-        # This would integrate with the actual calc.py implementation
-        # For now, we'll use a placeholder approach
-        
-        try:
-            # Get all loads in the document
-            doc = FreeCAD.ActiveDocument
-            loads = []
-            
-            # Find different types of loads
-            if load_type == "DL":  # Dead Load
-                loads.extend(self.find_dead_loads(doc))
-            elif load_type == "LL":  # Live Load
-                loads.extend(self.find_live_loads(doc))
-            elif load_type == "WL":  # Wind Load
-                loads.extend(self.find_wind_loads(doc))
-            elif load_type == "EQ":  # Seismic Load
-                loads.extend(self.find_seismic_loads(doc))
-            elif load_type == "SL":  # Snow Load
-                loads.extend(self.find_snow_loads(doc))
-            
-            # Apply the factor to each load
-            for load in loads:
-                self.scale_load(load, factor)
-            
-        except Exception as e:
-            print(f"Error applying load factor {load_type}: {str(e)}")
-    
-    def find_dead_loads(self, doc):
-        """Find all dead loads in the document"""
-        # This would identify dead loads based on naming convention or properties
-        return [obj for obj in doc.Objects if 'dead' in obj.Label.lower() or 'dl' in obj.Label.lower()]
-    
-    def find_live_loads(self, doc):
-        """Find all live loads in the document"""
-        return [obj for obj in doc.Objects if 'live' in obj.Label.lower() or 'll' in obj.Label.lower()]
-    
-    def find_wind_loads(self, doc):
-        """Find all wind loads in the document"""
-        return [obj for obj in doc.Objects if 'wind' in obj.Label.lower() or 'wl' in obj.Label.lower()]
-    
-    def find_seismic_loads(self, doc):
-        """Find all seismic loads in the document"""
-        return [obj for obj in doc.Objects if 'seismic' in obj.Label.lower() or 'eq' in obj.Label.lower()]
-    
-    def find_snow_loads(self, doc):
-        """Find all snow loads in the document"""
-        return [obj for obj in doc.Objects if 'snow' in obj.Label.lower() or 'sl' in obj.Label.lower()]
-    
-    def scale_load(self, load_obj, factor):
-        """Scale a load object by the given factor"""
-        try:
-            if hasattr(load_obj, 'NodalLoading'):
-                load_obj.NodalLoading = load_obj.NodalLoading * factor
-            elif hasattr(load_obj, 'DistributedLoading'):
-                load_obj.DistributedLoading = load_obj.DistributedLoading * factor
-            elif hasattr(load_obj, 'LoadIntensity'):
-                load_obj.LoadIntensity = load_obj.LoadIntensity * factor
-                
-        except Exception as e:
-            print(f"Error scaling load {load_obj.Label}: {str(e)}")
-    
     def execute_analysis(self, calc_obj):
         """Execute the structural analysis"""
         try:
@@ -156,30 +86,27 @@ class CombinationAnalysisManager:
             print(f"Analysis execution error: {str(e)}")
             return False
     
-    def extract_results(self, calc_obj):
-        """Extract analysis results from the calc object"""
+    def extract_results(self, calc_obj, combination_obj):
+        """Extract the results of a load combination from the calc object"""
         try:
-            # This would extract actual results from the calc object
-            # For now, we'll return placeholder results
-            
-            results = {
-                'max_moment': 1000.0,  # Would be extracted from actual analysis
-                'max_shear': 500.0,
-                'max_axial': 2000.0,
-                'max_deflection': 0.05,
-                'critical_member': 'B1',
-                'max_stress': 250.0,
-                'max_displacement': 0.03
+            results = calc_obj.Proxy.results
+            j = results.combo_index[combination_obj.Name]
+            
+            # Largest absolute value of each result for every member in this combination
+            def peak(*diagrams):
+                return np.max([np.maximum(np.abs(results.min[diagram][:, j]), np.abs(results.max[diagram][:, j]))
+                               for diagram in diagrams], axis=0)
+            
+            moment = peak('My', 'Mz')
+            
+            return {
+                'max_moment': float(moment.max()),
+                'max_shear': float(peak('Fy', 'Fz').max()),
+                'max_axial': float(peak('Fx').max()),
+                'max_deflection': float(peak('dy', 'dz').max()),
+                'critical_member': results.members[int(moment.argmax())]
             }
             
-            # In a real implementation, this would:
-            # 1. Iterate through all members
-            # 2. Find maximum values for each result type
-            # 3. Identify critical members
-            # 4. Calculate safety factors
-            
-            return results
-            
         except Exception as e:
             print(f"Error extracting results: {str(e)}")
             return {}
@@ -67,54 +67,11 @@ class Diagram:
 		
 		return listMembers
 
-	# Gera uma matriz baseado em umdos parâmetros do calc
-	def getMatrix(self, param):
-		matriz = []
-		for linha in param:
-			lista = [float(value) for value in linha.split(',')]
-			matriz.append(lista)
-		
-		return matriz
-
-
-	#  Mapeia os nós da estrutura
-	def mapNodes(self, elements):	
-		# Varre todos os elementos de linha e adiciona seus vertices à tabela de nodes
-		listNodes = []
-		for element in elements:
-			for edge in element.Shape.Edges:
-				for vertex in edge.Vertexes:
-					node = [round(vertex.Point.x, 2), round(vertex.Point.y, 2), round(vertex.Point.z, 2)]
-					if not node in listNodes:
-						listNodes.append(node)
-
-		return listNodes
-
-
-	# Mapeia os membros da estrutura
-	def mapMembers(self, elements, listNodes):
-		listMembers = {}
-		for element in elements:
-			for i, edge in enumerate(element.Shape.Edges):
-				listIndexVertex = []
-				for vertex in edge.Vertexes:
-					node = [round(vertex.Point.x, 2), round(vertex.Point.y, 2), round(vertex.Point.z, 2)]
-					index = listNodes.index(node)
-					listIndexVertex.append(index)
-				# valida se o primeiro nó é mais auto do que o segundo nó, se sim inverte os nós do membro (necessário para manter os diagramas voltados para a posição correta)
-				n1 = listIndexVertex[0]
-				n2 = listIndexVertex[1]
-				if listNodes[n1][2] > listNodes[n2][2]:
-					aux = n1
-					n1 = n2
-					n2 = aux
-				listMembers[element.Name + '_' + str(i)] = {
-					'nodes': [str(n1), str(n2)],
-					'RotationSection': element.RotationSection.getValueAs('rad')
-				}
-		
-		return listMembers
-	
+	# Gera uma matriz (uma linha por barra) com um dos diagramas do calc ('Mz', 'Fy'...), lida direto do arquivo de resultados
+	def getMatrix(self, objCalc, diagram):
+		return objCalc.Proxy.diagramValues(objCalc, diagram)
+
+
 	# separa as ordenadas em grupos de valores positivos e negativos
 	def separatesOrdinates(self, values):
 		loops = []
@@ -218,14 +175,13 @@ class Diagram:
 
 
 	# Gera o diagrama da matriz passada como argumento
-	def makeDiagram(self, matrix,nodes, members, orderMembers, nPoints, rotacao, escale, fontHeight, precision, drawText):
+	def makeDiagram(self, matrix, topology, orderMembers, nPoints, rotacao, escale, fontHeight, precision, drawText):
 		
 		# e = 1e-11
 		listDiagram = []
 		for i, nameMember in orderMembers:
-			p1 = nodes[int(members[nameMember]['nodes'][0])]
-			p2 = nodes[int(members[nameMember]['nodes'][1])]
-			length = ((p2[0] - p1[0])**2 + (p2[1] - p1[1])**2 + (p2[2] - p1[2])**2)**0.5
+			p1 = topology['nodes'][topology['connectivity'][i][0]]
+			length = topology['lengths'][i]
 			dist = length / (nPoints -1) #Distancia entre os pontos no eixo X
 			values = [value * escale for value in matrix[i]]
 
@@ -235,15 +191,13 @@ class Diagram:
 			texts = self.makeText(values, matrix[i], dist, fontHeight, precision)
 			
 			# Posiciona o diagrama
-			dx = p2[0] - p1[0]
-			dy = p2[1] - p1[1]
-			dz = p2[2] - p1[2]
+			dx, dy, dz = topology['directions'][i]
 			element = Part.makeCompound(faces)
 			if drawText: element = Part.makeCompound([element] + texts) 
 
 			rot = FreeCAD.Rotation(FreeCAD.Vector(1,0,0), rotacao)
 			element.Placement = FreeCAD.Placement(FreeCAD.Vector(0,0,0), rot)
-			element = self.rotate(element, FreeCAD.Vector(1,0,0), FreeCAD.Vector(abs(dx), abs(dy), abs(dz)))
+			element = self.rotate(element, FreeCAD.Vector(1,0,0), FreeCAD.Vector(abs(float(dx)), abs(float(dy)), abs(float(dz))))
 
 			if dx < 0 :
 				element = element.mirror(FreeCAD.Vector(0,0,0), FreeCAD.Vector(1,0,0))
@@ -252,7 +206,7 @@ class Diagram:
 				element = element.mirror(FreeCAD.Vector(0,0,0), FreeCAD.Vector(0,1,0))
 
 			
-			element = element.translate(FreeCAD.Vector(p1[0], p1[1], p1[2]))
+			element = element.translate(FreeCAD.Vector(float(p1[0]), float(p1[1]), float(p1[2])))
 			
 			listDiagram.append(element)
 			# Part.show(element)
@@ -262,9 +216,9 @@ class Diagram:
 		
 		return listDiagram
 
-	def filterMembersSelected(self, obj):
+	def filterMembersSelected(self, obj, topology):
 		if obj.ObjectBaseElements == []: # se não existir objetos celecionados retorna to d a alista de objetos
-			return list(enumerate(obj.ObjectBaseCalc.NameMembers))
+			return list(enumerate(topology['members']))
 		
 		else: # caso haja objetos celecionados faz o filtro no nome destes objetos
 			listaNames = []
@@ -272,7 +226,7 @@ class Diagram:
 				listMemberNames = [int(name.split('Edge')[1])-1 for name in element[1]]
 				for memberName in listMemberNames:
 					name = element[0].Name +'_'+ str(memberName)
-					memberIndex = obj.ObjectBaseCalc.NameMembers.index(name)
+					memberIndex = topology['memberIndex'][name]
 					listaNames.append((memberIndex, name))
 			
 			return listaNames
@@ -281,29 +235,34 @@ class Diagram:
 
 
 	def execute(self, obj):
-		elements = list(filter(lambda element: 'Line' in element.Name or 'Wire' in element.Name,  obj.ObjectBaseCalc.ListElements))
-		nodes = self.mapNodes(elements)
-		members = self.mapMembers(elements, nodes)
-		orderMembers = self.filterMembersSelected(obj)
+		# Sem resultados publicados pelo calc (documento antigo ou calc ainda não calculado) o diagrama atual é mantido
+		objCalc = obj.ObjectBaseCalc
+		if not objCalc.Proxy.hasResults(objCalc):
+			FreeCAD.Console.PrintWarning(f"{obj.Label}: {objCalc.Label} não tem resultados. Recalcule o objeto calc primeiro.\n")
+			return
+
+		# A topologia vem pronta do calc, então o diagrama não percorre a geometria dos elementos
+		topology = objCalc.Proxy.getTopology(objCalc)
+		orderMembers = self.filterMembersSelected(obj, topology)
 
 		listDiagram = []
 		if obj.MomentZ:
-			listDiagram += self.makeDiagram(self.getMatrix(obj.ObjectBaseCalc.MomentZ),nodes, members, orderMembers, obj.ObjectBaseCalc.NumPointsMoment, 0, obj.ScaleMoment, obj.FontHeight, obj.Precision, obj.DrawText)
+			listDiagram += self.makeDiagram(self.getMatrix(obj.ObjectBaseCalc, 'Mz'),topology, orderMembers, obj.ObjectBaseCalc.NumPointsMoment, 0, obj.ScaleMoment, obj.FontHeight, obj.Precision, obj.DrawText)
 		
 		if obj.MomentY:
-			listDiagram += self.makeDiagram(self.getMatrix(obj.ObjectBaseCalc.MomentY),nodes, members, orderMembers, obj.ObjectBaseCalc.NumPointsMoment, 90, obj.ScaleMoment, obj.FontHeight, obj.Precision, obj.DrawText)
+			listDiagram += self.makeDiagram(self.getMatrix(obj.ObjectBaseCalc, 'My'),topology, orderMembers, obj.ObjectBaseCalc.NumPointsMoment, 90, obj.ScaleMoment, obj.FontHeight, obj.Precision, obj.DrawText)
 		
 		if obj.ShearY:
-			listDiagram += self.makeDiagram(self.getMatrix(obj.ObjectBaseCalc.ShearY),nodes, members, orderMembers, obj.ObjectBaseCalc.NumPointsShear, 0, obj.ScaleShear, obj.FontHeight, obj.Precision, obj.DrawText)
+			listDiagram += self.makeDiagram(self.getMatrix(obj.ObjectBaseCalc, 'Fy'),topology, orderMembers, obj.ObjectBaseCalc.NumPointsShear, 0, obj.ScaleShear, obj.FontHeight, obj.Precision, obj.DrawText)
 
 		if obj.ShearZ:
-			listDiagram += self.makeDiagram(self.getMatrix(obj.ObjectBaseCalc.ShearZ),nodes, members, orderMembers, obj.ObjectBaseCalc.NumPointsShear, 90, obj.ScaleShear, obj.FontHeight, obj.Precision, obj.DrawText)
+			listDiagram += self.makeDiagram(self.getMatrix(obj.ObjectBaseCalc, 'Fz'),topology, orderMembers, obj.ObjectBaseCalc.NumPointsShear, 90, obj.ScaleShear, obj.FontHeight, obj.Precision, obj.DrawText)
 		
 		if obj.Torque:
-			listDiagram += self.makeDiagram(self.getMatrix(obj.ObjectBaseCalc.Torque),nodes, members, orderMembers, obj.ObjectBaseCalc.NumPointsTorque, 0, obj.ScaleTorque, obj.FontHeight, obj.Precision, obj.DrawText)
+			listDiagram += self.makeDiagram(self.getMatrix(obj.ObjectBaseCalc, 'Mx'),topology, orderMembers, obj.ObjectBaseCalc.NumPointsTorque, 0, obj.ScaleTorque, obj.FontHeight, obj.Precision, obj.DrawText)
 		
 		if obj.AxialForce:
-			listDiagram += self.makeDiagram(self.getMatrix(obj.ObjectBaseCalc.AxialForce),nodes, members, orderMembers, obj.ObjectBaseCalc.NumPointsAxial, 0, obj.ScaleAxial, obj.FontHeight, obj.Precision, obj.DrawText)
+			listDiagram += self.makeDiagram(self.getMatrix(obj.ObjectBaseCalc, 'Fx'),topology, orderMembers, obj.ObjectBaseCalc.NumPointsAxial, 0, obj.ScaleAxial, obj.FontHeight, obj.Precision, obj.DrawText)
 		
 		if not listDiagram:
 			shape = Part.Shape()
@@ -22,6 +22,10 @@ class LoadNodal:
         obj.addProperty("App::PropertyEnumeration", "GlobalDirection","Load","Global direction load")
         obj.GlobalDirection = ['+X','-X', '+Y','-Y', '+Z','-Z']
         obj.GlobalDirection = '-Z'
+
+        obj.addProperty("App::PropertyEnumeration", "LoadCase","Load","Load case used by the load combinations")
+        obj.LoadCase = ['DL', 'LL', 'WL', 'EQ', 'SL', 'TL', 'RL', 'CL']
+        obj.LoadCase = 'DL'
         
         print(selection)
         obj.ObjectBase = (selection[0], selection[1])
@@ -11,6 +11,30 @@ from unittest.mock import Mock, patch, MagicMock
 # Add the StructureTools path for testing
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
+
+def solved_frame_results():
+    """Solves a two member frame with a dead and a live load for two combinations and returns the
+    batch member results, like the ones Calc keeps on its proxy"""
+    from freecad.StructureTools.Pynite_main.FEModel3D import FEModel3D
+
+    model = FEModel3D()
+    model.add_node('N1', 0, 0, 0)
+    model.add_node('N2', 2, 0, 0)
+    model.add_node('N3', 2, 0, 3)
+    model.add_material('Steel', 200e6, 77e6, 0.3, 78.5)
+    model.add_section('W', 0.01, 1e-4, 2e-4, 1e-6)
+    model.add_member('B1', 'N1', 'N2', 'Steel', 'W')
+    model.add_member('B2', 'N2', 'N3', 'Steel', 'W')
+    model.def_support('N1', True, True, True, True, True, True)
+    model.add_node_load('N2', 'FY', -10, case='DL')
+    model.add_node_load('N2', 'FY', -5, case='LL')
+    model.add_load_combo('Combination', {'DL': 1.2, 'LL': 1.6})
+    model.add_load_combo('Combination001', {'DL': 0.9})
+    model.analyze_linear()
+
+    return model.member_results()
+
+
 class TestLoadCombination(unittest.TestCase):
     """Test cases for LoadCombination class"""
     
@@ -356,7 +380,31 @@ class TestCombinationAnalysisManager(unittest.TestCase):
         
         # Verify results are stored in internal tracking
         self.assertIn(self.mock_combination.CombinationName, self.manager.analysis_results)
-    
+
+    def test_extract_results(self):
+        """Test reading one combination's results from the calc object"""
+        self.mock_calc.Proxy.results = solved_frame_results()
+        self.mock_combination.Name = 'Combination'
+
+        results = self.manager.extract_results(self.mock_calc, self.mock_combination)
+
+        # B1 carries the 1.2*10 + 1.6*5 tip load as a cantilever, B2 is unloaded
+        self.assertAlmostEqual(results['max_shear'], 20.0)
+        self.assertAlmostEqual(results['max_moment'], 40.0)
+        self.assertEqual(results['critical_member'], 'B1')
+        self.assertNotIn('max_displacement', results)
+
+    def test_run_analysis_excluded_combination(self):
+        """Test a combination missing from the Calc results is reported as a failure"""
+        self.mock_calc.Proxy.results = solved_frame_results()
+        self.mock_combination.Name = 'Combination002'
+
+        success, message = self.manager.run_combination_analysis(self.mock_combination, self.mock_calc)
+
+        self.assertFalse(success)
+        self.assertIn('not included in the Calc analysis', message)
+        self.assertNotIn(self.mock_combination.CombinationName, self.manager.analysis_results)
+
     def test_find_critical_combination_moment(self):
         """Test finding critical combination based on moment"""
         # Create multiple combinations with different results
@@ -463,16 +511,20 @@ class TestLoadCombinationIntegration(unittest.TestCase):
         combo = makeLoadCombination()
         self.assertIsNotNone(combo)
         
-        # Mock calc object
+        combo.Name = 'Combination'
+        combo.CombinationFormula = '1.2DL + 1.6LL'
+        
+        # Mock calc object holding the results of an analysis that included the combination
         mock_calc = Mock()
         mock_calc.Proxy = Mock()
         mock_calc.Proxy.execute = Mock()
+        mock_calc.Proxy.results = solved_frame_results()
         
-        # Test analysis (this will use placeholder results)
+        # Test analysis
         success, message = combination_analysis_manager.run_combination_analysis(combo, mock_calc)
         
-        # Should succeed with mock data
-        self.assertTrue(success)
+        self.assertTrue(success, message)
+        self.assertAlmostEqual(combo.MaxMoment, 40.0)
     
     def test_full_workflow_with_export(self):
         """Test complete workflow including export"""
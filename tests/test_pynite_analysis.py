@@ -0,0 +1,959 @@
+# Test Cases for the Pynite Analysis Engine
+# Tests for global matrix assembly and the linear solution path
+
+import unittest
+import sys
+import os
+
+import numpy as np
+from unittest.mock import patch
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from freecad.StructureTools.Pynite_main.FEModel3D import FEModel3D
+from freecad.StructureTools.Pynite_main.SegmentTable import SegmentTable
+from freecad.StructureTools.Pynite_main.Solvers import ConjugateGradient, DenseLU, LowRankUpdate
+from freecad.StructureTools.Pynite_main.Analysis import _partition_D, _partition, \
+    _sparsity_pattern, _element_values, _member_Kg
+
+
+def build_frame(tension_only=False):
+    """Builds a small two-bay, two-storey space frame with releases, springs and braces"""
+    model = FEModel3D()
+    model.add_material('Steel', 29000, 11200, 0.3, 2.836e-4)
+    model.add_section('W', 10, 100, 150, 5)
+
+    for i in range(3):
+        for j in range(2):
+            for level in range(3):
+                model.add_node(f'N{i}{j}{level}', i*120.0, level*144.0, j*180.0)
+
+    for i in range(3):
+        for j in range(2):
+            for level in range(2):
+                model.add_member(f'C{i}{j}{level}', f'N{i}{j}{level}', f'N{i}{j}{level + 1}',
+                                 'Steel', 'W', rotation=15*i)
+            model.def_support(f'N{i}{j}0', True, True, True, True, True, True)
+
+    for level in (1, 2):
+        for j in range(2):
+            for i in range(2):
+                model.add_member(f'BX{i}{j}{level}', f'N{i}{j}{level}', f'N{i + 1}{j}{level}',
+                                 'Steel', 'W')
+        for i in range(3):
+            model.add_member(f'BZ{i}{level}', f'N{i}0{level}', f'N{i}1{level}', 'Steel', 'W')
+
+    model.add_member('BR1', 'N000', 'N101', 'Steel', 'W', tension_only=tension_only)
+    model.add_member('BR2', 'N100', 'N001', 'Steel', 'W', tension_only=tension_only)
+    model.def_releases('BX001', Ryi=True, Rzi=True)
+    model.add_spring('S1', 'N002', 'N112', 300.0)
+    model.def_support_spring('N202', 'DZ', 50.0)
+
+    model.add_node_load('N102', 'FX', 10, case='W')
+    model.add_node_load('N201', 'MZ', 50, case='D')
+    model.add_member_dist_load('BX012', 'FY', -0.1, -0.1, case='D')
+    model.add_member_pt_load('BZ11', 'FY', -5, 60, case='L')
+
+    model.add_load_combo('1.4D', {'D': 1.4})
+    model.add_load_combo('1.2D+1.6L', {'D': 1.2, 'L': 1.6})
+    model.add_load_combo('1.2D+L+W', {'D': 1.2, 'L': 1.0, 'W': 1.0})
+    model.add_load_combo('0.9D-W', {'D': 0.9, 'W': -1.0})
+
+    return model
+
+
+def reference_K(model, combo_name):
+    """Assembles the global stiffness matrix one element term at a time"""
+    K = np.zeros((len(model.nodes)*6, len(model.nodes)*6))
+
+    for node in model.nodes.values():
+        for i, attr in enumerate(('spring_DX', 'spring_DY', 'spring_DZ',
+                                  'spring_RX', 'spring_RY', 'spring_RZ')):
+            spring = getattr(node, attr)
+            if spring[0] is not None and spring[2]:
+                K[node.ID*6 + i, node.ID*6 + i] += spring[0]
+
+    elements = [spring for spring in model.springs.values() if spring.active[combo_name]]
+    for phys_member in model.members.values():
+        if phys_member.active[combo_name]:
+            elements.extend(phys_member.sub_members.values())
+
+    for element in elements:
+        dofs = [element.i_node.ID*6 + a for a in range(6)] + \
+               [element.j_node.ID*6 + a for a in range(6)]
+        K[np.ix_(dofs, dofs)] += element.K()
+
+    return K
+
+
+def reference_reactions(model, node_name, combo_name):
+    """Sums the element end forces and nodal loads at a supported node"""
+    node = model.nodes[node_name]
+    R = np.zeros(6)
+    for spring in model.springs.values():
+        if spring.active[combo_name]:
+            for offset, end in ((0, spring.i_node), (6, spring.j_node)):
+                if end is node:
+                    R += spring.F(combo_name)[offset:offset + 6, 0]
+    for phys_member in model.members.values():
+        if phys_member.active[combo_name]:
+            for member in phys_member.sub_members.values():
+                for offset, end in ((0, member.i_node), (6, member.j_node)):
+                    if end is node:
+                        R += member.F(combo_name)[offset:offset + 6, 0]
+    for direction, P, case in node.NodeLoads:
+        R[('FX', 'FY', 'FZ', 'MX', 'MY', 'MZ').index(direction)] -= \
+            P*model.load_combos[combo_name].factors.get(case, 0.0)
+    supported = (node.support_DX, node.support_DY, node.support_DZ,
+                 node.support_RX, node.support_RY, node.support_RZ)
+    return np.where(supported, R, 0.0)
+
+
+class TestStiffnessAssembly(unittest.TestCase):
+    """Test the vectorized global stiffness matrix assembly"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.model = build_frame(tension_only=True)
+        self.model.analyze_linear()
+
+    def test_matches_element_by_element_assembly(self):
+        """Test the assembled matrix matches a term-by-term assembly"""
+        K = self.model.K('1.4D').toarray()
+        np.testing.assert_allclose(K, reference_K(self.model, '1.4D'), rtol=1e-12, atol=1e-9)
+
+    def test_dense_and_sparse_agree(self):
+        """Test the dense and sparse assembly paths give the same matrix"""
+        K_sparse = self.model.K('1.4D', sparse=True).toarray()
+        K_dense = self.model.K('1.4D', sparse=False)
+        np.testing.assert_allclose(K_sparse, K_dense)
+
+    def test_inactive_members_are_excluded(self):
+        """Test members deactivated for a combination are left out of the matrix"""
+        self.model.members['BR1'].active['0.9D-W'] = False
+        K = self.model.K('0.9D-W').toarray()
+        np.testing.assert_allclose(K, reference_K(self.model, '0.9D-W'), rtol=1e-12, atol=1e-9)
+        self.assertFalse(np.allclose(K, self.model.K('1.4D').toarray()))
+
+
+class TestMemberBatch(unittest.TestCase):
+    """Test the batched member stiffness, condensation and transformation kernel"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.model = build_frame()
+        self.model.def_releases('BZ12', Dxj=True, Ryj=True, Rzj=True)
+        self.model.analyze_linear()
+        self.batch = self.model._member_batch
+
+    def unbatched(self, member):
+        """Returns a member's matrices computed without the batched views"""
+        member._T = member._T_inv = member._k = member._K = member._fer_op = None
+        return member.T(), member.k(), member.K(), member.fer('1.2D+1.6L')
+
+    def test_matches_member_by_member_results(self):
+        """Test the batched matrices match those computed one member at a time"""
+        for i, member in enumerate(self.batch.members):
+            fer = member.fer('1.2D+1.6L')
+            T, k, K, fer_ref = self.unbatched(member)
+            np.testing.assert_allclose(self.batch.T[i], T, atol=1e-12)
+            np.testing.assert_allclose(self.batch.k[i], k, rtol=1e-10, atol=1e-8)
+            np.testing.assert_allclose(self.batch.K[i], K, rtol=1e-10, atol=1e-8)
+            np.testing.assert_allclose(fer, fer_ref, rtol=1e-10, atol=1e-10)
+
+    def test_released_dofs_are_condensed_out(self):
+        """Test released DOFs have no stiffness in the condensed matrices"""
+        member = self.model.members['BZ12'].sub_members['BZ12a']
+        i = self.batch.members.index(member)
+        for dof in (6, 10, 11):
+            self.assertTrue(np.allclose(self.batch.k[i][dof, :], 0.0))
+            self.assertTrue(np.allclose(self.batch.k[i][:, dof], 0.0))
+
+
+class TestGeometricStiffness(unittest.TestCase):
+    """Test the geometric stiffness scaled from the batched unit matrices"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.model = build_frame()
+        self.model.analyze_PDelta()
+        self.batch = self.model._member_batch
+
+    def test_matches_member_by_member_results(self):
+        """Test the scaled matrices match those computed one member at a time"""
+        combo_name = '1.2D+L+W'
+        Kg = _member_Kg(self.model, combo_name, first_step=False)
+        for i, member in enumerate(self.batch.members):
+            d = member.d(combo_name)
+            P = member.material.E*member.section.A/member.L()*(d[6, 0] - d[0, 0])
+            member._kg_unit = None
+            np.testing.assert_allclose(Kg[i], member.Kg(P), rtol=1e-10, atol=1e-10)
+
+    def test_released_member_is_linear_in_P(self):
+        """Test condensing the unit matrix gives the condensed matrix for any axial force"""
+        member = self.model.members['BX001'].sub_members['BX001a']
+        kg_unit = member._kg_unit
+        member._kg_unit = None
+        np.testing.assert_allclose(kg_unit*-12.5, member.kg(-12.5), rtol=1e-10, atol=1e-12)
+
+
+class TestSparsityPattern(unittest.TestCase):
+    """Test the reusable partitioned stiffness matrix structure"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.model = build_frame(tension_only=True)
+        self.model.analyze_linear()
+        self.D1_indices, self.D2_indices, D2 = _partition_D(self.model)
+        self.pattern = _sparsity_pattern(self.model)
+
+    def assert_partitions_match(self, combo_name):
+        """Checks a refilled pattern against partitions sliced from the global matrix"""
+        partitions = self.pattern.assemble(_element_values(self.model, combo_name))
+        expected = _partition(self.model, self.model.K(combo_name).tocsr(),
+                              self.D1_indices, self.D2_indices)
+        for K, K_ref in zip(partitions, expected):
+            np.testing.assert_allclose(K.toarray(), K_ref.toarray(), rtol=1e-12, atol=1e-9)
+        return partitions
+
+    def test_refill_matches_partitioned_matrix(self):
+        """Test refilled partitions match those sliced from the global matrix"""
+        self.assert_partitions_match('1.4D')
+
+    def test_inactive_members_are_zeroed_in_place(self):
+        """Test deactivating a member changes values but not the structure"""
+        K11 = self.assert_partitions_match('1.4D')[0]
+        nnz = K11.nnz
+        self.model.members['BR1'].active['0.9D-W'] = False
+        self.model.springs['S1'].active['0.9D-W'] = False
+        self.assertIs(self.assert_partitions_match('0.9D-W')[0], K11)
+        self.assertEqual(K11.nnz, nnz)
+
+    def test_pattern_is_reused_until_topology_changes(self):
+        """Test the pattern is only rebuilt when the model changes"""
+        self.model.analyze()
+        self.assertIs(self.model._sparsity_pattern, self.pattern)
+        self.model.add_node('N300', 360.0, 0.0, 0.0)
+        self.model.add_member('BX300', 'N200', 'N300', 'Steel', 'W')
+        self.model.def_support('N300', True, True, True, True, True, True)
+        self.model.analyze()
+        self.assertIsNot(self.model._sparsity_pattern, self.pattern)
+
+    def test_dense_and_sparse_p_delta_agree(self):
+        """Test the refilled P-Delta matrices give the same result on both solver paths"""
+        sparse = build_frame(tension_only=True)
+        sparse.analyze_PDelta(sparse=True)
+        dense = build_frame(tension_only=True)
+        dense.analyze_PDelta(sparse=False)
+        for combo_name in sparse.load_combos:
+            np.testing.assert_allclose(sparse.D(combo_name), dense.D(combo_name),
+                                       rtol=1e-9, atol=1e-12)
+
+
+class TestPDeltaConvergence(unittest.TestCase):
+    """Test P-Delta analysis iterated to a displacement and force tolerance"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.reference = build_frame(tension_only=True)
+        self.reference.analyze_PDelta(tol=1e-10, method='full')
+
+    def test_methods_converge_to_the_same_solution(self):
+        """Test the modified Newton and Aitken schemes match full refactoring"""
+        for method in ('newton', 'aitken'):
+            model = build_frame(tension_only=True)
+            report = model.analyze_PDelta(tol=1e-10, method=method)
+            for combo_name in model.load_combos:
+                self.assertTrue(report[combo_name]['converged'])
+                self.assertLessEqual(report[combo_name]['force_norm'], 1e-10)
+                np.testing.assert_allclose(model.D(combo_name), self.reference.D(combo_name),
+                                           rtol=1e-7, atol=1e-9)
+
+    def test_modified_newton_reuses_the_factorization(self):
+        """Test the modified Newton scheme factors less often than it solves"""
+        model = build_frame(tension_only=True)
+        report = model.analyze_PDelta(tol=1e-10, method='newton')
+        for combo_name, combo_report in report.items():
+            full = self.reference.pdelta_report[combo_name]
+            self.assertEqual(full['factorizations'], full['solves'])
+            self.assertLess(combo_report['factorizations'], combo_report['solves'])
+
+    def test_default_is_unchanged(self):
+        """Test the default analysis is still a single geometric stiffness update"""
+        model = build_frame()
+        report = model.analyze_PDelta()
+        for combo_report in report.values():
+            self.assertIsNone(combo_report['method'])
+            self.assertEqual(combo_report['solves'], 2)
+
+    def test_unknown_method_raises(self):
+        """Test an unknown iteration scheme is reported"""
+        with self.assertRaises(ValueError):
+            build_frame().analyze_PDelta(tol=1e-6, method='secant')
+
+
+class TestParallelCombos(unittest.TestCase):
+    """Test load combinations solved in worker processes"""
+
+    def assertSameResults(self, sequential, parallel):
+        """Checks the merged results match a sequential analysis"""
+        for combo_name in sequential.load_combos:
+            np.testing.assert_allclose(parallel.D(combo_name), sequential.D(combo_name),
+                                       rtol=1e-9, atol=1e-12)
+            for name, node in sequential.nodes.items():
+                reactions = [[getattr(model.nodes[name], 'Rxn' + direction)[combo_name]
+                              for direction in ('FX', 'FY', 'FZ', 'MX', 'MY', 'MZ')]
+                             for model in (parallel, sequential)]
+                np.testing.assert_allclose(*reactions, rtol=1e-8, atol=1e-8)
+            for name, member in sequential.members.items():
+                self.assertEqual(parallel.members[name].active[combo_name], member.active[combo_name])
+                self.assertAlmostEqual(parallel.members[name].max_moment('Mz', combo_name),
+                                       member.max_moment('Mz', combo_name))
+
+    def test_tension_only_analysis(self):
+        """Test parallel tension/compression-only analysis matches a sequential analysis"""
+        sequential = build_frame(tension_only=True)
+        sequential.analyze()
+        parallel = build_frame(tension_only=True)
+        parallel.analyze(workers=2)
+        self.assertSameResults(sequential, parallel)
+        self.assertEqual(parallel.solution, 'Linear TC')
+        self.assertEqual(parallel.solver_stats['workers'], 2)
+
+    def test_p_delta_analysis(self):
+        """Test parallel P-Delta analysis matches a sequential analysis"""
+        sequential = build_frame(tension_only=True)
+        sequential.analyze_PDelta(tol=1e-8)
+        parallel = build_frame(tension_only=True)
+        report = parallel.analyze_PDelta(tol=1e-8, workers=2)
+        self.assertSameResults(sequential, parallel)
+        self.assertEqual(set(report), set(sequential.load_combos))
+
+
+class TestResultStore(unittest.TestCase):
+    """Test the columnar store behind the nodal result dictionaries"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.model = build_frame()
+        self.model.analyze_linear()
+        self.store = self.model._results
+
+    def test_node_views_read_the_displacement_matrix(self):
+        """Test node displacements are read from the model's displacement vectors"""
+        for combo_name in self.model.load_combos:
+            D = self.model.D(combo_name)
+            for node in self.model.nodes.values():
+                for i, direction in enumerate(('DX', 'DY', 'DZ', 'RX', 'RY', 'RZ')):
+                    self.assertEqual(getattr(node, direction)[combo_name], D[node.ID*6 + i, 0])
+        self.assertEqual(set(self.model.nodes['N101'].DX), set(self.model.load_combos))
+        self.assertEqual(self.store.D.shape, (len(self.model.nodes)*6, len(self.model.load_combos)))
+
+    def test_reactions_are_only_stored_at_supports(self):
+        """Test reactions are stored for supported DOFs and read as zero elsewhere"""
+        self.assertEqual(self.store.R.shape[0], 6*6 + 1)
+        self.assertEqual(self.model.nodes['N101'].RxnFX['1.4D'], 0.0)
+        self.assertNotEqual(self.model.nodes['N000'].RxnFY['1.4D'], 0.0)
+        with self.assertRaises(KeyError):
+            self.model.nodes['N000'].RxnFY['Unsolved']
+
+    def test_views_write_through(self):
+        """Test assigning to a node view updates the model's displacement vector"""
+        node = self.model.nodes['N101']
+        node.DY['1.4D'] += 1.0
+        self.assertEqual(self.model.D('1.4D')[node.ID*6 + 1, 0], node.DY['1.4D'])
+
+    def test_store_grows(self):
+        """Test new load combinations are added beyond the allocated columns"""
+        for k in range(10):
+            self.model._D[f'Extra {k}'] = np.full((len(self.model.nodes)*6, 1), float(k))
+        self.assertEqual(self.model.nodes['N101'].DZ['Extra 7'], 7.0)
+        self.assertEqual(self.model.nodes['N101'].DZ['1.4D'], self.model.D('1.4D')[
+            self.model.nodes['N101'].ID*6 + 2, 0])
+
+
+class TestSegmentCache(unittest.TestCase):
+    """Test the per load combination cache of member segments"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.model = build_frame()
+        self.model.analyze_linear()
+        self.member = self.model.members['BX012'].sub_members['BX012a']
+
+    def test_alternating_queries_reuse_segments(self):
+        """Test switching between load combinations doesn't resegment the member"""
+        expected = {combo_name: self.member.max_moment('Mz', combo_name) for combo_name in self.model.load_combos}
+        with patch.object(self.member, '_segment_member', wraps=self.member._segment_member) as segment:
+            for _ in range(3):
+                for combo_name in self.model.load_combos:
+                    self.assertEqual(self.member.max_moment('Mz', combo_name), expected[combo_name])
+            segment.assert_not_called()
+
+    def test_changes_invalidate_segments(self):
+        """Test the segments are rebuilt when the loads or solution change"""
+        M = self.member.max_moment('Mz', '1.4D')
+        self.member.DistLoads.append(('Fy', -0.1, -0.1, 0.0, self.member.L(), 'D'))
+        self.assertNotAlmostEqual(self.member.max_moment('Mz', '1.4D'), M)
+        self.member.DistLoads.pop()
+        self.assertAlmostEqual(self.member.max_moment('Mz', '1.4D'), M)
+
+        # Reanalysis creates new sub-members, but the physical member must not return stale results
+        self.model.add_member_dist_load('BX012', 'FY', -0.1, -0.1, case='D')
+        self.model.analyze_linear()
+        self.assertNotAlmostEqual(self.model.members['BX012'].max_moment('Mz', '1.4D'), M)
+
+    def test_cache_is_bounded(self):
+        """Test the least recently used segments are dropped beyond the cache limits"""
+        with patch.object(type(self.member), 'segment_cache_size', 2):
+            for combo_name in self.model.load_combos:
+                self.member.max_moment('Mz', combo_name)
+            self.assertEqual(list(self.member._segment_cache), list(self.model.load_combos)[-2:])
+        with patch.object(type(self.member), 'segment_cache_memory', 0):
+            self.member.max_moment('Mz', '1.4D')
+            self.assertEqual(list(self.member._segment_cache), ['1.4D'])
+        self.assertEqual(self.member._segment_cache_bytes, self.member._segment_cache['1.4D'][4])
+
+
+class TestSegmentTable(unittest.TestCase):
+    """Test the vectorized segment tables against the segment objects"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.model = build_frame()
+        self.model.add_member_pt_load('BX012', 'Fy', -3, 40, case='D')
+        self.model.add_member_dist_load('BX012', 'Fz', 0.05, 0.2, 20, 100, case='L')
+        self.model.add_member_dist_load('BX012', 'Fx', 0.01, 0.03, 10, 90, case='L')
+        self.model.analyze_linear()
+        self.member = self.model.members['BX012'].sub_members['BX012a']
+        self.member._segments('1.2D+1.6L')
+
+    def test_results_match_segments(self):
+        """Test every result matches the segment objects, point by point"""
+        for segments, axis in ((self.member.SegmentsZ, 'Z'), (self.member.SegmentsY, 'Y')):
+            table = SegmentTable(segments, axis)
+            self.assertEqual(table.data.shape, (len(segments), 13))
+            for i, segment in enumerate(segments):
+                x = np.linspace(0, segment.x2 - segment.x1, 7)
+                index = np.full(len(x), i)
+                for result, method in (('shear', 'Shear'), ('moment', 'moment'), ('axial', 'axial'),
+                                       ('deflection', 'deflection'), ('axial_deflection', 'AxialDeflection')):
+                    expected = getattr(segment, method)(x)
+                    np.testing.assert_allclose(getattr(table, result)(index, x), expected,
+                                               rtol=1e-9, atol=1e-9*max(np.abs(expected).max(), 1e-12))
+                np.testing.assert_allclose(table.moment(index, x, True),
+                                           [segment.moment(xi, True) for xi in x], rtol=1e-9)
+                np.testing.assert_allclose(table.deflection(index, x, True),
+                                           [segment.deflection(xi, True) for xi in x], rtol=1e-9)
+
+    def test_extremes_match_segments(self):
+        """Test the closed-form extremes match the segment by segment search"""
+        for segments, axis in ((self.member.SegmentsZ, 'Z'), (self.member.SegmentsY, 'Y')):
+            table = SegmentTable(segments, axis)
+            for result, maximum, minimum in (('shear', 'max_shear', 'min_shear'),
+                                             ('moment', 'max_moment', 'min_moment'),
+                                             ('axial', 'max_axial', 'min_axial')):
+                low, high = table.extremes(result)
+                self.assertAlmostEqual(high, max(getattr(segment, maximum)() for segment in segments))
+                self.assertAlmostEqual(low, min(getattr(segment, minimum)() for segment in segments))
+
+    def test_array_queries_match_point_queries(self):
+        """Test array queries match point queries away from the segment boundaries"""
+        x = np.linspace(0.5, self.member.L() - 0.5, 40)
+        for Direction, method in (('Mz', 'moment'), ('My', 'moment'), ('Fy', 'shear'), ('Fz', 'shear')):
+            values = getattr(self.member, method + '_array')(Direction, 40, '1.2D+1.6L', x)[1]
+            np.testing.assert_allclose(values, [getattr(self.member, method)(Direction, xi, '1.2D+1.6L') for xi in x])
+        values = self.member.deflection_array('dz', 40, '1.2D+1.6L', x)[1]
+        np.testing.assert_allclose(values, [self.member.deflection('dz', xi, '1.2D+1.6L') for xi in x])
+        self.assertIsNone(self.member.moment('Mz', self.member.L() + 1.0, '1.2D+1.6L'))
+
+
+class TestMemberResults(unittest.TestCase):
+    """Test batch extraction of member results"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.model = build_frame()
+        self.model.add_member_pt_load('BX012', 'Fy', -3, 40, case='D')
+        self.model.add_member_dist_load('BX012', 'Fz', 0.05, 0.2, 20, 100, case='L')
+
+    def assertMatchesMembers(self, results):
+        """Checks the batch results against the member methods"""
+        for name in results.members:
+            member = self.model.members[name]
+            for combo_name in results.combos:
+                for diagram, args in (('Fy', ('shear_array', 'Fy')), ('Fz', ('shear_array', 'Fz')),
+                                      ('My', ('moment_array', 'My')), ('Mz', ('moment_array', 'Mz')),
+                                      ('Fx', ('axial_array',)), ('Mx', ('torque_array',)),
+                                      ('dy', ('deflection_array', 'dy')), ('dz', ('deflection_array', 'dz'))):
+                    method, *direction = args
+                    expected = getattr(member, method)(*direction, 11, combo_name)
+                    np.testing.assert_array_equal(results.diagram(diagram, name, combo_name), expected)
+                for diagram, method, direction in (('Fy', 'shear', 'Fy'), ('Fz', 'shear', 'Fz'),
+                                                   ('My', 'moment', 'My'), ('Mz', 'moment', 'Mz'),
+                                                   ('Fx', 'axial', None), ('Mx', 'torque', None),
+                                                   ('dy', 'deflection', 'dy'), ('dz', 'deflection', 'dz')):
+                    direction = () if direction is None else (direction,)
+                    i, j = results.member_index[name], results.combo_index[combo_name]
+                    self.assertEqual(results.max[diagram][i, j], getattr(member, 'max_' + method)(*direction, combo_name))
+                    self.assertEqual(results.min[diagram][i, j], getattr(member, 'min_' + method)(*direction, combo_name))
+
+    def test_linear_results_match_members(self):
+        """Test every diagram and extreme value matches the member methods"""
+        self.model.analyze_linear()
+        results = self.model.member_results(n_points=11)
+        self.assertEqual(results.diagrams['Mz'].shape, (len(self.model.members), len(self.model.load_combos), 11))
+        self.assertMatchesMembers(results)
+
+    def test_pdelta_results_match_members(self):
+        """Test P-Delta results, including P-little-delta effects, match the member methods"""
+        self.model.analyze_PDelta()
+        self.assertMatchesMembers(self.model.member_results(['BX012', 'C000'], ['1.2D+1.6L'], n_points=11))
+
+    def test_points_by_diagram(self):
+        """Test the number of locations can be set for each diagram"""
+        self.model.analyze_linear()
+        results = self.model.member_results(diagrams=('Mz', 'dy'), n_points={'Mz': 5, 'dy': 9}, extremes=False)
+        self.assertEqual(results.x['Mz'].shape, (len(self.model.members), 5))
+        self.assertEqual(results.diagrams['dy'].shape[2], 9)
+        self.assertEqual(results.max, {})
+        with self.assertRaises(ValueError):
+            self.model.member_results(diagrams=('Vy',))
+        with self.assertRaises(ValueError):
+            self.model.member_results(n_points={'Mz': 5})
+
+
+class TestMemberEndForces(unittest.TestCase):
+    """Test the batched sub-member end forces"""
+
+    def assertMatchesMembers(self, model):
+        """Checks the batched end forces against `Member3D.f()`"""
+        combo_names = list(model.load_combos)
+        f = model.member_end_forces()
+        members = model._dof_tables['members'].elements
+        self.assertEqual(f.shape, (len(members), 12, len(combo_names)))
+        for member in members:
+            for j, combo_name in enumerate(combo_names):
+                np.testing.assert_allclose(f[member.ID, :, j], member.f(combo_name)[:, 0], rtol=1e-9, atol=1e-9)
+
+    def test_linear_end_forces(self):
+        """Test the end forces after a linear analysis"""
+        model = build_frame()
+        model.add_member_pt_load('BX012', 'Fy', -3, 40, case='D')
+        model.analyze_linear()
+        self.assertMatchesMembers(model)
+
+    def test_nonlinear_end_forces(self):
+        """Test the end forces of inactive members and P-Delta analyses"""
+        model = build_frame(tension_only=True)
+        model.analyze()
+        self.assertMatchesMembers(model)
+        model = build_frame()
+        model.analyze_PDelta()
+        self.assertMatchesMembers(model)
+
+    def test_cached_until_reanalysis(self):
+        """Test the end forces are reused until the displacements change"""
+        model = build_frame()
+        model.analyze_linear()
+        f = model.member_end_forces(['1.2D+1.6L'])
+        cached = model._end_forces['1.2D+1.6L'][1]
+        np.testing.assert_array_equal(model.member_end_forces(['1.2D+1.6L']), f)
+        self.assertIs(model._end_forces['1.2D+1.6L'][1], cached)
+        model.add_member_pt_load('BX012', 'Fy', -3, 40, case='D')
+        model.analyze_linear()
+        self.assertEqual(model._end_forces, {})
+        self.assertFalse(np.allclose(model.member_end_forces(['1.2D+1.6L']), f))
+
+
+class TestEnvelopes(unittest.TestCase):
+    """Test the envelope-only analysis mode"""
+
+    def assertMatchesEnvelope(self, envelopes, reference):
+        """Checks the envelopes against the results of a full analysis"""
+        combo_names = list(reference.load_combos)
+        nodes = sorted(reference.nodes.values(), key=lambda node: node.ID)
+        members = reference._dof_tables['members'].elements
+        tables = {'displacements': np.array([[[getattr(node, direction)[combo_name] for combo_name in combo_names]
+                                              for direction in ('DX', 'DY', 'DZ', 'RX', 'RY', 'RZ')] for node in nodes]),
+                  'reactions': np.array([[[getattr(node, 'Rxn' + direction)[combo_name] for combo_name in combo_names]
+                                          for direction in ('FX', 'FY', 'FZ', 'MX', 'MY', 'MZ')] for node in nodes]),
+                  'member_forces': np.stack([np.hstack([member.f(combo_name) for combo_name in combo_names])
+                                             for member in members])}
+
+        for key, values in tables.items():
+            envelope = envelopes[key]
+            scale = max(np.abs(values).max(), 1.0)
+            np.testing.assert_allclose(envelope.max, values.max(axis=2), rtol=1e-8, atol=1e-9*scale)
+            np.testing.assert_allclose(envelope.min, values.min(axis=2), rtol=1e-8, atol=1e-9*scale)
+            np.testing.assert_allclose(envelope.abs_max, np.abs(values).max(axis=2), rtol=1e-8, atol=1e-9*scale)
+
+            # The governing load combination gives the enveloped value, unless it is a near tie
+            governing = np.take_along_axis(values, envelope.max_combo[:, :, None], axis=2)[:, :, 0]
+            np.testing.assert_allclose(governing, values.max(axis=2), rtol=1e-8, atol=1e-9*scale)
+
+    def test_linear_envelope(self):
+        """Test the linear envelope matches a full linear analysis"""
+        reference = build_frame()
+        reference.analyze_linear()
+        model = build_frame()
+        envelopes = model.analyze_envelope(block_size=3)
+        self.assertMatchesEnvelope(envelopes, reference)
+        self.assertEqual(model.solution, 'Envelope')
+        self.assertEqual(len(model._results.columns), 0)
+
+        value, combo_name = envelopes['displacements'].governing('N102', 'DX', 'max')
+        self.assertEqual(combo_name, max(reference.load_combos, key=lambda name: reference.nodes['N102'].DX[name]))
+        self.assertEqual(value, reference.nodes['N102'].DX[combo_name])
+
+    def test_tension_only_envelope(self):
+        """Test the envelope of a tension-only analysis matches a full analysis"""
+        reference = build_frame(tension_only=True)
+        reference.analyze()
+        model = build_frame(tension_only=True)
+        envelopes = model.analyze_envelope('Linear TC', block_size=2)
+        self.assertMatchesEnvelope(envelopes, reference)
+        self.assertEqual(model.members['BR1'].active, {})
+
+    def test_p_delta_envelope(self):
+        """Test the P-Delta envelope matches a full P-Delta analysis"""
+        reference = build_frame()
+        reference.analyze_PDelta(tol=1e-10)
+        model = build_frame()
+        envelopes = model.analyze_envelope('P-Delta', tol=1e-10)
+        self.assertMatchesEnvelope(envelopes, reference)
+
+    def test_unknown_solution(self):
+        """Test an unknown solution type is rejected"""
+        with self.assertRaises(ValueError):
+            build_frame().analyze_envelope('Pushover')
+
+
+class TestReordering(unittest.TestCase):
+    """Test the optional node reordering applied when the model is numbered"""
+
+    def bandwidth(self, model, combo_name='Combo 1'):
+        """Returns the bandwidth of the model's free-DOF stiffness matrix"""
+        K11 = _sparsity_pattern(model).assemble(_element_values(model, combo_name))[0].tocoo()
+        return np.abs(K11.row - K11.col).max()
+
+    def test_reordered_results_match(self):
+        """Test reordering the nodes doesn't change the results"""
+        reference = build_frame(tension_only=True)
+        reference.analyze()
+        for method in ('rcm', 'min_degree'):
+            model = build_frame(tension_only=True)
+            model.reordering = method
+            model.analyze()
+            self.assertEqual(sorted(model._node_order), list(range(len(model.nodes))))
+            for combo_name in model.load_combos:
+                for node_name in ('N002', 'N112', 'N201'):
+                    self.assertAlmostEqual(model.nodes[node_name].DX[combo_name],
+                                           reference.nodes[node_name].DX[combo_name])
+                self.assertAlmostEqual(model.nodes['N000'].RxnMZ[combo_name],
+                                       reference.nodes['N000'].RxnMZ[combo_name], places=6)
+
+    def test_rcm_reduces_bandwidth(self):
+        """Test reverse Cuthill-McKee narrows the band of a poorly numbered model"""
+        model = FEModel3D()
+        model.add_material('Steel', 29000, 11200, 0.3, 2.836e-4)
+        model.add_section('W', 10, 100, 150, 5)
+        for i in (0, 10, 1, 9, 2, 8, 3, 7, 4, 6, 5):
+            model.add_node(f'N{i}', i*60.0, 0.0, 0.0)
+        for i in range(10):
+            model.add_member(f'M{i}', f'N{i}', f'N{i + 1}', 'Steel', 'W')
+        model.def_support('N0', True, True, True, True, True, True)
+        model.add_node_load('N10', 'FY', -1.0)
+        model.analyze_linear()
+        original = self.bandwidth(model)
+        DY = model.nodes['N10'].DY['Combo 1']
+
+        model.reordering = 'rcm'
+        model.analyze_linear()
+        self.assertLess(self.bandwidth(model), original)
+        self.assertAlmostEqual(model.nodes['N10'].DY['Combo 1'], DY)
+
+    def test_unknown_method_raises(self):
+        """Test an unrecognized reordering method is reported"""
+        model = build_frame()
+        model.reordering = 'amd'
+        with self.assertRaises(ValueError):
+            model.analyze_linear()
+
+
+class TestSolverBackends(unittest.TestCase):
+    """Test the pluggable linear solver backends"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.reference = build_frame(tension_only=True)
+        self.reference.analyze()
+
+    def assert_matches_reference(self, solver):
+        """Analyzes the frame with a backend and checks the displacements"""
+        model = build_frame(tension_only=True)
+        model.solver = solver
+        model.analyze()
+        for combo_name in model.load_combos:
+            np.testing.assert_allclose(model.D(combo_name), self.reference.D(combo_name),
+                                       rtol=1e-6, atol=1e-9)
+        return model.solver_stats
+
+    def test_backends_match_sparse_lu(self):
+        """Test every backend gives the same displacements"""
+        for solver in ('lu', 'symmetric', 'dense', 'cg', ConjugateGradient('jacobi')):
+            with self.subTest(solver=solver):
+                stats = self.assert_matches_reference(solver)
+                self.assertGreater(stats['factorizations'], 0)
+                self.assertGreaterEqual(stats['solves'], stats['factorizations'])
+                self.assertGreater(stats['memory'], 0)
+                self.assertGreaterEqual(stats['factor_time'], 0.0)
+
+    def test_cg_accepts_older_scipy_tolerance_argument(self):
+        """Test the iterative backend passes `tol` to SciPy releases older than 1.12"""
+        from scipy.sparse.linalg import cg
+
+        def legacy_cg(A, b, x0=None, tol=1e-5, maxiter=None, M=None, atol=None):
+            return cg(A, b, x0=x0, rtol=tol, maxiter=maxiter, M=M, atol=atol)
+
+        with patch('scipy.sparse.linalg.cg', legacy_cg):
+            self.assert_matches_reference('cg')
+
+    def test_auto_selects_dense_for_small_models(self):
+        """Test auto mode picks the dense backend for a small model"""
+        self.assertEqual(self.assert_matches_reference('auto')['backend'], 'dense')
+
+    def test_stats_are_reset_between_analyses(self):
+        """Test statistics only cover the latest analysis"""
+        model = build_frame()
+        model.solver = 'lu'
+        model.analyze_linear()
+        model.analyze_linear()
+        self.assertEqual(model.solver_stats['factorizations'], 1)
+
+    def test_unknown_backend_raises(self):
+        """Test an unrecognized backend name is reported"""
+        model = build_frame()
+        model.solver = 'qr'
+        with self.assertRaises(ValueError):
+            model.analyze_linear()
+
+
+class TestLowRankUpdates(unittest.TestCase):
+    """Test the low-rank stiffness updates used by tension/compression-only iterations"""
+
+    def test_woodbury_solution_matches_direct_solution(self):
+        """Test a low-rank corrected solve matches solving the corrected matrix directly"""
+        rng = np.random.default_rng(1)
+        A = rng.normal(size=(20, 20)) + 20*np.eye(20)
+        idx = np.array([2, 5, 11])
+        S = rng.normal(size=(3, 3))
+        b = rng.normal(size=(20, 2))
+        solver = LowRankUpdate(DenseLU().factor(A), 20)
+        solver.update(idx, S)
+        corrected = A.copy()
+        corrected[np.ix_(idx, idx)] += S
+        np.testing.assert_allclose(solver(b), np.linalg.solve(corrected, b), rtol=1e-10)
+
+    def test_updates_match_refactoring(self):
+        """Test T/C results with low-rank updates match refactoring on every iteration"""
+        updated = build_frame(tension_only=True)
+        updated.analyze()
+        refactored = build_frame(tension_only=True)
+        refactored.analyze(max_update_rank=0)
+        for combo_name in updated.load_combos:
+            np.testing.assert_allclose(updated.D(combo_name), refactored.D(combo_name),
+                                       rtol=1e-8, atol=1e-12)
+        self.assertEqual(updated.solver_stats['factorizations'], 1)
+        self.assertGreater(refactored.solver_stats['factorizations'], 1)
+
+    def test_refactors_past_the_rank_threshold(self):
+        """Test the matrix is refactored once an update touches too many DOFs"""
+        model = build_frame(tension_only=True)
+        model.analyze(max_update_rank=6)
+        self.assertGreater(model.solver_stats['factorizations'], 1)
+
+    def test_reanalysis_reuses_factorization(self):
+        """Test a linear reanalysis after a load change reuses the last factorization"""
+        model = build_frame()
+        model.analyze_linear(max_update_rank=120)
+        model.delete_loads()
+        model.add_node_load('N102', 'FX', 25, case='W')
+        model.add_member_pt_load('BZ11', 'FY', -8, 60, case='L')
+        model.analyze_linear(max_update_rank=120)
+        self.assertEqual(model.solver_stats['factorizations'], 1)
+        reference = build_frame()
+        reference.delete_loads()
+        reference.add_node_load('N102', 'FX', 25, case='W')
+        reference.add_member_pt_load('BZ11', 'FY', -8, 60, case='L')
+        reference.analyze_linear()
+        for combo_name in model.load_combos:
+            np.testing.assert_allclose(model.D(combo_name), reference.D(combo_name), rtol=1e-10, atol=1e-14)
+
+    def test_reanalysis_updates_edited_members(self):
+        """Test a linear reanalysis applies edited members as a low-rank update, and refactors
+        when supports change"""
+        model = build_frame()
+        model.analyze_linear(max_update_rank=120)
+        model.def_releases('BZ11', Ryj=True, Rzj=True)
+        model.analyze_linear(max_update_rank=120)
+        self.assertEqual(model.solver_stats['factorizations'], 1)
+        reference = build_frame()
+        reference.def_releases('BZ11', Ryj=True, Rzj=True)
+        reference.analyze_linear()
+        for combo_name in model.load_combos:
+            np.testing.assert_allclose(model.D(combo_name), reference.D(combo_name), rtol=1e-8, atol=1e-12)
+        model.def_support('N102', support_DX=True)
+        model.analyze_linear(max_update_rank=120)
+        self.assertEqual(model.solver_stats['factorizations'], 2)
+
+
+class TestStabilityCheck(unittest.TestCase):
+    """Test the vectorized nodal stability check"""
+
+    def unstable_model(self):
+        """Returns a beam whose free end can rotate freely about its own axis"""
+        model = FEModel3D()
+        model.add_material('Steel', 29000, 11200, 0.3, 2.836e-4)
+        model.add_section('W', 10, 100, 150, 5)
+        model.add_node('A', 0, 0, 0)
+        model.add_node('B', 120, 0, 0)
+        model.add_node('C', 240, 0, 0)
+        model.add_member('M1', 'A', 'B', 'Steel', 'W')
+        model.add_member('M2', 'B', 'C', 'Steel', 'W')
+        model.def_releases('M2', Rxi=True)
+        model.def_support('A', True, True, True, True, True, True)
+        model.add_node_load('C', 'FY', -1)
+        return model
+
+    def test_unstable_dof_is_reported(self):
+        """Test an unsupported DOF without stiffness is reported by node and direction"""
+        model = self.unstable_model()
+        with patch('builtins.print') as output:
+            with self.assertRaises(Exception) as context:
+                model.analyze_linear(check_stability=True)
+        self.assertIn('Unstable node(s)', str(context.exception))
+        messages = [str(call.args[0]) for call in output.call_args_list]
+        self.assertIn('* Nodal instability detected: node C is unstable for rotation about the '
+                      'global X axis.', messages)
+
+    def test_supported_dofs_are_not_reported(self):
+        """Test a DOF without stiffness is accepted when it is supported"""
+        model = self.unstable_model()
+        model.def_support('C', False, False, False, True, False, False)
+        model.analyze(check_stability=True)
+        self.assertLess(model.nodes['C'].DY['Combo 1'], 0.0)
+
+
+class TestReactions(unittest.TestCase):
+    """Test reactions recovered from the partitioned stiffness matrix"""
+
+    def assert_reactions_match(self, model):
+        """Checks the stored reactions against summed element end forces"""
+        for combo_name in model.load_combos:
+            for node_name in ('N000', 'N100', 'N200', 'N010', 'N110', 'N210'):
+                node = model.nodes[node_name]
+                R = [getattr(node, rxn)[combo_name]
+                     for rxn in ('RxnFX', 'RxnFY', 'RxnFZ', 'RxnMX', 'RxnMY', 'RxnMZ')]
+                np.testing.assert_allclose(R, reference_reactions(model, node_name, combo_name),
+                                           rtol=1e-8, atol=1e-8)
+
+    def test_tension_only_reactions(self):
+        """Test reactions after tension-only members have been deactivated"""
+        model = build_frame(tension_only=True)
+        model.def_node_disp('N200', 'DY', -0.01)
+        model.add_node_load('N000', 'FX', 3.0, case='W')
+        model.analyze()
+        self.assertIn(False, [model.members[name].active[combo_name]
+                              for name in ('BR1', 'BR2') for combo_name in model.load_combos])
+        self.assert_reactions_match(model)
+
+    def test_p_delta_reactions(self):
+        """Test P-Delta reactions include the geometric stiffness at the final state"""
+        model = build_frame()
+        model.add_node_load('N102', 'FY', -200, case='D')
+        model.analyze_PDelta()
+        self.assert_reactions_match(model)
+
+    def test_node_spring_reactions(self):
+        """Test a supported node spring reports its force on top of the member forces"""
+        model = build_frame()
+        model.def_support('N202', support_DZ=True)
+        model.def_node_disp('N202', 'DZ', 0.05)
+        model.analyze()
+        node = model.nodes['N202']
+        expected = reference_reactions(model, 'N202', '1.4D')[2] + 50.0*0.05
+        self.assertAlmostEqual(node.RxnFZ['1.4D'], expected)
+
+
+class TestLinearSolve(unittest.TestCase):
+    """Test the factor-once, multi-combination linear solution"""
+
+    def test_matches_combination_by_combination_solution(self):
+        """Test displacements match those from solving each combination separately"""
+        linear = build_frame()
+        linear.analyze_linear()
+        general = build_frame()
+        general.analyze()
+        for combo_name in linear.load_combos:
+            np.testing.assert_allclose(linear.D(combo_name), general.D(combo_name),
+                                       rtol=1e-9, atol=1e-12)
+            for node_name in ('N002', 'N112', 'N201'):
+                self.assertAlmostEqual(linear.nodes[node_name].DX[combo_name],
+                                       general.nodes[node_name].DX[combo_name])
+
+    def test_superposed_reactions_and_member_forces(self):
+        """Test superposed reactions and member forces match a direct solution"""
+        linear = build_frame()
+        linear.def_node_disp('N200', 'DY', -0.01)
+        linear.analyze_linear()
+        general = build_frame()
+        general.def_node_disp('N200', 'DY', -0.01)
+        general.analyze()
+        for combo_name in linear.load_combos:
+            for node_name in ('N000', 'N100', 'N200', 'N211', 'N202'):
+                for rxn in ('RxnFX', 'RxnFY', 'RxnMZ', 'RxnFZ'):
+                    self.assertAlmostEqual(getattr(linear.nodes[node_name], rxn)[combo_name],
+                                           getattr(general.nodes[node_name], rxn)[combo_name],
+                                           places=6)
+            for member_name in ('BX012', 'BZ11', 'BX001'):
+                self.assertAlmostEqual(linear.members[member_name].max_moment('Mz', combo_name),
+                                       general.members[member_name].max_moment('Mz', combo_name),
+                                       places=6)
+
+    def test_combinations_without_loads(self):
+        """Test a combination referencing an unused load case gives zero results"""
+        model = build_frame()
+        model.add_load_combo('Empty', {'Unused': 1.0})
+        model.analyze_linear()
+        self.assertAlmostEqual(model.nodes['N102'].DX['Empty'], 0.0)
+        self.assertAlmostEqual(model.nodes['N000'].RxnFY['Empty'], 0.0)
+
+    def test_dense_solver_matches_sparse_solver(self):
+        """Test the dense solution path gives the same displacements"""
+        sparse = build_frame()
+        sparse.analyze_linear(sparse=True)
+        dense = build_frame()
+        dense.analyze_linear(sparse=False)
+        for combo_name in sparse.load_combos:
+            np.testing.assert_allclose(sparse.D(combo_name), dense.D(combo_name),
+                                       rtol=1e-9, atol=1e-12)
+
+    def test_unstable_structure_raises(self):
+        """Test an unsupported structure is reported as singular"""
+        model = FEModel3D()
+        model.add_material('Steel', 29000, 11200, 0.3, 2.836e-4)
+        model.add_section('W', 10, 100, 150, 5)
+        model.add_node('A', 0, 0, 0)
+        model.add_node('B', 120, 0, 0)
+        model.add_member('M', 'A', 'B', 'Steel', 'W')
+        model.add_node_load('B', 'FY', -1)
+        with self.assertRaises(Exception) as context:
+            model.analyze_linear(check_stability=False)
+        self.assertIn('singular', str(context.exception))
+
+
+if __name__ == '__main__':
+    unittest.main()